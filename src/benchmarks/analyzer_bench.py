@@ -0,0 +1,193 @@
+# pyright: strict
+# benchmarks/analyzer_bench.py
+from benchmarks.tweet_generator import generate_tweets
+from latam.cli import QUERIES as CLI_QUERIES, MEMORY_ENGINE, build_analyzer
+from utils.constants import THREAD_BACKEND, RANGE_BACKEND, PROCESS_BACKEND
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+
+QUERIES = ["q1", "q2", "q3", "all"]
+MODES = ["memory", "time"]
+BACKENDS = [THREAD_BACKEND, RANGE_BACKEND, PROCESS_BACKEND]
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """
+    CALL: _peak_rss_mb()
+    DESCRIPTION: Returns the peak resident set size of this process, or of its largest worker process when that is
+    bigger, in MB. Uses getrusage on POSIX and psutil (a memory_profiler dependency) on Windows.
+    RESULT: Optional[float]
+    """
+    if resource is not None:
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+    try:
+        import psutil  # type: ignore
+        return psutil.Process().memory_info().peak_wset / 2**20  # type: ignore
+    except (ImportError, AttributeError):
+        return None
+
+def _build_analyzer(query: str, mode: str, file_path: str, chunk_size: int, workers: int, backend: str) -> Any:
+    """
+    CALL: _build_analyzer(query: str, mode: str, file_path: str, chunk_size: int, workers: int, backend: str)
+    DESCRIPTION: Builds the analyzer behind one q*_memory / q*_time / run_all variant with the CLI's build_analyzer,
+    without the printing and profiling of the scripts. It imports lazily, so each benchmark process only loads what it runs.
+    RESULT: Any
+    """
+    queries = CLI_QUERIES if query == "all" else [query]
+    return build_analyzer(file_path, queries, MEMORY_ENGINE if mode == "memory" else backend, chunk_size, workers)
+
+def _run_variant(variant: Dict[str, Any], results: "multiprocessing.Queue[Dict[str, Any]]") -> None:
+    """
+    CALL: _run_variant(variant: Dict[str, Any], results: multiprocessing.Queue)
+    DESCRIPTION: Runs inside a fresh benchmark process: times one analyze() call and puts the measurements (or the
+    error) on the queue.
+    RESULT: None
+    """
+    try:
+        analyzer = _build_analyzer(variant["query"], variant["mode"], variant["file_path"], variant["chunk_size"],
+                                   variant["workers"], variant["backend"])
+        start = time.perf_counter()
+        answer = analyzer.analyze()
+        wall_time = time.perf_counter() - start
+    except Exception as err:
+        results.put({"error": repr(err)})
+        return
+
+    results.put({
+        "wall_time": wall_time,
+        "peak_rss_mb": _peak_rss_mb(),
+        "rows_per_sec": variant["rows"] / wall_time if wall_time else None,
+        "answer": repr(answer),
+    })
+
+def run_variant(variant: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    CALL: run_variant(variant: Dict[str, Any])
+    DESCRIPTION: Runs one variant in a newly spawned interpreter, so the peak RSS of a run is not inherited from
+    earlier runs or from the runner, and returns the variant with its measurements.
+    RESULT: Dict[str, Any]
+    """
+    context = multiprocessing.get_context("spawn")
+    results: "multiprocessing.Queue[Dict[str, Any]]" = context.Queue()
+    process = context.Process(target=_run_variant, args=(variant, results))
+    process.start()
+    measurements = results.get()
+    process.join()
+    return {**variant, **measurements}
+
+def build_variants(file_path: str, rows: int, queries: List[str], modes: List[str], chunk_sizes: List[int],
+                   workers: List[int], backends: List[str]) -> List[Dict[str, Any]]:
+    """
+    CALL: build_variants(file_path, rows, queries, modes, chunk_sizes, workers, backends)
+    DESCRIPTION: Lists every query x mode x chunk size combination; "time" variants are also crossed with every
+    worker count and backend, "memory" ones run sequentially and are recorded with 1 worker and no backend.
+    RESULT: List[Dict[str, Any]]
+    """
+    variants: List[Dict[str, Any]] = []
+    for query in queries:
+        for mode in modes:
+            for chunk_size in chunk_sizes:
+                combinations = [(count, backend) for count in workers for backend in backends] if mode == "time" else [(1, None)]
+                for count, backend in combinations:
+                    variants.append({"query": query, "mode": mode, "chunk_size": chunk_size, "workers": count,
+                                     "backend": backend, "file_path": file_path, "rows": rows})
+    return variants
+
+def _git_commit() -> Optional[str]:
+    """
+    CALL: _git_commit()
+    DESCRIPTION: Returns the current git commit, so results can be compared across commits.
+    RESULT: Optional[str]
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(app_args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    CALL: run_benchmarks(app_args: argparse.Namespace)
+    DESCRIPTION: Generates (or reuses) one synthetic file per requested size, runs every variant on it `repeat` times
+    and writes wall time, peak RSS and rows/sec of each run, with the environment and git commit, to a JSON file.
+    RESULT: Dict[str, Any]
+    """
+    report: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "started": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "generator": {"emoji_density": app_args.emoji_density, "mention_density": app_args.mention_density,
+                      "users": app_args.users, "seed": app_args.seed},
+        "runs": [],
+    }
+
+    for rows in app_args.rows:
+        file_path = os.path.join(app_args.data_dir, f"tweets_{rows}_e{app_args.emoji_density}_m{app_args.mention_density}"
+                                                    f"_u{app_args.users}_s{app_args.seed}.jsonl")
+        if not os.path.exists(file_path):
+            generate_tweets(file_path, rows, app_args.emoji_density, app_args.mention_density, app_args.users, seed=app_args.seed)
+
+        variants = build_variants(file_path, rows, app_args.queries, app_args.modes, app_args.chunk_sizes,
+                                  app_args.workers, app_args.backends)
+        for variant in variants:
+            for repeat in range(app_args.repeat):
+                run = run_variant(variant)
+                run["repeat"] = repeat
+                report["runs"].append(run)
+                label = f"{rows:>10,} rows  {run['query']:<3} {run['mode']:<6} {str(run['backend']):<9} " \
+                        f"chunk {run['chunk_size']:>6,}  workers {run['workers']:>2}"
+                if "error" in run:
+                    print(f"{label}  failed: {run['error']}")
+                else:
+                    print(f"{label}  {run['wall_time']:8.3f} s  {run['peak_rss_mb'] or 0:8.1f} MB  {run['rows_per_sec'] or 0:>10,.0f} rows/sec")
+
+                with open(app_args.output, "w", encoding="utf-8") as output:
+                    json.dump(report, output, indent=2)
+
+    return report
+
+def get_bench_args() -> argparse.Namespace:
+    """
+    CALL: get_bench_args()
+    DESCRIPTION: This method defines how the benchmark command-line arguments should be parsed.
+    RESULT: argparse.Namespace
+    """
+    cpu_count = multiprocessing.cpu_count()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-rows", type=int, nargs="+", default=[10000, 100000], help="rows")
+    parser.add_argument("-queries", type=str, nargs="+", choices=QUERIES, default=QUERIES, help="queries")
+    parser.add_argument("-modes", type=str, nargs="+", choices=MODES, default=MODES, help="modes")
+    parser.add_argument("-chunk_sizes", type=int, nargs="+", default=[10000, 20000], help="chunk_sizes")
+    parser.add_argument("-workers", type=int, nargs="+", default=sorted({max(1, cpu_count // 2), cpu_count}), help="workers")
+    parser.add_argument("-backends", type=str, nargs="+", choices=BACKENDS, default=BACKENDS, help="backends")
+    parser.add_argument("-repeat", type=int, default=1, help="repeat")
+    parser.add_argument("-emoji_density", type=float, default=0.3, help="emoji_density")
+    parser.add_argument("-mention_density", type=float, default=0.5, help="mention_density")
+    parser.add_argument("-users", type=int, default=50000, help="users")
+    parser.add_argument("-seed", type=int, default=0, help="seed")
+    parser.add_argument("-data_dir", type=str, default=os.path.join("large_files", "benchmarks"), help="data_dir")
+    parser.add_argument("-output", type=str, default="benchmark_results.json", help="output")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    try:
+        run_benchmarks(get_bench_args())
+    except Exception as err:
+        logging.error(f"An unexpected error occurred, exception is {str(err)}", exc_info=err)
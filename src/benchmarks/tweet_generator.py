@@ -0,0 +1,113 @@
+# pyright: strict
+# benchmarks/tweet_generator.py
+from typing import Any, Dict, List
+from itertools import accumulate
+from datetime import datetime, timedelta, timezone
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import emoji
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "large_files", "raw_data_sample.txt")
+FIRST_DATE = datetime(2021, 2, 1, tzinfo=timezone.utc)
+WORDS = ["farmers", "protest", "india", "support", "delhi", "government", "laws", "kisan", "today", "stand",
+         "with", "the", "and", "for", "our", "we", "are", "not", "all", "this", "must", "be", "heard"]
+# Serialized template fields that change per row are replaced by these tokens and filled in with string joins
+FIELD_PATTERN = re.compile(r'"@@(\w+)@@"')
+
+
+def _compile_template(record: Dict[str, Any]) -> List[str]:
+    """
+    CALL: _compile_template(record: Dict[str, Any])
+    DESCRIPTION: Serializes a sample tweet once with placeholder tokens in the per-row fields and splits it
+    into alternating literal parts and field names.
+    RESULT: List[str]
+    """
+    record = dict(record, user=dict(record["user"]))
+    for field in ("url", "date", "content", "renderedContent", "id", "conversationId", "mentionedUsers"):
+        record[field] = f"@@{field}@@"
+    record["user"]["username"] = "@@username@@"
+    return FIELD_PATTERN.split(json.dumps(record))
+
+def _zipf_cum_weights(size: int, skew: float) -> List[float]:
+    """
+    CALL: _zipf_cum_weights(size: int, skew: float)
+    DESCRIPTION: Cumulative Zipf-like weights (rank ** -skew) for random.choices, so a few names are much more frequent.
+    RESULT: List[float]
+    """
+    return list(accumulate(rank ** -skew for rank in range(1, size + 1)))
+
+def generate_tweets(file_path: str, num_rows: int, emoji_density: float = 0.3, mention_density: float = 0.5,
+                    num_users: int = 50000, num_days: int = 28, seed: int = 0) -> str:
+    """
+    CALL: generate_tweets(file_path: str, num_rows: int, emoji_density: float = 0.3, mention_density: float = 0.5,
+          num_users: int = 50000, num_days: int = 28, seed: int = 0)
+    DESCRIPTION: Writes num_rows synthetic tweets as JSONL, with the schema and the record sizes of the tweets in
+    raw_data_sample.txt. Authors, mentioned users and emojis follow Zipf-like distributions; emoji_density and
+    mention_density are the share of tweets holding emojis and mentions (1 to 3 of each). The same arguments and
+    seed always produce the same file. Rows are streamed to disk, so any size can be generated in constant memory.
+    RESULT: str
+    """
+    rng = random.Random(seed)
+    with open(SAMPLE_PATH, encoding="utf-8") as sample:
+        templates = [_compile_template(json.loads(line)) for line in sample if line.strip()]
+
+    users = [f"user_{index}" for index in range(num_users)]
+    user_cum_weights = _zipf_cum_weights(len(users), 1.1)
+    emojis = sorted(emoji.EMOJI_DATA)
+    rng.shuffle(emojis)
+    emoji_cum_weights = _zipf_cum_weights(len(emojis), 1.2)
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as file:
+        for row in range(num_rows):
+            username = rng.choices(users, cum_weights=user_cum_weights)[0]
+            words = rng.choices(WORDS, k=rng.randint(5, 30))
+            mentions: List[str] = []
+            if rng.random() < mention_density:
+                mentions = rng.choices(users, cum_weights=user_cum_weights, k=rng.randint(1, 3))
+                words += [f"@{mention}" for mention in mentions]
+            if rng.random() < emoji_density:
+                words += rng.choices(emojis, cum_weights=emoji_cum_weights, k=rng.randint(1, 3))
+            rng.shuffle(words)
+            content = " ".join(words)
+
+            tweet_id = 1356000000000000000 + row
+            date = FIRST_DATE + timedelta(seconds=rng.randrange(num_days * 86400))
+            values = {
+                "url": json.dumps(f"https://twitter.com/{username}/status/{tweet_id}"),
+                "date": json.dumps(date.isoformat()),
+                "content": json.dumps(content),
+                "renderedContent": json.dumps(content),
+                "id": str(tweet_id),
+                "conversationId": str(tweet_id),
+                "mentionedUsers": json.dumps([{"username": mention, "displayname": mention, "url": f"https://twitter.com/{mention}"}
+                                              for mention in mentions] or None),
+                "username": json.dumps(username),
+            }
+            parts = rng.choice(templates)
+            file.write("".join(values[part] if index % 2 else part for index, part in enumerate(parts)))
+            file.write("\n")
+
+    logging.info(f"Generated {num_rows:,} tweets in {file_path}")
+    return file_path
+
+if __name__ == '__main__':
+    try:
+        parser = argparse.ArgumentParser()
+        parser.add_argument("-file_path", type=str, required=True, help="file_path")
+        parser.add_argument("-rows", type=int, default=100000, help="rows")
+        parser.add_argument("-emoji_density", type=float, default=0.3, help="emoji_density")
+        parser.add_argument("-mention_density", type=float, default=0.5, help="mention_density")
+        parser.add_argument("-users", type=int, default=50000, help="users")
+        parser.add_argument("-days", type=int, default=28, help="days")
+        parser.add_argument("-seed", type=int, default=0, help="seed")
+        app_args = parser.parse_args()
+        generate_tweets(app_args.file_path, app_args.rows, app_args.emoji_density, app_args.mention_density,
+                        app_args.users, app_args.days, app_args.seed)
+    except Exception as err:
+        logging.error(f"An unexpected error occurred, exception is {str(err)}", exc_info=err)
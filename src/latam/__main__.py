@@ -0,0 +1,7 @@
+# pyright: strict
+# latam/__main__.py
+import sys
+from latam.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+# pyright: strict
+# latam/cli.py
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from datetime import date
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from utils.constants import THREAD_BACKEND, RANGE_BACKEND, PROCESS_BACKEND
+
+# Only constants are imported here: analyzers, pandas and the emoji database are loaded once a query runs
+QUERIES = ["q1", "q2", "q3"]
+MEMORY_ENGINE = "memory"
+ENGINES = [MEMORY_ENGINE, THREAD_BACKEND, RANGE_BACKEND, PROCESS_BACKEND]
+FORMATS = ["text", "json"]
+FilePaths = Union[str, Sequence[str]]
+
+
+def build_analyzer(file_path: FilePaths, queries: Sequence[str], engine: str = MEMORY_ENGINE, chunk_size: Optional[int] = None,
+                   workers: Optional[int] = None, use_cache: bool = False, capacity: Optional[int] = None,
+                   adaptive: bool = False, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                   pipelined: bool = False, memory_budget_mb: Optional[float] = None, spill_dir: Optional[str] = None) -> Any:
+    """
+    CALL: build_analyzer(file_path: FilePaths, queries: Sequence[str], engine: str = "memory", chunk_size: Optional[int] = None,
+          workers: Optional[int] = None, use_cache: bool = False, capacity: Optional[int] = None, adaptive: bool = False,
+          start_date: Optional[date] = None, end_date: Optional[date] = None, pipelined: bool = False,
+          memory_budget_mb: Optional[float] = None, spill_dir: Optional[str] = None)
+    DESCRIPTION: Builds the analyzer answering the queries: the query's own analyzer for a single query, the single-pass
+    report analyzer for several. "memory" reads sequentially, the other engines are the concurrent backends.
+    Modules are imported here, so a run only loads what its analyzer needs. capacity, pipelined and memory_budget_mb
+    (exact q1 and q3 counters spilling to spill_dir, see SpillCounter) only apply to "memory"; a memory_budget_mb
+    with another engine raises ValueError.
+    file_path can be a glob or a list of files, processed as one input with per-range partials merged.
+    start_date and end_date keep only the tweets of those UTC days, reading only their byte ranges (see DateIndex).
+    RESULT: Any
+    """
+    from utils.constants import SMALL_CHUNK_SIZE, MEDIUM_CHUNK_SIZE, TWEET_COLUMNS, CONTENT_COLUMNS, REPORT_COLUMNS
+
+    columns = {"q1": TWEET_COLUMNS, "q2": CONTENT_COLUMNS, "q3": CONTENT_COLUMNS}[queries[0]] if len(queries) == 1 else REPORT_COLUMNS
+    if engine != MEMORY_ENGINE:
+        if memory_budget_mb:
+            raise ValueError(f"--memory-budget-mb only applies to the memory engine, not {engine}")
+        chunk_size = chunk_size or MEDIUM_CHUNK_SIZE
+        workers = workers or os.cpu_count() or 1
+        if len(queries) > 1:
+            from mgr.report_mgr.report_thread_mgr import ReportThreadAnalyzer
+            return ReportThreadAnalyzer(file_path, chunk_size, workers, columns, engine, use_cache=use_cache, adaptive=adaptive,
+                                        start_date=start_date, end_date=end_date)
+        if queries[0] == "q1":
+            from mgr.tweet_mgr.tweet_thread_mgr import TweetThreadAnalyzer
+            return TweetThreadAnalyzer(file_path, chunk_size, workers, columns, engine, use_cache=use_cache, adaptive=adaptive,
+                                       start_date=start_date, end_date=end_date)
+        if queries[0] == "q2":
+            from mgr.emoji_mgr.emoji_thread_mgr import EmojiThreadAnalyzer
+            return EmojiThreadAnalyzer(file_path, chunk_size, workers, columns, engine, use_cache=use_cache, adaptive=adaptive,
+                                       start_date=start_date, end_date=end_date)
+        from mgr.user_mgr.user_thread_mgr import UserThreadAnalyzer
+        return UserThreadAnalyzer(file_path, chunk_size, workers, columns, engine, use_cache=use_cache, adaptive=adaptive,
+                                  start_date=start_date, end_date=end_date)
+
+    from mgr.multi_file_mgr import open_reader
+    reader = open_reader(file_path, chunk_size or SMALL_CHUNK_SIZE, columns, use_cache=use_cache, adaptive=adaptive,
+                         start_date=start_date, end_date=end_date)
+    if len(queries) > 1:
+        from mgr.tweet_mgr.tweet_aggregator_mgr import TweetAggregator
+        from mgr.emoji_mgr.emoji_aggregator_mgr import EmojiAggregator
+        from mgr.user_mgr.user_aggregator_mgr import UserAggregator
+        from mgr.report_mgr.report_analyzer_mgr import ReportAnalyzer
+        return ReportAnalyzer(reader, TweetAggregator(capacity, memory_budget_mb, spill_dir), EmojiAggregator(capacity),
+                              UserAggregator(capacity, memory_budget_mb, spill_dir), pipelined)
+    if queries[0] == "q1":
+        from mgr.tweet_mgr.tweet_aggregator_mgr import TweetAggregator
+        from mgr.tweet_mgr.tweet_analyzer_mgr import TweetAnalyzer
+        return TweetAnalyzer(reader, TweetAggregator(capacity, memory_budget_mb, spill_dir), pipelined)
+    if queries[0] == "q2":
+        from mgr.emoji_mgr.emoji_aggregator_mgr import EmojiAggregator
+        from mgr.emoji_mgr.emoji_analyzer_mgr import EmojiAnalyzer
+        return EmojiAnalyzer(reader, EmojiAggregator(capacity), pipelined)
+    from mgr.user_mgr.user_aggregator_mgr import UserAggregator
+    from mgr.user_mgr.user_analyzer_mgr import UserAnalyzer
+    return UserAnalyzer(reader, UserAggregator(capacity, memory_budget_mb, spill_dir), pipelined)
+
+def run_queries(file_path: FilePaths, queries: Sequence[str], engine: str = MEMORY_ENGINE, chunk_size: Optional[int] = None,
+                workers: Optional[int] = None, top_n: int = 10, use_cache: bool = False, capacity: Optional[int] = None,
+                adaptive: bool = False, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                pipelined: bool = False, memory_budget_mb: Optional[float] = None,
+                spill_dir: Optional[str] = None) -> Dict[str, List[Tuple[Any, Any]]]:
+    """
+    CALL: run_queries(file_path: FilePaths, queries: Sequence[str], engine: str = "memory", chunk_size: Optional[int] = None,
+          workers: Optional[int] = None, top_n: int = 10, use_cache: bool = False, capacity: Optional[int] = None,
+          adaptive: bool = False, start_date: Optional[date] = None, end_date: Optional[date] = None, pipelined: bool = False,
+          memory_budget_mb: Optional[float] = None, spill_dir: Optional[str] = None)
+    DESCRIPTION: Answers the queries with one read of the file and returns the results keyed by query name.
+    Several queries share the report analyzers, which compute all three; the ones not asked for are dropped.
+    The utilization of a pipelined run is printed to stderr.
+    RESULT: Dict[str, List[Tuple[Any, Any]]]
+    """
+    analyzer = build_analyzer(file_path, queries, engine, chunk_size, workers, use_cache, capacity, adaptive, start_date, end_date,
+                              pipelined, memory_budget_mb, spill_dir)
+    results = analyzer.analyze(top_n)
+    if getattr(analyzer, "pipeline_stats", None):
+        print(f"Pipeline:\n{analyzer.pipeline_stats}", file=sys.stderr)
+    if len(queries) == 1:
+        return {queries[0]: results}
+    return {query: results[query] for query in queries}
+
+def _to_json(value: Any) -> Any:
+    """Dates become ISO strings in the JSON output."""
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def format_results(results: Dict[str, List[Tuple[Any, Any]]], output_format: str, metadata: Dict[str, Any]) -> str:
+    """
+    CALL: format_results(results: Dict[str, List[Tuple[Any, Any]]], output_format: str, metadata: Dict[str, Any])
+    DESCRIPTION: Renders the results either as one JSON document (the run settings plus the results, each pair as
+    a two-item list) or as one line per result for a terminal.
+    RESULT: str
+    """
+    if output_format == "json":
+        return json.dumps({**metadata, "results": results}, default=_to_json, ensure_ascii=False)
+
+    lines: List[str] = []
+    for query, pairs in results.items():
+        lines.append(f"{query}:")
+        lines.extend(f"  {_to_json(key) if isinstance(key, date) else key}\t{value}" for key, value in pairs)
+    lines.append(f"({metadata['elapsed_seconds']:.3f} seconds, engine {metadata['engine']})")
+    return "\n".join(lines)
+
+def _parse_queries(value: str) -> List[str]:
+    """Parses --query: a comma-separated list of q1, q2 and q3, or "all"."""
+    if value == "all":
+        return list(QUERIES)
+    queries = [query.strip() for query in value.split(",") if query.strip()]
+    unknown = [query for query in queries if query not in QUERIES]
+    if unknown or not queries:
+        raise argparse.ArgumentTypeError(f"unknown query {', '.join(unknown) or value!r}, expected a list of {', '.join(QUERIES)}")
+    return sorted(set(queries), key=QUERIES.index)
+
+def get_cli_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    CALL: get_cli_args(argv: Optional[Sequence[str]] = None)
+    DESCRIPTION: This method defines how the command-line arguments of python -m latam should be parsed.
+    RESULT: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(prog="python -m latam", description="Answers q1, q2 and q3 over a JSON lines file of tweets.")
+    parser.add_argument("file_path", type=str, nargs="+", help="JSON lines files of tweets or glob patterns, processed as one input")
+    parser.add_argument("--query", type=_parse_queries, default=list(QUERIES), help="comma-separated queries: q1,q2,q3 (default: all)")
+    parser.add_argument("--engine", type=str, choices=ENGINES, default=MEMORY_ENGINE, help="sequential memory engine or concurrent backend")
+    parser.add_argument("--chunk-size", type=int, default=None, help="rows per chunk (default: 10000 for memory, 20000 otherwise)")
+    parser.add_argument("--workers", type=int, default=None, help="worker threads or processes (default: CPU count)")
+    parser.add_argument("--top-n", type=int, default=10, help="results per query")
+    parser.add_argument("--format", type=str, choices=FORMATS, default="text", help="output format")
+    parser.add_argument("--use-cache", action="store_true", help="read through the columnar cache")
+    parser.add_argument("--capacity", type=int, default=None, help="bounded-memory top-N summary size (memory engine)")
+    parser.add_argument("--adaptive-chunks", action="store_true", help="tune the chunk size while reading")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=None, help="first UTC day to count, YYYY-MM-DD")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="last UTC day to count, YYYY-MM-DD")
+    parser.add_argument("--pipeline", action="store_true", help="overlap reading, decoding and counting (memory engine)")
+    parser.add_argument("--memory-budget-mb", type=float, default=None, help="exact q1/q3 counters spill to disk past this size (memory engine)")
+    parser.add_argument("--spill-dir", type=str, default=None, help="directory of the spilled runs (default: system temporary directory)")
+    parser.add_argument("--metrics-path", type=str, default=None, help="append per-stage metrics to this JSON lines file")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    CALL: main(argv: Optional[Sequence[str]] = None)
+    DESCRIPTION: Entry point of python -m latam: runs the selected queries and prints their results to stdout.
+    Errors are logged to stderr and turn into exit status 1.
+    RESULT: int
+    """
+    app_args = get_cli_args(argv)
+    if app_args.metrics_path:
+        from utils.metrics import JsonLinesSink, enable_metrics
+        enable_metrics(JsonLinesSink(app_args.metrics_path))
+
+    try:
+        started = time.perf_counter()
+        results = run_queries(app_args.file_path, app_args.query, app_args.engine, app_args.chunk_size, app_args.workers,
+                              app_args.top_n, app_args.use_cache, app_args.capacity, app_args.adaptive_chunks,
+                              app_args.start_date, app_args.end_date, app_args.pipeline, app_args.memory_budget_mb, app_args.spill_dir)
+        elapsed = time.perf_counter() - started
+    except Exception as err:
+        logging.error(f"An unexpected error occurred, exception is {str(err)}", exc_info=err)
+        return 1
+    finally:
+        if app_args.metrics_path:
+            from utils.metrics import disable_metrics
+            disable_metrics()
+
+    metadata = {"file_path": app_args.file_path, "engine": app_args.engine, "queries": app_args.query,
+                "top_n": app_args.top_n, "start_date": app_args.start_date, "end_date": app_args.end_date,
+                "elapsed_seconds": elapsed}
+    print(format_results(results, app_args.format, metadata))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+# pyright: strict
+# latam/partials.py
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import date
+import argparse
+import concurrent.futures
+import logging
+import os
+import sys
+import time
+from latam.cli import QUERIES, FilePaths, _parse_queries, format_results
+from utils.constants import SMALL_CHUNK_SIZE
+
+PARTIALS_ENGINE = "partials"
+
+
+def _new_aggregator(query: str, capacity: Optional[int], memory_budget_mb: Optional[float] = None,
+                    spill_dir: Optional[str] = None) -> Any:
+    """Returns an empty aggregator of the query, imported on demand like in build_analyzer."""
+    if query == "q1":
+        from mgr.tweet_mgr.tweet_aggregator_mgr import TweetAggregator
+        return TweetAggregator(capacity, memory_budget_mb, spill_dir)
+    if query == "q2":
+        from mgr.emoji_mgr.emoji_aggregator_mgr import EmojiAggregator
+        return EmojiAggregator(capacity)
+    from mgr.user_mgr.user_aggregator_mgr import UserAggregator
+    return UserAggregator(capacity, memory_budget_mb, spill_dir)
+
+def _load_aggregator(query: str, data: bytes) -> Any:
+    """Rebuilds the aggregator of the query from its serialized partial state."""
+    return type(_new_aggregator(query, None)).deserialize(data)
+
+def write_partial(file_path: FilePaths, output_path: str, queries: Sequence[str], part: int = 0, parts: int = 1,
+                  chunk_size: int = SMALL_CHUNK_SIZE, capacity: Optional[int] = None,
+                  start_date: Optional[date] = None, end_date: Optional[date] = None,
+                  memory_budget_mb: Optional[float] = None, spill_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    CALL: write_partial(file_path: FilePaths, output_path: str, queries: Sequence[str], part: int = 0, parts: int = 1,
+          chunk_size: int = 10000, capacity: Optional[int] = None, start_date: Optional[date] = None, end_date: Optional[date] = None,
+          memory_budget_mb: Optional[float] = None, spill_dir: Optional[str] = None)
+    DESCRIPTION: Worker side: counts part number `part` (from 0) of the input split into `parts` newline-aligned
+    ranges (see ChunkReader.split) and writes the partial aggregators of the queries to output_path. Every worker
+    invocation, on any machine holding the same files, computes the same split, so `parts` workers cover the input
+    exactly once. When the input splits into fewer ranges, the extra parts write empty partials.
+    With a memory_budget_mb the q1 and q3 counts spill to spill_dir while counting (see SpillCounter); the file
+    holds their merged totals.
+    RESULT: Dict[str, Any]
+    """
+    from mgr.multi_file_mgr import open_reader
+    from mgr.partial_mgr import write_partials
+    from utils.constants import TWEET_COLUMNS, CONTENT_COLUMNS, REPORT_COLUMNS
+
+    if not 0 <= part < parts:
+        raise ValueError(f"part must be between 0 and {parts - 1}, got {part}")
+    columns = {"q1": TWEET_COLUMNS, "q2": CONTENT_COLUMNS, "q3": CONTENT_COLUMNS}[queries[0]] if len(queries) == 1 else REPORT_COLUMNS
+    reader = open_reader(file_path, chunk_size, columns, start_date=start_date, end_date=end_date)
+    readers = reader.split(parts) if parts > 1 else [reader]
+    aggregators = {query: _new_aggregator(query, capacity, memory_budget_mb, spill_dir) for query in queries}
+
+    rows = 0
+    if part < len(readers):
+        for chunk in readers[part].read_chunks():
+            for aggregator in aggregators.values():
+                aggregator.process_chunk(chunk)
+            rows += len(chunk)
+
+    metadata = {"file_path": file_path, "part": part, "parts": parts, "queries": list(queries), "rows": rows,
+                "capacity": capacity, "memory_budget_mb": memory_budget_mb, "start_date": start_date, "end_date": end_date}
+    write_partials(output_path, {query: aggregator.serialize() for query, aggregator in aggregators.items()}, metadata)
+    return metadata
+
+def combine_partials(partial_paths: Sequence[str], top_n: int = 10,
+                     workers: Optional[int] = None) -> Tuple[Dict[str, List[Tuple[Any, Any]]], List[Dict[str, Any]]]:
+    """
+    CALL: combine_partials(partial_paths: Sequence[str], top_n: int = 10, workers: Optional[int] = None)
+    DESCRIPTION: Coordinator side: loads the partial files written by write_partial in parallel, merges the
+    aggregators of each query with a parallel tree reduction and returns the final results of the queries present
+    in every file, with the metadata of each file. Raises ValueError unless the files of every input hold each part
+    of one split exactly once: two files holding the same part, or parts of different splits, would count rows
+    twice, and a missing part would leave rows out. Files counting different date windows raise it too.
+    RESULT: Tuple[Dict[str, List[Tuple[Any, Any]]], List[Dict[str, Any]]]
+    """
+    from mgr.concurrent_mgr import tree_reduce
+    from mgr.partial_mgr import read_partials
+
+    if not partial_paths:
+        raise ValueError("No partial files to combine")
+
+    def load(path: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        partials, metadata = read_partials(path)
+        return {query: _load_aggregator(query, data) for query, data in partials.items()}, metadata
+
+    workers = workers or os.cpu_count() or 1
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        loaded = list(executor.map(load, partial_paths))
+
+        # Every input must be covered by exactly one full split: parts 0 .. parts - 1, each once
+        splits: Dict[str, Tuple[int, Dict[int, str]]] = {}
+        for path, (_, metadata) in zip(partial_paths, loaded):
+            parts, seen = splits.setdefault(repr(metadata["file_path"]), (metadata["parts"], {}))
+            if metadata["parts"] != parts:
+                raise ValueError(f"{path} splits {metadata['file_path']} into {metadata['parts']} parts, "
+                                 f"{next(iter(seen.values()))} into {parts}")
+            if metadata["part"] in seen:
+                raise ValueError(f"{path} and {seen[metadata['part']]} both hold part {metadata['part']} of {parts} of {metadata['file_path']}")
+            seen[metadata["part"]] = path
+            window = (metadata["start_date"], metadata["end_date"])
+            if window != (loaded[0][1]["start_date"], loaded[0][1]["end_date"]):
+                raise ValueError(f"{path} counts the dates {window}, {partial_paths[0]} another window")
+        for file_path, (parts, seen) in splits.items():
+            missing = sorted(set(range(parts)) - set(seen))
+            if missing:
+                raise ValueError(f"Parts {missing} of {parts} of {file_path} are missing")
+
+        queries = [query for query in QUERIES if all(query in aggregators for aggregators, _ in loaded)]
+        if not queries:
+            raise ValueError("The partial files have no query in common")
+        results: Dict[str, List[Tuple[Any, Any]]] = {}
+        for query in queries:
+            merged = tree_reduce((aggregators[query] for aggregators, _ in loaded), lambda left, right: left.merge(right), executor, workers) # type: ignore
+            results[query] = merged.finalize(top_n) # type: ignore
+
+    return results, [metadata for _, metadata in loaded]
+
+def get_partials_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    CALL: get_partials_args(argv: Optional[Sequence[str]] = None)
+    DESCRIPTION: This method defines how the command-line arguments of python -m latam.partials should be parsed.
+    RESULT: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(prog="python -m latam.partials",
+                                     description="Writes partial aggregates of part of the input, or combines them into q1, q2 and q3.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    write = commands.add_parser("write", help="count one part of the input and write its partial aggregates")
+    write.add_argument("file_path", type=str, nargs="+", help="JSON lines files of tweets or glob patterns, processed as one input")
+    write.add_argument("--output", type=str, required=True, help="partial file to write")
+    write.add_argument("--part", type=int, default=0, help="part of the input to count, from 0")
+    write.add_argument("--parts", type=int, default=1, help="number of parts the input is split into")
+    write.add_argument("--query", type=_parse_queries, default=list(QUERIES), help="comma-separated queries: q1,q2,q3 (default: all)")
+    write.add_argument("--chunk-size", type=int, default=SMALL_CHUNK_SIZE, help="rows per chunk")
+    write.add_argument("--capacity", type=int, default=None, help="bounded-memory top-N summary size")
+    write.add_argument("--memory-budget-mb", type=float, default=None, help="exact q1/q3 counters spill to disk past this size")
+    write.add_argument("--spill-dir", type=str, default=None, help="directory of the spilled runs (default: system temporary directory)")
+    write.add_argument("--start-date", type=date.fromisoformat, default=None, help="first UTC day to count, YYYY-MM-DD")
+    write.add_argument("--end-date", type=date.fromisoformat, default=None, help="last UTC day to count, YYYY-MM-DD")
+
+    combine = commands.add_parser("combine", help="merge partial files and print the results")
+    combine.add_argument("partial_path", type=str, nargs="+", help="partial files written by the workers")
+    combine.add_argument("--top-n", type=int, default=10, help="results per query")
+    combine.add_argument("--format", type=str, choices=["text", "json"], default="text", help="output format")
+    combine.add_argument("--workers", type=int, default=None, help="threads loading and merging the partials (default: CPU count)")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    CALL: main(argv: Optional[Sequence[str]] = None)
+    DESCRIPTION: Entry point of python -m latam.partials. Errors are logged to stderr and turn into exit status 1.
+    RESULT: int
+    """
+    app_args = get_partials_args(argv)
+    try:
+        started = time.perf_counter()
+        if app_args.command == "write":
+            metadata = write_partial(app_args.file_path, app_args.output, app_args.query, app_args.part, app_args.parts,
+                                     app_args.chunk_size, app_args.capacity, app_args.start_date, app_args.end_date,
+                                     app_args.memory_budget_mb, app_args.spill_dir)
+            print(f"Wrote {metadata['rows']} rows of part {app_args.part} of {app_args.parts} to {app_args.output} "
+                  f"in {time.perf_counter() - started:.3f} seconds")
+            return 0
+        results, partials = combine_partials(app_args.partial_path, app_args.top_n, app_args.workers)
+        elapsed = time.perf_counter() - started
+    except Exception as err:
+        logging.error(f"An unexpected error occurred, exception is {str(err)}", exc_info=err)
+        return 1
+
+    metadata = {"partial_paths": app_args.partial_path, "engine": PARTIALS_ENGINE, "queries": list(results),
+                "rows": sum(partial["rows"] for partial in partials), "top_n": app_args.top_n, "elapsed_seconds": elapsed}
+    print(format_results(results, app_args.format, metadata))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# pyright: strict
+# latam/server.py
+from typing import Any, Dict, Optional, Sequence, Type
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import argparse
+import json
+import logging
+import sys
+import time
+from latam.cli import QUERIES, _to_json
+from mgr.service_mgr import QueryService
+from utils.constants import SMALL_CHUNK_SIZE, SERVICE_POLL_INTERVAL, SERVICE_PORT
+
+
+def make_handler(service: QueryService) -> Type[BaseHTTPRequestHandler]:
+    """
+    CALL: make_handler(service: QueryService)
+    DESCRIPTION: Builds the request handler answering from the service:
+    - GET /q1, /q2, /q3 with optional top_n, and start_date / end_date for q1, returns the results;
+    - GET /report returns q1, q2 and q3 together;
+    - GET /status returns the ingested files, rows and state version;
+    - POST /refresh ingests the appended rows right away instead of waiting for the watcher.
+    Every response is a JSON document; bad parameters answer 400.
+    RESULT: Type[BaseHTTPRequestHandler]
+    """
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        server_version = "latam"
+
+        def _send(self, status: int, body: Dict[str, Any]) -> None:
+            payload = json.dumps(body, default=_to_json, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self) -> None:
+            started = time.perf_counter()
+            url = urlparse(self.path)
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            route = url.path.strip("/")
+            try:
+                if route == "status":
+                    return self._send(200, service.status())
+
+                top_n = int(params.get("top_n", 10))
+                if route == "report":
+                    results = {query: service.query(query, top_n)[0] for query in QUERIES}
+                    cached = False
+                elif route in QUERIES:
+                    start_date = date.fromisoformat(params["start_date"]) if "start_date" in params else None
+                    end_date = date.fromisoformat(params["end_date"]) if "end_date" in params else None
+                    pairs, cached = service.query(route, top_n, start_date, end_date)
+                    results = {route: pairs}
+                else:
+                    return self._send(404, {"error": f"Unknown path '{url.path}'"})
+            except ValueError as err:
+                return self._send(400, {"error": str(err)})
+
+            self._send(200, {"results": results, "cached": cached, "version": service.version,
+                             "elapsed_ms": (time.perf_counter() - started) * 1000})
+
+        def do_POST(self) -> None:
+            if urlparse(self.path).path.strip("/") != "refresh":
+                return self._send(404, {"error": f"Unknown path '{self.path}'"})
+            rows = service.refresh()
+            self._send(200, {"ingested": rows, **service.status()})
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logging.debug(f"{self.address_string()} {format % args}")
+
+    return QueryHandler
+
+def serve(service: QueryService, host: str = "127.0.0.1", port: int = SERVICE_PORT,
+          poll_interval: Optional[float] = SERVICE_POLL_INTERVAL) -> None:
+    """
+    CALL: serve(service: QueryService, host: str = "127.0.0.1", port: int = 8765, poll_interval: Optional[float] = 2.0)
+    DESCRIPTION: Loads the dataset, starts watching it every poll_interval seconds (never when None or 0) and
+    answers HTTP requests until interrupted.
+    RESULT: None
+    """
+    started = time.perf_counter()
+    rows = service.refresh()
+    logging.info(f"Loaded {rows} rows of {service.file_path} in {time.perf_counter() - started:.1f} seconds")
+    if poll_interval:
+        service.watch(poll_interval)
+
+    httpd = ThreadingHTTPServer((host, port), make_handler(service))
+    httpd.daemon_threads = True
+    logging.info(f"Serving q1, q2 and q3 on http://{host}:{httpd.server_port}")
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
+        service.stop()
+
+def get_server_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    CALL: get_server_args(argv: Optional[Sequence[str]] = None)
+    DESCRIPTION: This method defines how the command-line arguments of python -m latam.server should be parsed.
+    RESULT: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(prog="python -m latam.server", description="Serves q1, q2 and q3 from in-memory aggregates.")
+    parser.add_argument("file_path", type=str, nargs="+", help="JSON lines files of tweets or glob patterns, watched for new rows")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="port to listen on")
+    parser.add_argument("--poll-interval", type=float, default=SERVICE_POLL_INTERVAL, help="seconds between file checks (0 disables watching)")
+    parser.add_argument("--chunk-size", type=int, default=SMALL_CHUNK_SIZE, help="rows per chunk")
+    parser.add_argument("--capacity", type=int, default=None, help="bounded-memory top-N summary size")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    CALL: main(argv: Optional[Sequence[str]] = None)
+    DESCRIPTION: Entry point of python -m latam.server.
+    RESULT: int
+    """
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    app_args = get_server_args(argv)
+    service = QueryService(app_args.file_path, app_args.chunk_size, app_args.capacity)
+    try:
+        serve(service, app_args.host, app_args.port, app_args.poll_interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+# pyright: strict
+# mgr/cache_mgr.py
+from typing import Iterable, Iterator, List, Optional
+import glob
+import hashlib
+import logging
+import os
+import pandas as pd
+from utils.constants import CACHE_COLUMNS, CACHE_DIR_NAME, USERNAME_COLUMN
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError:
+    pa = None
+    pq = None
+
+
+class ColumnarCache:
+    """
+    Sidecar Parquet cache of the parsed tweet fields (date, user.username, content) of a JSONL file.
+    The cache file name embeds a hash of the source path, size and mtime, so any change to the source
+    makes the old cache unreachable. Reads are memory-mapped and only decode the requested columns.
+    """
+
+    def __init__(self, file_path: str, cache_dir: Optional[str] = None):
+        self.file_path = os.path.abspath(file_path)
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(self.file_path), CACHE_DIR_NAME)
+
+    @staticmethod
+    def is_available() -> bool:
+        """
+        CALL: is_available()
+        DESCRIPTION: Tells whether pyarrow is installed, which the cache needs.
+        RESULT: bool
+        """
+        return pq is not None
+
+    @property
+    def path(self) -> str:
+        """Cache file for the current path, size and mtime of the source file."""
+        stat = os.stat(self.file_path)
+        key = f"{self.file_path}|{stat.st_size}|{stat.st_mtime_ns}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{os.path.basename(self.file_path)}.{digest}.parquet")
+
+    def covers(self, columns: Optional[List[str]]) -> bool:
+        """
+        CALL: covers(self, columns: Optional[List[str]])
+        DESCRIPTION: Tells whether a projection can be answered from the cache (full records cannot).
+        RESULT: bool
+        """
+        return columns is not None and set(columns) <= set(CACHE_COLUMNS)
+
+    def exists(self) -> bool:
+        """
+        CALL: exists(self)
+        DESCRIPTION: Tells whether a cache matching the current source file has been built.
+        RESULT: bool
+        """
+        return os.path.exists(self.path)
+
+    def write_through(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        CALL: write_through(self, chunks: Iterable[pd.DataFrame])
+        DESCRIPTION: Writes each decoded chunk (projected on CACHE_COLUMNS) as one Parquet row group and then
+        yields it, so a first run builds the cache while it is being answered. The file is written under a
+        temporary name and only renamed once every chunk was consumed; caches of older versions of the same
+        source file are then removed.
+        RESULT: Iterator[pd.DataFrame]
+        """
+        schema = pa.schema([ # type: ignore
+            ("date", pa.timestamp("ns", tz="UTC")), # type: ignore
+            (USERNAME_COLUMN, pa.string()), # type: ignore
+            ("content", pa.string()), # type: ignore
+        ])
+        path = self.path
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+
+        try:
+            with pq.ParquetWriter(temp_path, schema) as writer: # type: ignore
+                for chunk in chunks:
+                    writer.write_table(pa.Table.from_pandas(chunk[CACHE_COLUMNS], schema=schema, preserve_index=False)) # type: ignore
+                    yield chunk
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        for stale_path in glob.glob(os.path.join(self.cache_dir, glob.escape(os.path.basename(self.file_path)) + ".*.parquet")):
+            if stale_path != path:
+                os.remove(stale_path)
+
+        logging.info(f"Built columnar cache {path}")
+
+    def build(self, chunks: Iterable[pd.DataFrame]) -> str:
+        """
+        CALL: build(self, chunks: Iterable[pd.DataFrame])
+        DESCRIPTION: Writes the whole cache from the decoded chunks and returns its path.
+        RESULT: str
+        """
+        for _ in self.write_through(chunks):
+            pass
+        return self.path
+
+    def read_chunks(self, columns: List[str], chunk_size: int) -> Iterator[pd.DataFrame]:
+        """
+        CALL: read_chunks(self, columns: List[str], chunk_size: int)
+        DESCRIPTION: Yields DataFrame chunks of at most chunk_size rows holding only the requested columns,
+        read from the memory-mapped cache without any JSON decoding.
+        RESULT: Iterator[pd.DataFrame]
+        """
+        parquet_file = pq.ParquetFile(self.path, memory_map=True) # type: ignore
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns): # type: ignore
+            yield batch.to_pandas() # type: ignore
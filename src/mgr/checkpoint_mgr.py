@@ -0,0 +1,143 @@
+# pyright: strict
+# mgr/checkpoint_mgr.py
+from typing import Any, Dict, Optional
+from datetime import date
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+from mgr.compression_mgr import detect_compression
+from mgr.multi_file_mgr import FilePaths, expand_paths
+
+# Bytes at the head of the source file hashed to detect a replaced (not appended) file
+FINGERPRINT_SIZE = 4096
+
+
+def complete_lines_end(file_path: str) -> int:
+    """
+    CALL: complete_lines_end(file_path: str)
+    DESCRIPTION: Returns the offset just after the last newline of the file, so a line still being
+    appended is left for the next run.
+    RESULT: int
+    """
+    if os.path.getsize(file_path) == 0:
+        return 0
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return mapped.rfind(b"\n") + 1
+
+def head_fingerprint(file_path: str, offset: int) -> str:
+    """
+    CALL: head_fingerprint(file_path: str, offset: int)
+    DESCRIPTION: Hashes the first bytes of the already processed part of the file.
+    RESULT: str
+    """
+    with open(file_path, "rb") as file:
+        return hashlib.sha1(file.read(min(offset, FINGERPRINT_SIZE))).hexdigest()
+
+
+def aggregator_mode(aggregator: Any) -> Dict[str, Any]:
+    """
+    CALL: aggregator_mode(aggregator: Any)
+    DESCRIPTION: Describes how an aggregator keeps its counts: the capacity of its HeavyHitters summaries, None
+    for exact counters, and whether they spill past a memory budget (any budget restores the spilled totals of
+    another, see SpillSnapshot). The state of one mode cannot be restored into an aggregator of another.
+    RESULT: Dict[str, Any]
+    """
+    return {"capacity": getattr(aggregator, "capacity", None), "spilled": bool(getattr(aggregator, "memory_budget_mb", None))}
+
+
+class AggregationCheckpoint:
+    """
+    Resumes aggregation of an append-only JSONL file from a checkpoint.
+    The checkpoint holds the state of every aggregator (see get_state/set_state) and the byte offset
+    processed so far. Used as a context manager: on enter it restores the aggregators and exposes the
+    [start, end) byte range still to process; on a clean exit it saves the new state with offset end.
+    Without a checkpoint_path it is a no-op covering the whole file.
+    The counts only hold the tweets of the start_date / end_date window they were built with, so the window is
+    saved too and a checkpoint of another window is not resumed. Likewise the counters of a capacity are
+    HeavyHitters summaries and those of a memory budget SpillSnapshots, so the mode of every aggregator (see aggregator_mode) is saved and a checkpoint of
+    another mode is not resumed.
+    """
+
+    def __init__(self, checkpoint_path: Optional[str], file_path: FilePaths, aggregators: Dict[str, Any],
+                 start_date: Optional[date] = None, end_date: Optional[date] = None):
+        self.checkpoint_path = checkpoint_path
+        self.window = (start_date, end_date)
+        self.file_paths = expand_paths(file_path)
+        self.file_path = self.file_paths[0]
+        self.aggregators = aggregators
+        self.modes = {name: aggregator_mode(aggregator) for name, aggregator in aggregators.items()}
+        self.start = 0
+        self.end: Optional[int] = None
+
+    def restore(self) -> int:
+        """
+        CALL: restore(self)
+        DESCRIPTION: Loads the checkpoint into the aggregators and returns the offset to resume from.
+        A missing checkpoint, or one taken on another file, a truncated file, a file whose head changed,
+        another date window or aggregators of another mode, is ignored and processing starts again from 0.
+        RESULT: int
+        """
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0
+
+        with open(self.checkpoint_path, "rb") as file:
+            checkpoint: Dict[str, Any] = pickle.load(file)
+
+        offset: int = checkpoint["offset"]
+        if (checkpoint["file_path"] != os.path.abspath(self.file_path)
+                or os.path.getsize(self.file_path) < offset
+                or checkpoint["fingerprint"] != head_fingerprint(self.file_path, offset)
+                or set(checkpoint["states"]) != set(self.aggregators)):
+            logging.warning(f"Checkpoint {self.checkpoint_path} does not match {self.file_path}, starting from scratch")
+            return 0
+        # Checkpoints saved before windows existed counted every date
+        if tuple(checkpoint.get("window", (None, None))) != self.window:
+            logging.warning(f"Checkpoint {self.checkpoint_path} counts the dates {checkpoint.get('window')}, "
+                            f"not {self.window}, starting from scratch")
+            return 0
+        if checkpoint.get("modes") != self.modes:
+            logging.warning(f"Checkpoint {self.checkpoint_path} holds aggregators of mode {checkpoint.get('modes')}, "
+                            f"not {self.modes}, starting from scratch")
+            return 0
+
+        for name, aggregator in self.aggregators.items():
+            aggregator.set_state(checkpoint["states"][name])
+        return offset
+
+    def save(self, offset: int) -> None:
+        """
+        CALL: save(self, offset: int)
+        DESCRIPTION: Writes the aggregators' state and the processed offset, atomically replacing the previous checkpoint.
+        RESULT: None
+        """
+        if not self.checkpoint_path:
+            return
+
+        checkpoint: Dict[str, Any] = {
+            "file_path": os.path.abspath(self.file_path),
+            "offset": offset,
+            "fingerprint": head_fingerprint(self.file_path, offset),
+            "window": self.window,
+            "modes": self.modes,
+            "states": {name: aggregator.get_state() for name, aggregator in self.aggregators.items()},
+        }
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "wb") as file:
+            pickle.dump(checkpoint, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def __enter__(self) -> "AggregationCheckpoint":
+        if self.checkpoint_path and len(self.file_paths) > 1:
+            logging.warning(f"Checkpoints need a single file, the {len(self.file_paths)} files are processed in full without one")
+        elif self.checkpoint_path and detect_compression(self.file_path):
+            logging.warning(f"Checkpoints need an uncompressed file, {self.file_path} is processed in full without one")
+        elif self.checkpoint_path:
+            self.start = self.restore()
+            self.end = complete_lines_end(self.file_path)
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        if exc_type is None and self.end is not None:
+            self.save(self.end)
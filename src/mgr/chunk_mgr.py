@@ -1,13 +1,420 @@
 #pyright : strict
 # mgr/chunk_mgr.py
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from datetime import date, timedelta
+import io
+import json
+import logging
+import os
+import time
 import pandas as pd
+from mgr.cache_mgr import ColumnarCache
+from mgr.chunk_sizer_mgr import ChunkSizer
+from mgr.compression_mgr import detect_compression, iter_range_lines, split_frame_ranges
+from mgr.date_index_mgr import DateIndex
+from mgr.split_mgr import split_newline_ranges
+from utils.constants import ADAPTIVE_BYTE_BUDGET, CACHE_COLUMNS, DATE_COLUMN
+from utils.metrics import metrics_enabled, stage
+
+try:
+    import simdjson  # type: ignore
+except ImportError:
+    simdjson = None
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
 
 class JsonChunkReader:
-    """Reads a JSON file in chunks."""
-    def __init__(self, file_path: str, chunk_size: int):
+    """
+    Reads a JSON file in chunks.
+    A reader can be limited to the byte range [start, end) of the file: it then yields the lines
+    that start inside the range, so readers over adjacent ranges never share or split a line.
+    With use_cache, whole-file projected reads go through a sidecar Parquet cache (see ColumnarCache).
+    With adaptive, chunk_size is only the starting point: a ChunkSizer resizes the JSON chunks from the measured
+    bytes per row, parse and process time and RSS, and is kept as self.sizer to report its choice.
+    Gzip, bz2 and zstd files are detected by their magic bytes and decompressed as a stream. For them, start
+    and end are compressed offsets of frame boundaries, and split() only divides BGZF and multi-frame zstd files.
+    Every batch emits "read" and "decode" stage metrics (or "read_json" / "cache_read" when pandas or the
+    cache do both), see utils.metrics.
+    With start_date and/or end_date (both included, UTC days) only the tweets of that window are yielded. A whole
+    uncompressed file is then read through its DateIndex, which is built on the first windowed run, so only the
+    byte ranges of the selected days are parsed.
+    """
+    def __init__(self, file_path: str, chunk_size: int, columns: Optional[List[str]] = None,
+                 start: int = 0, end: Optional[int] = None, use_cache: bool = False, cache_dir: Optional[str] = None,
+                 adaptive: bool = False, byte_budget: int = ADAPTIVE_BYTE_BUDGET, rss_ceiling_mb: Optional[float] = None,
+                 start_date: Optional[date] = None, end_date: Optional[date] = None):
         self.file_path = file_path
         self.chunk_size = chunk_size
+        self.columns = columns
+        self.start = start
+        self.end = end
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.adaptive = adaptive
+        self.byte_budget = byte_budget
+        self.rss_ceiling_mb = rss_ceiling_mb
+        self.sizer: Optional[ChunkSizer] = None
+        self.compression = detect_compression(file_path) if os.path.isfile(file_path) else None
+        self.start_date = start_date
+        self.end_date = end_date
+        self.windowed = start_date is not None or end_date is not None
+        # The window is applied on the date column, which is decoded even when the query does not need it
+        self.projection = columns + [DATE_COLUMN] if self.windowed and columns is not None and DATE_COLUMN not in columns else columns
 
     def read_chunks(self):
-        """Generator that yields DataFrame chunks from the JSON file."""
-        return pd.read_json(self.file_path, lines=True, chunksize=self.chunk_size) #type: ignore
\ No newline at end of file
+        """
+        Generator that yields DataFrame chunks from the JSON file.
+        When a column projection is set, each chunk only holds the projected values, one
+        column per path (nested paths such as 'user.username' keep their dotted name).
+        With a date window, the rows outside of it are dropped from every chunk.
+        """
+        chunks = self._read_projected_chunks()
+        return self._filter_window(chunks) if self.windowed else chunks
+
+    def _read_projected_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        CALL: _read_projected_chunks(self)
+        DESCRIPTION: Picks how the chunks of the projection are read: from the cache, with adaptive sizes, with
+        pd.read_json for whole records, or as batches of raw lines decoded here.
+        RESULT: Iterator[pd.DataFrame]
+        """
+        cache = self._usable_cache()
+        if cache is not None:
+            return self._read_cached_chunks(cache)
+        if self.adaptive:
+            return self._read_adaptive_chunks()
+        if self._reads_whole_records():
+            return _timed_chunks(pd.read_json(self.file_path, lines=True, chunksize=self.chunk_size, compression=self.compression), "read_json") #type: ignore
+        return self._read_decoded_chunks()
+
+    def _usable_cache(self) -> Optional[ColumnarCache]:
+        """
+        CALL: _usable_cache(self)
+        DESCRIPTION: Returns the columnar cache to read through, or None when the cache is off, does not apply
+        to the read or cannot hold the projection.
+        RESULT: Optional[ColumnarCache]
+        """
+        if not self.use_cache or self.start != 0 or self.end is not None:
+            return None
+        if not ColumnarCache.is_available():
+            logging.warning("pyarrow is not installed, reading without the columnar cache")
+            return None
+        cache = ColumnarCache(self.file_path, self.cache_dir)
+        return cache if cache.covers(self.projection) else None
+
+    def _reads_whole_records(self) -> bool:
+        """Whole unfiltered records of the whole file are left to pd.read_json."""
+        return self.projection is None and not self.windowed and self.start == 0 and self.end is None
+
+    def read_batches(self) -> Iterator[Any]:
+        """
+        CALL: read_batches(self)
+        DESCRIPTION: Yields the reading half of read_chunks, for a pipeline that decodes in another stage:
+        batches of raw lines when the reader decodes lines itself, or ready chunks when the cache, the adaptive
+        sizer or pd.read_json read and decode in one step. decode_batch turns either into a chunk.
+        RESULT: Iterator[Any]
+        """
+        if self.adaptive or self._reads_whole_records() or self._usable_cache() is not None:
+            return self.read_chunks()
+        return self.read_lines()
+
+    def decode_batch(self, batch: Any) -> Optional[pd.DataFrame]:
+        """
+        CALL: decode_batch(self, batch: Any)
+        DESCRIPTION: Decodes a batch of read_batches and applies the date window. Returns None when no row is left.
+        RESULT: Optional[pd.DataFrame]
+        """
+        if isinstance(batch, pd.DataFrame):
+            return batch
+        chunk = self.decode_lines(batch)
+        return self._window_rows(chunk) if self.windowed else chunk
+
+    def _filter_window(self, chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        CALL: _filter_window(self, chunks: Iterator[pd.DataFrame])
+        DESCRIPTION: Applies the date window to every chunk, skipping the chunks left empty.
+        RESULT: Iterator[pd.DataFrame]
+        """
+        for chunk in chunks:
+            filtered = self._window_rows(chunk)
+            if filtered is not None:
+                yield filtered
+
+    def _window_rows(self, chunk: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        CALL: _window_rows(self, chunk: pd.DataFrame)
+        DESCRIPTION: Keeps the rows whose UTC date falls in [start_date, end_date + 1 day) and drops the date column
+        when only the window needed it. Returns None when no row is left.
+        RESULT: Optional[pd.DataFrame]
+        """
+        dates = pd.to_datetime(chunk[DATE_COLUMN], utc=True, errors="coerce") # type: ignore
+        mask = dates.notna()
+        if self.start_date:
+            mask &= dates >= pd.Timestamp(self.start_date, tz="UTC")
+        if self.end_date:
+            mask &= dates < pd.Timestamp(self.end_date + timedelta(days=1), tz="UTC")
+        chunk = chunk[mask]
+        if self.projection != self.columns:
+            chunk = chunk[self.columns]
+        return chunk.reset_index(drop=True) if len(chunk) else None
+
+    def _read_decoded_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        CALL: _read_decoded_chunks(self)
+        DESCRIPTION: Reads batches of raw lines and decodes them, timing both stages separately.
+        RESULT: Iterator[pd.DataFrame]
+        """
+        batches = self.read_lines()
+        while True:
+            lines = _read_batch(batches)
+            if lines is None:
+                break
+            with stage("decode", rows=len(lines)):
+                chunk = self.decode_lines(lines)
+            yield chunk
+
+    def _read_adaptive_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        CALL: _read_adaptive_chunks(self)
+        DESCRIPTION: Decodes and yields chunks sized by a new ChunkSizer. The parse time is measured around reading
+        and decoding a batch, the process time is the time the consumer holds the chunk before asking for the next.
+        RESULT: Iterator[pd.DataFrame]
+        """
+        sizer = self.sizer = ChunkSizer(self.chunk_size, self.byte_budget, self.rss_ceiling_mb)
+        batches = self.read_lines(sizer)
+        while True:
+            started = time.perf_counter()
+            lines = _read_batch(batches)
+            if lines is None:
+                break
+            with stage("decode", rows=len(lines), chunk_size=sizer.chunk_size):
+                chunk = self.decode_lines(lines)
+            parsed = time.perf_counter()
+            yield chunk
+            del chunk
+            sizer.record(len(lines), sum(map(len, lines)), parsed - started, time.perf_counter() - parsed)
+
+        logging.info(f"Adaptive chunk size for {self.file_path}: {sizer}")
+
+    def _read_cached_chunks(self, cache: ColumnarCache) -> Iterator[pd.DataFrame]:
+        """
+        CALL: _read_cached_chunks(self, cache: ColumnarCache)
+        DESCRIPTION: Reads the projected columns from the cache. When the cache is missing or stale, the file
+        is decoded once with the full cache projection, the cache is written as the chunks go by and the
+        requested columns of each chunk are yielded.
+        RESULT: Iterator[pd.DataFrame]
+        """
+        columns = self.projection or []
+        if cache.exists():
+            yield from _timed_chunks(cache.read_chunks(columns, self.chunk_size), "cache_read")
+            return
+
+        source = JsonChunkReader(self.file_path, self.chunk_size, CACHE_COLUMNS)
+        for chunk in cache.write_through(source.read_chunks()):
+            yield chunk[columns]
+
+    def split(self, num_parts: int) -> List["JsonChunkReader"]:
+        """
+        CALL: split(self, num_parts: int)
+        DESCRIPTION: Splits the reader's byte range into at most num_parts newline-aligned ranges and returns
+        one reader per range, with the same chunk size, projection and adaptive settings, that can be consumed
+        independently (each adaptive range reader tunes its own chunk size). Compressed files are split on frame
+        boundaries, so each range reader decompresses its own frames in parallel with the others.
+        With a date window over a whole uncompressed file, the byte ranges of the selected days are split instead.
+        RESULT: List[JsonChunkReader]
+        """
+        if self.compression:
+            ranges = split_frame_ranges(self.file_path, num_parts) if self.start == 0 and self.end is None else [(self.start, self.end)]
+        elif self._uses_date_index():
+            ranges = self._split_date_ranges(num_parts)
+        else:
+            ranges = split_newline_ranges(self.file_path, num_parts, self.start, self.end)
+        return [
+            JsonChunkReader(self.file_path, self.chunk_size, self.columns, start, end, adaptive=self.adaptive,
+                            byte_budget=self.byte_budget, rss_ceiling_mb=self.rss_ceiling_mb,
+                            start_date=self.start_date, end_date=self.end_date)
+            for start, end in ranges
+        ]
+
+    def _uses_date_index(self) -> bool:
+        """Only windowed reads of a whole uncompressed file go through the date index."""
+        return self.windowed and not self.compression and self.start == 0 and self.end is None
+
+    def _date_ranges(self) -> List[Tuple[int, int]]:
+        """
+        CALL: _date_ranges(self)
+        DESCRIPTION: Returns the byte ranges of the window's days, building the file's DateIndex when needed.
+        RESULT: List[Tuple[int, int]]
+        """
+        return DateIndex(self.file_path, self.cache_dir).ranges(self.start_date, self.end_date)
+
+    def _split_date_ranges(self, num_parts: int) -> List[Tuple[int, Optional[int]]]:
+        """
+        CALL: _split_date_ranges(self, num_parts: int)
+        DESCRIPTION: Cuts the byte ranges of the window's days into about num_parts pieces of the same size:
+        small ranges are kept whole, large ones are split on newlines.
+        RESULT: List[Tuple[int, Optional[int]]]
+        """
+        date_ranges = self._date_ranges()
+        target = max(1, sum(end - start for start, end in date_ranges) // max(1, num_parts))
+        ranges: List[Tuple[int, Optional[int]]] = []
+        for start, end in date_ranges:
+            parts = max(1, round((end - start) / target))
+            ranges.extend(split_newline_ranges(self.file_path, parts, start, end) if parts > 1 else [(start, end)])
+        return ranges
+
+    def read_lines(self, sizer: Optional[ChunkSizer] = None) -> Iterator[List[bytes]]:
+        """
+        CALL: read_lines(self, sizer: Optional[ChunkSizer] = None)
+        DESCRIPTION: Yields batches of at most chunk_size raw JSON lines starting inside the reader's
+        byte range, skipping blank lines. With a sizer, each batch takes the sizer's current chunk size.
+        RESULT: Iterator[List[bytes]]
+        """
+        if self.compression:
+            source = iter_range_lines(self.file_path, self.compression, self.start, self.end)
+        else:
+            source = self._iter_range_lines()
+
+        lines: List[bytes] = []
+        limit = sizer.chunk_size if sizer else self.chunk_size
+        for line in source:
+            if not line.strip():
+                continue
+            lines.append(line)
+            if len(lines) >= limit:
+                yield lines
+                lines = []
+                limit = sizer.chunk_size if sizer else self.chunk_size
+        if lines:
+            yield lines
+
+    def _iter_range_lines(self) -> Iterator[bytes]:
+        """
+        CALL: _iter_range_lines(self)
+        DESCRIPTION: Yields the lines of an uncompressed file that start inside the reader's byte range, or
+        inside the byte ranges of the window's days when the reader goes through the date index.
+        RESULT: Iterator[bytes]
+        """
+        ranges: List[Tuple[int, Optional[int]]] = [(self.start, self.end)]
+        if self._uses_date_index():
+            ranges = list(self._date_ranges())
+
+        with open(self.file_path, "rb") as file:
+            for start, end in ranges:
+                position = start
+                file.seek(position)
+                if position > 0:
+                    # A line that starts before the range belongs to the previous range.
+                    file.seek(position - 1)
+                    if file.read(1) != b"\n":
+                        position += len(file.readline())
+
+                if end is None:
+                    yield from file
+                    continue
+                for line in file:
+                    if position >= end:
+                        break
+                    position += len(line)
+                    yield line
+
+    def decode_lines(self, lines: List[bytes]) -> pd.DataFrame:
+        """
+        CALL: decode_lines(self, lines: List[bytes])
+        DESCRIPTION: Decodes a batch of raw JSON lines keeping only the projected columns.
+        Missing fields become None and a projected 'date' column is parsed as UTC datetimes, as pd.read_json does.
+        Without a projection the whole records are decoded with pd.read_json.
+        RESULT: pd.DataFrame
+        """
+        if self.projection is None:
+            return pd.read_json(io.BytesIO(b"".join(lines)), lines=True) #type: ignore
+
+        columns = self.projection or []
+        extract = _get_extractor(columns)
+        values: List[List[Any]] = [[] for _ in columns]
+
+        for line in lines:
+            for column_values, value in zip(values, extract(line)):
+                column_values.append(value)
+
+        chunk = pd.DataFrame(dict(zip(columns, values)), columns=columns)
+        for column in columns:
+            if column.rsplit(".", 1)[-1] == "date":
+                chunk[column] = pd.to_datetime(chunk[column], utc=True, errors="coerce")
+        return chunk
+
+
+def _read_batch(batches: Iterator[List[bytes]]) -> Optional[List[bytes]]:
+    """
+    CALL: _read_batch(batches: Iterator[List[bytes]])
+    DESCRIPTION: Returns the next batch of raw lines, or None at the end, as a timed "read" stage.
+    RESULT: Optional[List[bytes]]
+    """
+    with stage("read") as read:
+        lines = next(batches, None)
+        if lines is not None and metrics_enabled():
+            read.update(rows=len(lines), bytes=sum(map(len, lines)))
+    return lines
+
+def _timed_chunks(chunks: Iterator[pd.DataFrame], name: str) -> Iterator[pd.DataFrame]:
+    """
+    CALL: _timed_chunks(chunks: Iterator[pd.DataFrame], name: str)
+    DESCRIPTION: Yields the chunks of an iterator that reads and decodes in one step, timing each one as a stage.
+    RESULT: Iterator[pd.DataFrame]
+    """
+    chunks = iter(chunks)
+    while True:
+        with stage(name) as timed:
+            chunk = next(chunks, None)
+            if chunk is not None:
+                timed.update(rows=len(chunk))
+        if chunk is None:
+            break
+        yield chunk
+
+def _get_extractor(columns: List[str]) -> Callable[[bytes], List[Any]]:
+    """
+    CALL: _get_extractor(columns: List[str])
+    DESCRIPTION: Builds a function returning the projected values of one JSON line, using the
+    fastest installed decoder (simdjson, then orjson, then the standard library json module).
+    RESULT: Callable[[bytes], List[Any]]
+    """
+    if simdjson is not None:
+        parser = simdjson.Parser() # type: ignore
+        pointers = ["/" + column.replace(".", "/") for column in columns]
+
+        def extract_simdjson(line: bytes) -> List[Any]:
+            document = parser.parse(line) # type: ignore
+            values: List[Any] = []
+            for pointer in pointers:
+                try:
+                    value = document.at_pointer(pointer) # type: ignore
+                except (KeyError, IndexError, TypeError):
+                    value = None
+                if isinstance(value, simdjson.Object): # type: ignore
+                    value = value.as_dict() # type: ignore
+                elif isinstance(value, simdjson.Array): # type: ignore
+                    value = value.as_list() # type: ignore
+                values.append(value)
+            return values
+
+        return extract_simdjson
+
+    loads: Callable[[bytes], Any] = orjson.loads if orjson is not None else json.loads # type: ignore
+    paths: List[Tuple[str, ...]] = [tuple(column.split(".")) for column in columns]
+
+    def extract(line: bytes) -> List[Any]:
+        document: Dict[str, Any] = loads(line)
+        values: List[Any] = []
+        for path in paths:
+            value: Any = document
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            values.append(value)
+        return values
+
+    return extract
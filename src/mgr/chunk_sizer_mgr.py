@@ -0,0 +1,116 @@
+# pyright: strict
+# mgr/chunk_sizer_mgr.py
+from typing import Dict, Optional
+import logging
+from utils.constants import ADAPTIVE_BYTE_BUDGET, ADAPTIVE_MIN_CHUNK_SIZE, ADAPTIVE_MAX_CHUNK_SIZE, ADAPTIVE_MIN_GAIN
+
+try:
+    import psutil  # type: ignore
+except ImportError:
+    psutil = None
+
+
+def current_rss_mb() -> Optional[float]:
+    """
+    CALL: current_rss_mb()
+    DESCRIPTION: Returns the resident set size of this process in MB, or None without psutil (a memory_profiler dependency).
+    RESULT: Optional[float]
+    """
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss / 2**20 # type: ignore
+
+
+class ChunkSizer:
+    """
+    Picks the number of rows per chunk from measurements of the chunks already read.
+    - Byte budget: chunks never hold more than byte_budget bytes of raw JSON, using the measured bytes per row.
+    - RSS ceiling: when the process grows past rss_ceiling_mb, the size is halved and capped there for the rest of the read.
+    - Throughput: after a warm-up chunk, the size is doubled while rows/sec (parse plus process time) improves
+      by more than ADAPTIVE_MIN_GAIN, or halved if the first doubling did not help, then settles on the smallest
+      size within ADAPTIVE_MIN_GAIN of the best throughput seen.
+    """
+
+    def __init__(self, initial_size: int, byte_budget: int = ADAPTIVE_BYTE_BUDGET, rss_ceiling_mb: Optional[float] = None,
+                 min_size: int = ADAPTIVE_MIN_CHUNK_SIZE, max_size: int = ADAPTIVE_MAX_CHUNK_SIZE):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.byte_budget = byte_budget
+        self.rss_ceiling_mb = rss_ceiling_mb
+        self.bytes_per_row: Optional[float] = None
+        self.chunk_size = self._clamp(initial_size)
+        self.throughputs: Dict[int, float] = {}
+        self.chunks_seen = 0
+        self.direction = 2.0
+        self.settled = False
+
+    def _clamp(self, size: float) -> int:
+        """
+        CALL: _clamp(self, size: float)
+        DESCRIPTION: Bounds a size by the min and max sizes and by the byte budget.
+        RESULT: int
+        """
+        upper = self.max_size
+        if self.bytes_per_row:
+            upper = min(upper, int(self.byte_budget / self.bytes_per_row))
+        return int(max(self.min_size, min(size, upper)))
+
+    def _best_size(self) -> int:
+        """
+        CALL: _best_size(self)
+        DESCRIPTION: Returns the smallest tried size whose throughput is within ADAPTIVE_MIN_GAIN of the best one.
+        RESULT: int
+        """
+        best = max(self.throughputs.values())
+        return min(size for size, rate in self.throughputs.items() if rate >= best * (1 - ADAPTIVE_MIN_GAIN))
+
+    def record(self, rows: int, num_bytes: int, parse_seconds: float, process_seconds: float) -> None:
+        """
+        CALL: record(self, rows: int, num_bytes: int, parse_seconds: float, process_seconds: float)
+        DESCRIPTION: Takes the measurements of one chunk and updates chunk_size for the next one. Short chunks (the
+        tail of the file) only update the bytes per row.
+        RESULT: None
+        """
+        self.chunks_seen += 1
+        if rows:
+            row_bytes = num_bytes / rows
+            self.bytes_per_row = row_bytes if self.bytes_per_row is None else 0.8 * self.bytes_per_row + 0.2 * row_bytes
+
+        rss = current_rss_mb() if self.rss_ceiling_mb else None
+        if rss is not None and self.rss_ceiling_mb and rss > self.rss_ceiling_mb and self.chunk_size > self.min_size:
+            self.max_size = max(self.min_size, self.chunk_size // 2)
+            self.chunk_size = self.max_size
+            self.settled = True
+            logging.warning(f"RSS {rss:,.0f} MB above the {self.rss_ceiling_mb:,.0f} MB ceiling, chunk size capped at {self.chunk_size:,} rows")
+            return
+
+        elapsed = parse_seconds + process_seconds
+        if self.settled or self.chunks_seen == 1 or rows < self.chunk_size or elapsed <= 0:
+            # The first chunk pays one-off costs (imports, lazily built matchers) and is not a fair sample
+            self.chunk_size = self._clamp(self.chunk_size)
+            return
+
+        self.throughputs[self.chunk_size] = rows / elapsed
+        best = self._best_size()
+        if best == self.chunk_size:
+            candidate = self._clamp(self.chunk_size * self.direction)
+            if candidate not in self.throughputs:
+                self.chunk_size = candidate
+                return
+        elif self.direction > 1 and len(self.throughputs) == 2:
+            # The first doubling did not pay off: try smaller chunks instead
+            self.direction = 0.5
+            candidate = self._clamp(best * self.direction)
+            if candidate not in self.throughputs:
+                self.chunk_size = candidate
+                return
+
+        self.chunk_size = self._clamp(self._best_size())
+        self.settled = True
+        logging.info(f"Adaptive chunk size settled: {self}")
+
+    def __str__(self) -> str:
+        rate = self.throughputs.get(self.chunk_size)
+        row_bytes = f"{self.bytes_per_row:,.0f} B/row" if self.bytes_per_row else "unknown B/row"
+        return (f"{self.chunk_size:,} rows per chunk ({row_bytes}"
+                + (f", {rate:,.0f} rows/sec" if rate else "") + f", {'settled' if self.settled else 'exploring'})")
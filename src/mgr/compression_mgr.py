@@ -0,0 +1,290 @@
+# pyright: strict
+# mgr/compression_mgr.py
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+import bisect
+import bz2
+import functools
+import gzip
+import io
+import logging
+import os
+import struct
+
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None
+
+GZIP = "gzip"
+BZIP2 = "bz2"
+ZSTD = "zstd"
+
+GZIP_MAGIC = b"\x1f\x8b"
+BZIP2_MAGIC = b"BZh"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# Skippable zstd frames use the magic numbers 0x184D2A50 to 0x184D2A5F
+ZSTD_SKIPPABLE_MASK = 0xFFFFFFF0
+ZSTD_SKIPPABLE_MAGIC = 0x184D2A50
+# BGZF blocks are gzip members with a 'BC' extra subfield holding the block size
+BGZF_HEADER = struct.Struct("<4BI2BH2BH")
+READ_SIZE = 1 << 20
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    """
+    CALL: detect_compression(file_path: str)
+    DESCRIPTION: Returns "gzip", "bz2" or "zstd" from the magic bytes at the head of the file, or None for plain text.
+    RESULT: Optional[str]
+    """
+    with open(file_path, "rb") as file:
+        head = file.read(4)
+    if head.startswith(GZIP_MAGIC):
+        return GZIP
+    if head.startswith(BZIP2_MAGIC):
+        return BZIP2
+    if head.startswith(ZSTD_MAGIC):
+        return ZSTD
+    return None
+
+def _zstd_reader(source: BinaryIO) -> BinaryIO:
+    """
+    CALL: _zstd_reader(source: BinaryIO)
+    DESCRIPTION: Streams the decompressed bytes of every zstd frame of source, with the optional zstandard package.
+    RESULT: BinaryIO
+    """
+    if zstandard is None:
+        raise ImportError("Reading zstd-compressed files needs the zstandard package (pip install zstandard)")
+    return zstandard.ZstdDecompressor().stream_reader(source, read_size=READ_SIZE, read_across_frames=True) # type: ignore
+
+def decompress_stream(source: BinaryIO, compression: str) -> BinaryIO:
+    """
+    CALL: decompress_stream(source: BinaryIO, compression: str)
+    DESCRIPTION: Wraps a binary file object in a streaming decompressor. Concatenated gzip members, bz2 streams
+    and zstd frames are read one after the other, as the command-line tools do.
+    RESULT: BinaryIO
+    """
+    if compression == GZIP:
+        return gzip.GzipFile(fileobj=source, mode="rb") # type: ignore
+    if compression == BZIP2:
+        return bz2.BZ2File(source, mode="rb") # type: ignore
+    if compression == ZSTD:
+        return _zstd_reader(source)
+    raise ValueError(f"Unknown compression '{compression}'")
+
+def open_decompressed(file_path: str, compression: str, start: int = 0, end: Optional[int] = None) -> BinaryIO:
+    """
+    CALL: open_decompressed(file_path: str, compression: str, start: int = 0, end: Optional[int] = None)
+    DESCRIPTION: Opens a buffered stream of the decompressed content of the compressed bytes [start, end) of
+    the file. start and end must be frame boundaries (see frame_offsets). Closing it closes the file.
+    RESULT: BinaryIO
+    """
+    raw: BinaryIO = open(file_path, "rb")
+    raw.seek(start)
+    source: BinaryIO = raw if end is None else _RangeFile(raw, end - start) # type: ignore
+    return io.BufferedReader(_ClosingStream(decompress_stream(source, compression), raw), READ_SIZE) # type: ignore
+
+
+class _RangeFile(io.RawIOBase):
+    """Read-only view of the next `size` bytes of a file, so a decompressor stops at a frame boundary."""
+
+    def __init__(self, file: BinaryIO, size: int):
+        self.file = file
+        self.remaining = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: "bytearray | memoryview") -> int: # type: ignore
+        if self.remaining <= 0:
+            return 0
+        data = self.file.read(min(len(buffer), self.remaining))
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self.file.close()
+        super().close()
+
+
+class _ClosingStream(io.RawIOBase):
+    """Raw stream over a decompressor that also closes the underlying file."""
+
+    def __init__(self, stream: BinaryIO, file: BinaryIO):
+        self.stream = stream
+        self.file = file
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: "bytearray | memoryview") -> int: # type: ignore
+        data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        self.stream.close()
+        self.file.close()
+        super().close()
+
+
+def _bgzf_offsets(file: BinaryIO, file_size: int) -> Optional[List[int]]:
+    """
+    CALL: _bgzf_offsets(file: BinaryIO, file_size: int)
+    DESCRIPTION: Walks the BGZF block headers and returns the offset of every block, or None when the gzip
+    file is not BGZF (its members cannot be located without decompressing them).
+    RESULT: Optional[List[int]]
+    """
+    offsets: List[int] = []
+    position = 0
+    while position < file_size:
+        file.seek(position)
+        header = file.read(BGZF_HEADER.size)
+        if len(header) < BGZF_HEADER.size:
+            return None
+        id1, id2, _, flags, _, _, _, _, subfield1, subfield2, subfield_length = BGZF_HEADER.unpack(header)
+        if (id1, id2) != (0x1F, 0x8B) or not flags & 4 or (subfield1, subfield2) != (ord("B"), ord("C")) or subfield_length != 2:
+            return None
+        block_size = struct.unpack("<H", file.read(2))[0] + 1
+        offsets.append(position)
+        position += block_size
+    return offsets
+
+def _zstd_offsets(file: BinaryIO, file_size: int) -> Optional[List[int]]:
+    """
+    CALL: _zstd_offsets(file: BinaryIO, file_size: int)
+    DESCRIPTION: Walks the zstd frame and block headers and returns the offset of every data frame, without
+    decompressing anything. Skippable frames are stepped over. Returns None on a malformed header.
+    RESULT: Optional[List[int]]
+    """
+    offsets: List[int] = []
+    position = 0
+    while position < file_size:
+        file.seek(position)
+        magic_bytes = file.read(4)
+        if len(magic_bytes) < 4:
+            return None
+        magic = struct.unpack("<I", magic_bytes)[0]
+        if magic & ZSTD_SKIPPABLE_MASK == ZSTD_SKIPPABLE_MAGIC:
+            position += 8 + struct.unpack("<I", file.read(4))[0]
+            continue
+        if magic_bytes != ZSTD_MAGIC:
+            return None
+
+        offsets.append(position)
+        descriptor = file.read(1)[0]
+        content_size_flag, single_segment = descriptor >> 6, descriptor >> 5 & 1
+        checksum, dictionary_flag = descriptor >> 2 & 1, descriptor & 3
+        header_size = (1 + (0 if single_segment else 1) + (0, 1, 2, 4)[dictionary_flag]
+                       + ((1 if single_segment else 0), 2, 4, 8)[content_size_flag])
+        position += 4 + header_size
+        while True:
+            file.seek(position)
+            block_header = file.read(3)
+            if len(block_header) < 3:
+                return None
+            value = int.from_bytes(block_header, "little")
+            last_block, block_type, block_size = value & 1, value >> 1 & 3, value >> 3
+            if block_type == 3:
+                return None
+            position += 3 + (1 if block_type == 1 else block_size)
+            if last_block:
+                break
+        position += 4 if checksum else 0
+    return offsets
+
+@functools.lru_cache(maxsize=16)
+def _cached_frame_offsets(file_path: str, file_size: int, mtime: float) -> Optional[Tuple[int, ...]]:
+    """
+    CALL: _cached_frame_offsets(file_path: str, file_size: int, mtime: float)
+    DESCRIPTION: frame_offsets keyed by the file's size and modification time, so the split and every range
+    reader of a run walk the headers once per process.
+    RESULT: Optional[Tuple[int, ...]]
+    """
+    compression = detect_compression(file_path)
+    with open(file_path, "rb") as file:
+        if compression == GZIP:
+            offsets = _bgzf_offsets(file, file_size)
+        elif compression == ZSTD:
+            offsets = _zstd_offsets(file, file_size)
+        else:
+            offsets = None
+    return tuple(offsets) if offsets else None
+
+def frame_offsets(file_path: str) -> Optional[Tuple[int, ...]]:
+    """
+    CALL: frame_offsets(file_path: str)
+    DESCRIPTION: Returns the compressed offsets of the independently decompressible frames of a BGZF or
+    multi-frame zstd file, or None when the file cannot be split (plain gzip, bz2, or no compression).
+    RESULT: Optional[Tuple[int, ...]]
+    """
+    stat = os.stat(file_path)
+    return _cached_frame_offsets(os.path.abspath(file_path), stat.st_size, stat.st_mtime)
+
+def split_frame_ranges(file_path: str, num_parts: int) -> List[Tuple[int, Optional[int]]]:
+    """
+    CALL: split_frame_ranges(file_path: str, num_parts: int)
+    DESCRIPTION: Groups the frames of a compressed file into at most num_parts contiguous compressed byte ranges
+    of about the same size. A file that cannot be split is returned as the single range (0, None).
+    RESULT: List[Tuple[int, Optional[int]]]
+    """
+    offsets = frame_offsets(file_path)
+    if not offsets or len(offsets) == 1:
+        logging.info(f"{file_path} has no independent frames, it is decompressed by a single reader")
+        return [(0, None)]
+
+    file_size = os.path.getsize(file_path)
+    num_parts = max(1, min(num_parts, len(offsets)))
+    bounds = [0]
+    for part in range(1, num_parts):
+        # First frame starting at or after the target, so every range holds whole frames
+        index = bisect.bisect_left(offsets, file_size * part // num_parts)
+        if index < len(offsets) and offsets[index] > bounds[-1]:
+            bounds.append(offsets[index])
+    bounds.append(file_size)
+    return [(bounds[part], bounds[part + 1]) for part in range(len(bounds) - 1)]
+
+def starts_line(file_path: str, compression: str, start: int) -> bool:
+    """
+    CALL: starts_line(file_path: str, compression: str, start: int)
+    DESCRIPTION: Tells whether the frame at the compressed offset start begins a line, by decompressing the
+    previous frame and looking at its last byte.
+    RESULT: bool
+    """
+    offsets = frame_offsets(file_path) or (0,)
+    index = bisect.bisect_left(offsets, start)
+    if index == 0:
+        return True
+    with open_decompressed(file_path, compression, offsets[index - 1], start) as previous:
+        last = b""
+        for block in iter(lambda: previous.read(READ_SIZE), b""):
+            last = block[-1:]
+    return last in (b"", b"\n")
+
+def iter_range_lines(file_path: str, compression: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """
+    CALL: iter_range_lines(file_path: str, compression: str, start: int = 0, end: Optional[int] = None)
+    DESCRIPTION: Yields the decompressed lines that start inside the frames [start, end) of a compressed file.
+    As for plain byte ranges, a line begun in the previous frames is skipped, and the last line is completed
+    from the frames after end, so adjacent ranges never share or split a line.
+    RESULT: Iterator[bytes]
+    """
+    skip_first = start > 0 and not starts_line(file_path, compression, start)
+    pending = b""
+    with open_decompressed(file_path, compression, start, end) as stream:
+        for line in stream:
+            if skip_first:
+                skip_first = False
+            elif line.endswith(b"\n"):
+                yield line
+            else:
+                pending = line
+
+    if not pending:
+        return
+    if end is None:
+        yield pending
+        return
+    # The last line goes on in the next range: finish it from there
+    with open_decompressed(file_path, compression, end) as rest:
+        yield pending + rest.readline()
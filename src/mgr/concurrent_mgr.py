@@ -0,0 +1,119 @@
+# pyright: strict
+# mgr/concurrent_mgr.py
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Set
+import concurrent.futures
+import pandas as pd
+from mgr.chunk_mgr import JsonChunkReader
+from utils.metrics import stage
+
+ChunkProcessor = Callable[[pd.DataFrame], Any]
+ResultMerger = Callable[[Any, Any], Any]
+
+
+def bounded_submit(executor: concurrent.futures.Executor, fn: Callable[[Any], Any], items: Iterable[Any],
+                   max_pending: int) -> Iterator[Any]:
+    """
+    CALL: bounded_submit(executor: concurrent.futures.Executor, fn: Callable[[Any], Any], items: Iterable[Any], max_pending: int)
+    DESCRIPTION: Submits fn(item) for every item while keeping at most max_pending tasks in flight, and yields
+    the results as they complete. The next item is only pulled from items once a slot is free, so a lazy
+    chunk generator never holds more than max_pending chunks in memory.
+    RESULT: Iterator[Any]
+    """
+    pending: Set[concurrent.futures.Future[Any]] = set()
+    for item in items:
+        pending.add(executor.submit(fn, item))
+        if len(pending) >= max(1, max_pending):
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+    for future in concurrent.futures.as_completed(pending):
+        yield future.result()
+
+def tree_reduce(partials: Iterable[Any], merge: ResultMerger, executor: concurrent.futures.Executor,
+                max_pending: int) -> Optional[Any]:
+    """
+    CALL: tree_reduce(partials: Iterable[Any], merge: ResultMerger, executor: concurrent.futures.Executor, max_pending: int)
+    DESCRIPTION: Merges partial results pairwise on the executor as they arrive: any two ready partials are merged
+    by one task and its result is paired again, so the merges form a tree of depth log2(n) that runs in parallel
+    with the production of the remaining partials, instead of folding them one by one in the calling thread.
+    Like bounded_submit, at most max_pending merges are in flight: once they are, the next partial is only pulled
+    from partials when a merge completes, so at most 2 x max_pending + 1 partials are alive even when the merges
+    fall behind (e.g. pure-Python Counter merges holding the GIL on the "threads" backend).
+    merge may update and return its first argument: every partial is handed to a single task. None partials
+    (empty ranges) are skipped. Returns None when there is nothing to merge.
+    RESULT: Optional[Any]
+    """
+    ready: List[Any] = []
+    pending: Set[concurrent.futures.Future[Any]] = set()
+
+    def pair_ready() -> None:
+        nonlocal pending
+        while len(ready) >= 2:
+            if len(pending) >= max(1, max_pending):
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                ready.extend(future.result() for future in done)
+            pending.add(executor.submit(merge, ready.pop(), ready.pop()))
+
+    for partial in partials:
+        if partial is not None:
+            ready.append(partial)
+        if pending:
+            done, pending = concurrent.futures.wait(pending, timeout=0, return_when=concurrent.futures.FIRST_COMPLETED)
+            ready.extend(future.result() for future in done)
+        pair_ready()
+
+    while pending:
+        done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        ready.extend(future.result() for future in done)
+        pair_ready()
+
+    return ready[0] if ready else None
+
+def _process_range(reader: JsonChunkReader, process_chunk: ChunkProcessor, merge: ResultMerger) -> Any:
+    """
+    CALL: _process_range(reader: JsonChunkReader, process_chunk: ChunkProcessor, merge: ResultMerger)
+    DESCRIPTION: Runs inside a worker: reads, parses and processes every chunk of the reader's byte range
+    and folds the chunk results into a single partial result (None for an empty range).
+    RESULT: Any
+    """
+    partial: Optional[Any] = None
+    with stage("range", start=reader.start, end=reader.end):
+        for chunk in reader.read_chunks():
+            result = process_chunk(chunk)
+            partial = result if partial is None else merge(partial, result)
+    return partial
+
+def process_readers(readers: List[JsonChunkReader], num_workers: int, process_chunk: ChunkProcessor,
+                    merge: ResultMerger, initial: Any, use_processes: bool = False,
+                    combine: Optional[ResultMerger] = None) -> Any:
+    """
+    CALL: process_readers(readers, num_workers, process_chunk, merge, initial, use_processes=False, combine=None)
+    DESCRIPTION: Consumes independent range readers in parallel, so parsing runs in the workers and not only
+    the post-parse counting. With use_processes every worker process opens the file itself: no DataFrame is
+    pickled, only the compact partial results travel back. As they complete, they are merged with tree_reduce
+    on a thread pool of this process, and the result is merged into initial (returned as is when initial is None).
+    process_chunk and merge must then be picklable (module level or static).
+    combine, when given, replaces the tree reduction: it folds the per-range partials into initial one by one
+    (e.g. to keep them apart for a threshold top-N instead of merging them).
+    RESULT: Any
+    """
+    executor_class = concurrent.futures.ProcessPoolExecutor if use_processes else concurrent.futures.ThreadPoolExecutor
+    overall = initial
+
+    with executor_class(max_workers=num_workers) as executor:
+        futures = [executor.submit(_process_range, reader, process_chunk, merge) for reader in readers]
+        partials = (future.result() for future in concurrent.futures.as_completed(futures))
+        if combine:
+            for partial in partials:
+                if partial is not None:
+                    overall = combine(overall, partial)
+            return overall
+
+        # The partials are merged in threads of this process, so they are not pickled again
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="merge") as merger:
+            reduced = tree_reduce(partials, merge, merger, num_workers)
+
+    if reduced is None:
+        return overall
+    return reduced if overall is None else merge(overall, reduced)
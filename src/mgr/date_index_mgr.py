@@ -0,0 +1,145 @@
+# pyright: strict
+# mgr/date_index_mgr.py
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import date, datetime, timezone
+import glob
+import hashlib
+import json
+import logging
+import os
+from utils.constants import CACHE_DIR_NAME, DATE_COLUMN, DATE_INDEX_MAX_GAP
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+ByteRange = Tuple[int, int]
+
+
+def _utc_day(value: Any) -> Optional[str]:
+    """
+    CALL: _utc_day(value: Any)
+    DESCRIPTION: Returns the UTC day (ISO string) of a tweet date, as q1 counts it (naive dates are taken as UTC),
+    or None when the value is not a date.
+    RESULT: Optional[str]
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date().isoformat()
+
+
+class DateIndex:
+    """
+    Sidecar index of a JSONL file: for each UTC day, the byte ranges of the consecutive lines holding that day's
+    tweets. It is built with one pass over the file and stored next to it (in .latam_cache/, keyed by the path,
+    size and mtime like the columnar cache). A time-bounded run then only seeks to and parses the ranges of the
+    days it asks for. Rows without a parsable date are left out of every range.
+    """
+
+    def __init__(self, file_path: str, cache_dir: Optional[str] = None):
+        self.file_path = os.path.abspath(file_path)
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(self.file_path), CACHE_DIR_NAME)
+        self.days: Optional[Dict[str, List[ByteRange]]] = None
+
+    @property
+    def path(self) -> str:
+        """Index file for the current path, size and mtime of the source file."""
+        stat = os.stat(self.file_path)
+        key = f"{self.file_path}|{stat.st_size}|{stat.st_mtime_ns}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{os.path.basename(self.file_path)}.{digest}.dates.json")
+
+    def exists(self) -> bool:
+        """
+        CALL: exists(self)
+        DESCRIPTION: Tells whether an index matching the current source file has been built.
+        RESULT: bool
+        """
+        return os.path.exists(self.path)
+
+    def build(self) -> Dict[str, List[ByteRange]]:
+        """
+        CALL: build(self)
+        DESCRIPTION: Scans the file once, records the byte ranges of every day and writes the index, replacing
+        the indexes of older versions of the file. Consecutive lines of the same day share one range.
+        RESULT: Dict[str, List[ByteRange]]
+        """
+        loads: Callable[[bytes], Any] = orjson.loads if orjson is not None else json.loads # type: ignore
+        days: Dict[str, List[ByteRange]] = {}
+        current: Optional[str] = None
+        position = 0
+        with open(self.file_path, "rb") as file:
+            for line in file:
+                start, position = position, position + len(line)
+                if not line.strip():
+                    if current is not None:
+                        days[current][-1] = (days[current][-1][0], position)
+                    continue
+                try:
+                    record = loads(line)
+                except ValueError:
+                    record = None
+                day = _utc_day(record.get(DATE_COLUMN)) if isinstance(record, dict) else None
+                if day is None:
+                    current = None
+                elif day == current:
+                    days[day][-1] = (days[day][-1][0], position)
+                else:
+                    days.setdefault(day, []).append((start, position))
+                    current = day
+
+        path = self.path
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"file_size": position, "days": days}, file)
+        os.replace(temp_path, path)
+        for stale_path in glob.glob(os.path.join(self.cache_dir, glob.escape(os.path.basename(self.file_path)) + ".*.dates.json")):
+            if stale_path != path:
+                os.remove(stale_path)
+
+        logging.info(f"Built date index {path} ({len(days)} days, {sum(map(len, days.values()))} ranges)")
+        self.days = days
+        return days
+
+    def load(self) -> Dict[str, List[ByteRange]]:
+        """
+        CALL: load(self)
+        DESCRIPTION: Returns the day ranges, reading the index or building it when it is missing or stale.
+        RESULT: Dict[str, List[ByteRange]]
+        """
+        if self.days is None:
+            if not self.exists():
+                return self.build()
+            with open(self.path, encoding="utf-8") as file:
+                stored: Dict[str, Any] = json.load(file)
+            self.days = {day: [(start, end) for start, end in ranges] for day, ranges in stored["days"].items()}
+        return self.days
+
+    def ranges(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+               max_gap: int = DATE_INDEX_MAX_GAP) -> List[ByteRange]:
+        """
+        CALL: ranges(self, start_date: Optional[date] = None, end_date: Optional[date] = None, max_gap: int = DATE_INDEX_MAX_GAP)
+        DESCRIPTION: Returns the sorted byte ranges holding the days from start_date to end_date (both included,
+        either may be open). Ranges less than max_gap bytes apart are merged: reading a few rows outside the window,
+        which the reader filters out, is cheaper than many small seeks when the file is not sorted by date.
+        RESULT: List[ByteRange]
+        """
+        first = start_date.isoformat() if start_date else ""
+        last = end_date.isoformat() if end_date else "9999-12-31"
+        selected = sorted(byte_range for day, day_ranges in self.load().items() if first <= day <= last for byte_range in day_ranges)
+
+        merged: List[ByteRange] = []
+        for start, end in selected:
+            if merged and start - merged[-1][1] <= max_gap:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
@@ -1,34 +1,112 @@
 # pyright: strict
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 from collections import Counter
 import pandas as pd
 import gc
-from utils.tools import extract_emojis
+from utils.tools import count_emojis
+from utils.heavy_hitters import HeavyHitters
+from utils.prefilter import PrefilterStats, screen_emojis
+from utils.metrics import stage
+from mgr.partial_mgr import decode_state, encode_state
 
 class EmojiAggregator:
-    """Aggregates emoji counts from JSON chunks."""
+    """
+    Aggregates emoji counts from JSON chunks.
+    With a capacity the counts are kept in a bounded HeavyHitters summary instead of an exact Counter.
+    Implements the MergeableAggregator interface: partial aggregators merge, serialize and finalize into q2.
+    """
     
-    def __init__(self):
-        self.emoji_counter: Counter[str] = Counter()
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity
+        self.emoji_counter: Union[Counter[str], HeavyHitters] = HeavyHitters(capacity) if capacity else Counter()
+        self.prefilter_stats = PrefilterStats()
 
     def process_chunk(self, chunk: pd.DataFrame) -> None:
         """
         CALL: process_chunk(self, chunk: pd.DataFrame)
         DESCRIPTION: Extract emojis from the 'content' column in the chunk and update the counter.
+        Rows without any codepoint that can start an emoji are screened out before extraction.
         RESULT: None
         """
-        chunk['emojis'] = chunk['content'].astype(str).map(extract_emojis)
-        
-        for emojis in chunk['emojis']: # type: ignore
-            self.emoji_counter.update(emojis) # type: ignore
+        with stage("q2.screen", rows=len(chunk)) as screened:
+            contents = screen_emojis(chunk['content'], self.prefilter_stats)
+            screened.update(kept=len(contents))
+        with stage("q2.extract", rows=len(contents)):
+            counts = count_emojis(contents)
+        with stage("q2.merge", keys=len(counts)):
+            self.emoji_counter.update(counts) # type: ignore
 
         del chunk
         gc.collect()
 
+    def merge(self, other: "EmojiAggregator") -> "EmojiAggregator":
+        """
+        CALL: merge(self, other: EmojiAggregator)
+        DESCRIPTION: Adds the emoji counts and pre-screen stats of another aggregator (e.g. a worker's partial) and
+        returns self. Both must have the same capacity.
+        RESULT: EmojiAggregator
+        """
+        if self.capacity != other.capacity:
+            raise ValueError(f"Cannot merge a EmojiAggregator of capacity {other.capacity} into one of capacity {self.capacity}")
+
+        with stage("q2.merge", keys=len(other.emoji_counter)):
+            if self.capacity:
+                self.emoji_counter.merge(other.emoji_counter) # type: ignore
+            else:
+                self.emoji_counter.update(other.emoji_counter) # type: ignore
+            self.prefilter_stats.merge(other.prefilter_stats)
+        return self
+
+    def finalize(self, top_n: int = 10) -> List[Tuple[str, int]]:
+        """
+        CALL: finalize(self, top_n: int = 10)
+        DESCRIPTION: Returns the q2 results, same as get_top_emojis.
+        RESULT: List[Tuple[str, int]]
+        """
+        return self.get_top_emojis(top_n)
+
     def get_top_emojis(self, top_n: int = 10) -> List[Tuple[str, int]]:
         """
         CALL: get_top_emojis(self, top_n: int = 10)
         DESCRIPTION: Returns the top N emojis along with their counts.
         RESULT: List[Tuple[str, int]]
         """
-        return self.emoji_counter.most_common(top_n)
+        with stage("q2.top_n"):
+            return self.emoji_counter.most_common(top_n)
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        CALL: get_state(self)
+        DESCRIPTION: Returns the aggregated counter and pre-screen stats, to be checkpointed and restored with set_state.
+        RESULT: Dict[str, Any]
+        """
+        return {"emoji_counter": self.emoji_counter, "prefilter_stats": self.prefilter_stats}
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        CALL: set_state(self, state: Dict[str, Any])
+        DESCRIPTION: Restores the counter and pre-screen stats returned by get_state.
+        RESULT: None
+        """
+        self.emoji_counter = state["emoji_counter"]
+        self.prefilter_stats = state["prefilter_stats"]
+
+    def serialize(self) -> bytes:
+        """
+        CALL: serialize(self)
+        DESCRIPTION: Returns the counter, pre-screen stats and capacity as a compact partial-state payload (see encode_state).
+        RESULT: bytes
+        """
+        return encode_state("EmojiAggregator", self.capacity, self.get_state())
+
+    @classmethod
+    def deserialize(cls, data: bytes) -> "EmojiAggregator":
+        """
+        CALL: EmojiAggregator.deserialize(data: bytes)
+        DESCRIPTION: Rebuilds an aggregator from a payload of serialize.
+        RESULT: EmojiAggregator
+        """
+        capacity, state = decode_state(data, "EmojiAggregator")
+        aggregator = cls(capacity)
+        aggregator.set_state(state)
+        return aggregator
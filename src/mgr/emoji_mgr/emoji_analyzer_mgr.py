@@ -1,24 +1,31 @@
 # pyright: strict
-from typing import List, Tuple
-from mgr.chunk_mgr import JsonChunkReader
+from typing import List, Optional, Tuple
+from mgr.multi_file_mgr import ChunkReader
+from mgr.pipeline_mgr import PipelineStats, run_pipeline
 from mgr.emoji_mgr.emoji_aggregator_mgr import EmojiAggregator
 
 class EmojiAnalyzer:
     """
     Orchestrates the emoji extraction analysis by reading chunks and aggregating emoji counts.
+    With pipelined, reading, decoding and counting overlap as pipeline stages (see run_pipeline).
     """
     
-    def __init__(self, reader: JsonChunkReader, aggregator: EmojiAggregator):
+    def __init__(self, reader: ChunkReader, aggregator: EmojiAggregator, pipelined: bool = False):
         self.reader = reader
         self.aggregator = aggregator
+        self.pipelined = pipelined
+        self.pipeline_stats: Optional[PipelineStats] = None
 
-    def analyze(self) -> List[Tuple[str, int]]:
+    def analyze(self, top_n: int = 10) -> List[Tuple[str, int]]:
         """
-        CALL: analyze(self)
+        CALL: analyze(self, top_n: int = 10)
         DESCRIPTION:  Processes each chunk to extract emojis and then returns the top emojis.
         RESULT: List[Tuple[str, int]]
         """
-        for chunk in self.reader.read_chunks():
-            self.aggregator.process_chunk(chunk)
+        if self.pipelined:
+            self.pipeline_stats = run_pipeline(self.reader, self.aggregator.process_chunk)
+        else:
+            for chunk in self.reader.read_chunks():
+                self.aggregator.process_chunk(chunk)
 
-        return self.aggregator.get_top_emojis()
+        return self.aggregator.get_top_emojis(top_n)
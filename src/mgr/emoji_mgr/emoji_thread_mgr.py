@@ -1,55 +1,96 @@
 # pyright: strict
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from datetime import date
 from collections import Counter
 import concurrent.futures
-import gc
 import pandas as pd
-from mgr.chunk_mgr import JsonChunkReader
-from utils.tools import extract_emojis
+from mgr.multi_file_mgr import FilePaths, open_reader
+from mgr.emoji_mgr.emoji_aggregator_mgr import EmojiAggregator
+from mgr.concurrent_mgr import bounded_submit, process_readers, tree_reduce
+from utils.constants import THREAD_BACKEND, PROCESS_BACKEND, RANGE_BACKEND, MAX_PENDING_PER_WORKER, RANGES_PER_WORKER
+from utils.top_n import threshold_top_n
+from utils.prefilter import PrefilterStats
+from utils.metrics import stage
 
 class EmojiThreadAnalyzer:
     """
     Orchestrates the emoji extraction analysis by reading chunks and aggregating emoji counts concurrently.
+    The "threads" backend parses in the calling thread and counts on a thread pool; the "ranges" and
+    "processes" backends split the file into newline-aligned byte ranges and let each worker thread or
+    process read, parse and count its own ranges.
+    At most max_pending chunks are in flight at once, so peak memory follows num_workers x chunk_size.
+    Every chunk yields a partial EmojiAggregator; the "threads" backend merges them pairwise in parallel (see tree_reduce).
+    use_cache reads through the columnar cache; it only applies to the "threads" backend.
+    adaptive lets every reader tune its chunk size from chunk_size (see ChunkSizer).
+    file_path can also be a glob or a list of files, read as one input (see MultiJsonChunkReader).
+    start_date and end_date restrict the counts to a window of UTC days (see JsonChunkReader).
     """
 
-    def __init__(self, file_path: str, chunk_size: int, num_workers: int):
-        self.reader = JsonChunkReader(file_path, chunk_size)
+    def __init__(self, file_path: FilePaths, chunk_size: int, num_workers: int, columns: Optional[List[str]] = None,
+                 backend: str = THREAD_BACKEND, max_pending: Optional[int] = None, use_cache: bool = False,
+                 adaptive: bool = False, start_date: Optional[date] = None, end_date: Optional[date] = None):
+        if backend not in (THREAD_BACKEND, PROCESS_BACKEND, RANGE_BACKEND):
+            raise ValueError(f"Unknown backend '{backend}'")
+        self.reader = open_reader(file_path, chunk_size, columns, use_cache=use_cache, adaptive=adaptive,
+                                  start_date=start_date, end_date=end_date)
         self.num_workers = num_workers
+        self.backend = backend
+        self.max_pending = max_pending or num_workers * MAX_PENDING_PER_WORKER
+        self.prefilter_stats = PrefilterStats()
 
     @staticmethod
-    def _process_chunk(chunk: pd.DataFrame) -> Counter[str]:
+    def _process_chunk(chunk: pd.DataFrame) -> EmojiAggregator:
         """
         CALL: _process_chunk(chunk: pd.DataFrame)
         DESCRIPTION: Processes a single chunk by extracting emojis from the 'content' column.
-        Returns a Counter of emojis found in that chunk.
-        RESULT: Counter[str]
+        Returns a partial EmojiAggregator with the emoji counts of that chunk and the pre-screen stats.
+        RESULT: EmojiAggregator
         """
-        local_counter: Counter[str] = Counter()
-        chunk['emojis'] = chunk['content'].dropna().map(extract_emojis) # type: ignore
+        aggregator = EmojiAggregator()
+        aggregator.process_chunk(chunk)
+        return aggregator
 
-        for emojis in chunk['emojis']: # type: ignore
-            local_counter.update(emojis) # type: ignore
-            
-        del chunk
-        gc.collect()
-        
-        return local_counter
+    @staticmethod
+    def _merge_results(overall: EmojiAggregator, local: EmojiAggregator) -> EmojiAggregator:
+        """
+        CALL: _merge_results(overall, local)
+        DESCRIPTION: Adds the local emoji counts and pre-screen stats into the overall ones.
+        RESULT: EmojiAggregator
+        """
+        return overall.merge(local)
+
+    @staticmethod
+    def _collect_results(overall: Tuple[List[Counter[str]], PrefilterStats],
+                         local: EmojiAggregator) -> Tuple[List[Counter[str]], PrefilterStats]:
+        """
+        CALL: _collect_results(overall, local)
+        DESCRIPTION: Keeps the emoji counts of each range apart for threshold_top_n and adds the pre-screen stats.
+        RESULT: Tuple[List[Counter[str]], PrefilterStats]
+        """
+        overall[0].append(local.emoji_counter) # type: ignore
+        overall[1].merge(local.prefilter_stats)
+        return overall
 
     def analyze(self, top_n: int = 10) -> List[Tuple[str, int]]:
         """
         CALL: analyze(self)
         DESCRIPTION: Processes all chunks concurrently, aggregates emoji counts,
-        and returns the top 10 most common emojis.
+        and returns the top 10 most common emojis. The "ranges" and "processes" backends keep one counter per
+        range and pick the top N with threshold_top_n instead of merging them.
         RESULT: List[Tuple[str, int]]
         """
-        overall_counter: Counter[str] = Counter()
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.num_workers) as executor:
-            futures = [
-                executor.submit(EmojiThreadAnalyzer._process_chunk, chunk)
-                for chunk in self.reader.read_chunks()
-            ]
-            for future in concurrent.futures.as_completed(futures):
-                overall_counter.update(future.result())
-                
-        return overall_counter.most_common(top_n)
+        if self.backend == THREAD_BACKEND:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+                partials = bounded_submit(executor, EmojiThreadAnalyzer._process_chunk, self.reader.read_chunks(), self.max_pending) # type: ignore
+                overall: EmojiAggregator = tree_reduce(partials, EmojiThreadAnalyzer._merge_results, executor, self.max_pending) or EmojiAggregator() # type: ignore
+
+            self.prefilter_stats = overall.prefilter_stats
+            return overall.finalize(top_n)
+
+        partials, self.prefilter_stats = process_readers(
+            self.reader.split(self.num_workers * RANGES_PER_WORKER), self.num_workers,
+            EmojiThreadAnalyzer._process_chunk, EmojiThreadAnalyzer._merge_results, ([], PrefilterStats()), self.backend == PROCESS_BACKEND,
+            EmojiThreadAnalyzer._collect_results
+        )
+        with stage("q2.top_n", partials=len(partials)):
+            return threshold_top_n(partials, top_n)
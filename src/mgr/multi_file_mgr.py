@@ -0,0 +1,129 @@
+# pyright: strict
+# mgr/multi_file_mgr.py
+from typing import Any, Iterator, List, Optional, Sequence, Union
+from datetime import date
+import glob
+import os
+import pandas as pd
+from mgr.chunk_mgr import JsonChunkReader
+from mgr.chunk_sizer_mgr import ChunkSizer
+from utils.constants import ADAPTIVE_BYTE_BUDGET
+
+FilePaths = Union[str, Sequence[str]]
+GLOB_CHARACTERS = "*?["
+
+
+def expand_paths(file_paths: FilePaths) -> List[str]:
+    """
+    CALL: expand_paths(file_paths: FilePaths)
+    DESCRIPTION: Expands a path, a glob pattern or a list of both into the list of files, without duplicates,
+    largest first. A pattern matching no file raises FileNotFoundError.
+    RESULT: List[str]
+    """
+    patterns = [file_paths] if isinstance(file_paths, str) else list(file_paths)
+    paths: List[str] = []
+    for pattern in patterns:
+        if any(character in pattern for character in GLOB_CHARACTERS):
+            matches = sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+            if not matches:
+                raise FileNotFoundError(f"No file matches '{pattern}'")
+            paths.extend(matches)
+        else:
+            paths.append(pattern)
+    paths = list(dict.fromkeys(paths))
+    return sorted(paths, key=lambda path: -os.path.getsize(path) if os.path.exists(path) else 0)
+
+
+class MultiJsonChunkReader:
+    """
+    Reads several JSON files as one input, with the interface of JsonChunkReader.
+    read_chunks() goes through the files one after the other, largest first. split() splits every file
+    into range readers, in proportion to its size, and orders all of them largest first. This way the
+    concurrent analyzers start the biggest pieces first, and a huge file does not end up as the last straggler.
+    The per-range partial results are merged as they complete, as for a single file.
+    A date window applies to every file, each going through its own DateIndex.
+    """
+
+    def __init__(self, file_paths: Sequence[str], chunk_size: int, columns: Optional[List[str]] = None,
+                 use_cache: bool = False, cache_dir: Optional[str] = None, adaptive: bool = False,
+                 byte_budget: int = ADAPTIVE_BYTE_BUDGET, rss_ceiling_mb: Optional[float] = None,
+                 start_date: Optional[date] = None, end_date: Optional[date] = None):
+        self.file_paths = list(file_paths)
+        self.chunk_size = chunk_size
+        self.columns = columns
+        self.readers = [
+            JsonChunkReader(file_path, chunk_size, columns, use_cache=use_cache, cache_dir=cache_dir, adaptive=adaptive,
+                            byte_budget=byte_budget, rss_ceiling_mb=rss_ceiling_mb, start_date=start_date, end_date=end_date)
+            for file_path in self.file_paths
+        ]
+
+    @property
+    def sizer(self) -> Optional[ChunkSizer]:
+        """The chunk sizer of the last file read with adaptive chunks, if any."""
+        sizers = [reader.sizer for reader in self.readers if reader.sizer]
+        return sizers[-1] if sizers else None
+
+    def read_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        CALL: read_chunks(self)
+        DESCRIPTION: Yields the chunks of every file in turn.
+        RESULT: Iterator[pd.DataFrame]
+        """
+        for reader in self.readers:
+            yield from reader.read_chunks()
+
+    def read_batches(self) -> Iterator[Any]:
+        """
+        CALL: read_batches(self)
+        DESCRIPTION: Yields the batches of every file in turn (see JsonChunkReader.read_batches).
+        RESULT: Iterator[Any]
+        """
+        for reader in self.readers:
+            yield from reader.read_batches()
+
+    def decode_batch(self, batch: Any) -> Optional[pd.DataFrame]:
+        """
+        CALL: decode_batch(self, batch: Any)
+        DESCRIPTION: Decodes a batch of any of the files, which all share the projection and the date window.
+        RESULT: Optional[pd.DataFrame]
+        """
+        return self.readers[0].decode_batch(batch)
+
+    def split(self, num_parts: int) -> List[JsonChunkReader]:
+        """
+        CALL: split(self, num_parts: int)
+        DESCRIPTION: Splits every file into about num_parts x its share of the total size ranges (at least one
+        per file) and returns all the range readers, largest range first.
+        RESULT: List[JsonChunkReader]
+        """
+        sizes = [os.path.getsize(reader.file_path) for reader in self.readers]
+        total = sum(sizes) or 1
+        ranges: List[JsonChunkReader] = []
+        for reader, size in zip(self.readers, sizes):
+            ranges.extend(reader.split(max(1, round(num_parts * size / total))))
+        return sorted(ranges, key=lambda reader: -((reader.end or os.path.getsize(reader.file_path)) - reader.start))
+
+
+ChunkReader = Union[JsonChunkReader, MultiJsonChunkReader]
+
+
+def open_reader(file_paths: FilePaths, chunk_size: int, columns: Optional[List[str]] = None, start: int = 0,
+                end: Optional[int] = None, use_cache: bool = False, adaptive: bool = False,
+                start_date: Optional[date] = None, end_date: Optional[date] = None) -> ChunkReader:
+    """
+    CALL: open_reader(file_paths: FilePaths, chunk_size: int, columns: Optional[List[str]] = None, start: int = 0,
+          end: Optional[int] = None, use_cache: bool = False, adaptive: bool = False,
+          start_date: Optional[date] = None, end_date: Optional[date] = None)
+    DESCRIPTION: Returns a JsonChunkReader when the paths resolve to one file, or a MultiJsonChunkReader over all
+    of them. A byte range [start, end) only applies to a single file. start_date and end_date (both included)
+    keep only the tweets of those UTC days.
+    RESULT: ChunkReader
+    """
+    paths = expand_paths(file_paths)
+    if len(paths) == 1:
+        return JsonChunkReader(paths[0], chunk_size, columns, start, end, use_cache=use_cache, adaptive=adaptive,
+                               start_date=start_date, end_date=end_date)
+    if start or end is not None:
+        raise ValueError("A byte range can only be read from a single file")
+    return MultiJsonChunkReader(paths, chunk_size, columns, use_cache=use_cache, adaptive=adaptive,
+                                start_date=start_date, end_date=end_date)
@@ -0,0 +1,83 @@
+# pyright: strict
+# mgr/partial_mgr.py
+from typing import Any, Dict, List, Optional, Protocol, Tuple, TypeVar
+import os
+import pickle
+import zlib
+import pandas as pd
+
+# Partial states are pickled: only load partial files produced by your own workers
+PARTIAL_FORMAT_VERSION = 1
+PARTIAL_MAGIC = b"LATAM-PARTIAL\n"
+
+AggregatorType = TypeVar("AggregatorType", bound="MergeableAggregator")
+
+
+class MergeableAggregator(Protocol):
+    """
+    Interface of the tweet, emoji and user aggregators: process_chunk folds a chunk into the state, merge adds
+    another aggregator's state (e.g. a worker's partial) and finalize returns the query results. serialize and
+    deserialize turn the state into a compact, versioned bytes payload, so partials can be written by separate
+    runs, even on other machines, and combined later.
+    """
+
+    def process_chunk(self, chunk: pd.DataFrame) -> None: ...
+
+    def merge(self: AggregatorType, other: AggregatorType) -> AggregatorType: ...
+
+    def finalize(self, top_n: int = 10) -> List[Tuple[Any, Any]]: ...
+
+    def serialize(self) -> bytes: ...
+
+
+def encode_state(kind: str, capacity: Optional[int], state: Dict[str, Any]) -> bytes:
+    """
+    CALL: encode_state(kind: str, capacity: Optional[int], state: Dict[str, Any])
+    DESCRIPTION: Packs an aggregator's state (see get_state) with its kind, capacity and the format version,
+    pickled and zlib-compressed. DateUserCounts travel as their interned names and NumPy key and count arrays.
+    RESULT: bytes
+    """
+    payload = {"version": PARTIAL_FORMAT_VERSION, "kind": kind, "capacity": capacity, "state": state}
+    return zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+def decode_state(data: bytes, kind: str) -> Tuple[Optional[int], Dict[str, Any]]:
+    """
+    CALL: decode_state(data: bytes, kind: str)
+    DESCRIPTION: Unpacks a payload of encode_state and returns the capacity and the state. Raises ValueError
+    when the payload holds another kind of aggregator or comes from another format version.
+    RESULT: Tuple[Optional[int], Dict[str, Any]]
+    """
+    payload: Dict[str, Any] = pickle.loads(zlib.decompress(data))
+    if payload.get("version") != PARTIAL_FORMAT_VERSION:
+        raise ValueError(f"Unsupported partial format version {payload.get('version')}, expected {PARTIAL_FORMAT_VERSION}")
+    if payload["kind"] != kind:
+        raise ValueError(f"Partial state of a {payload['kind']} cannot be loaded into a {kind}")
+    return payload["capacity"], payload["state"]
+
+def write_partials(path: str, partials: Dict[str, bytes], metadata: Dict[str, Any]) -> None:
+    """
+    CALL: write_partials(path: str, partials: Dict[str, bytes], metadata: Dict[str, Any])
+    DESCRIPTION: Writes the serialized aggregators of a run, keyed by query, with a description of the input
+    they cover, atomically replacing the file.
+    RESULT: None
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(PARTIAL_MAGIC)
+        pickle.dump({"version": PARTIAL_FORMAT_VERSION, "metadata": metadata, "partials": partials}, file,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+def read_partials(path: str) -> Tuple[Dict[str, bytes], Dict[str, Any]]:
+    """
+    CALL: read_partials(path: str)
+    DESCRIPTION: Reads a file of write_partials and returns the serialized aggregators keyed by query and the metadata.
+    RESULT: Tuple[Dict[str, bytes], Dict[str, Any]]
+    """
+    with open(path, "rb") as file:
+        if file.read(len(PARTIAL_MAGIC)) != PARTIAL_MAGIC:
+            raise ValueError(f"{path} is not a partial aggregates file")
+        content: Dict[str, Any] = pickle.load(file)
+    if content.get("version") != PARTIAL_FORMAT_VERSION:
+        raise ValueError(f"{path} uses partial format version {content.get('version')}, expected {PARTIAL_FORMAT_VERSION}")
+    return content["partials"], content["metadata"]
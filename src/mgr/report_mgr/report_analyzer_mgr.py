@@ -0,0 +1,57 @@
+# pyright: strict
+from typing import Any, Dict, List, Optional, Tuple
+from mgr.multi_file_mgr import ChunkReader
+from mgr.pipeline_mgr import PipelineStats, run_pipeline
+from mgr.tweet_mgr.tweet_aggregator_mgr import TweetAggregator
+from mgr.emoji_mgr.emoji_aggregator_mgr import EmojiAggregator
+from mgr.user_mgr.user_aggregator_mgr import UserAggregator
+import gc
+import pandas as pd
+
+class ReportAnalyzer:
+    """
+    Orchestrates q1, q2 and q3 in a single pass by feeding every decoded chunk
+    to the tweet, emoji and user aggregators.
+    With pipelined, reading, decoding and counting overlap as pipeline stages (see run_pipeline).
+    """
+
+    def __init__(self, reader: ChunkReader, tweet_aggregator: TweetAggregator,
+                 emoji_aggregator: EmojiAggregator, user_aggregator: UserAggregator, pipelined: bool = False):
+        self.reader = reader
+        self.tweet_aggregator = tweet_aggregator
+        self.emoji_aggregator = emoji_aggregator
+        self.user_aggregator = user_aggregator
+        self.pipelined = pipelined
+        self.pipeline_stats: Optional[PipelineStats] = None
+
+    def _process_chunk(self, chunk: pd.DataFrame) -> None:
+        """
+        CALL: _process_chunk(self, chunk: pd.DataFrame)
+        DESCRIPTION: Updates the three aggregators with one chunk.
+        RESULT: None
+        """
+        self.tweet_aggregator.process_chunk(chunk)
+        self.emoji_aggregator.process_chunk(chunk)
+        self.user_aggregator.process_chunk(chunk)
+
+    def analyze(self, top_n: int = 10) -> Dict[str, List[Tuple[Any, Any]]]:
+        """
+        CALL: analyze(self, top_n: int = 10)
+        DESCRIPTION: Reads the file once, updates the three aggregators with each chunk
+        and returns the q1, q2 and q3 results keyed by query name.
+        RESULT: Dict[str, List[Tuple[Any, Any]]]
+        """
+        if self.pipelined:
+            self.pipeline_stats = run_pipeline(self.reader, self._process_chunk)
+        else:
+            for chunk in self.reader.read_chunks():
+                self._process_chunk(chunk)
+
+                del chunk
+                gc.collect()
+
+        return {
+            "q1": self.tweet_aggregator.finalize(top_n), # type: ignore
+            "q2": self.emoji_aggregator.get_top_emojis(top_n), # type: ignore
+            "q3": self.user_aggregator.get_top_mentions(top_n), # type: ignore
+        }
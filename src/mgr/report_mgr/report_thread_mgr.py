@@ -0,0 +1,114 @@
+# pyright: strict
+from mgr.multi_file_mgr import FilePaths, open_reader
+from mgr.concurrent_mgr import bounded_submit, process_readers, tree_reduce
+from mgr.tweet_mgr.tweet_thread_mgr import TweetThreadAnalyzer
+from mgr.emoji_mgr.emoji_thread_mgr import EmojiThreadAnalyzer
+from mgr.user_mgr.user_thread_mgr import UserThreadAnalyzer
+from mgr.tweet_mgr.tweet_aggregator_mgr import TweetAggregator
+from mgr.emoji_mgr.emoji_aggregator_mgr import EmojiAggregator
+from mgr.user_mgr.user_aggregator_mgr import UserAggregator
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date
+from utils.prefilter import PrefilterStats
+from utils.top_n import threshold_top_n
+from utils.metrics import stage
+from utils.constants import THREAD_BACKEND, PROCESS_BACKEND, RANGE_BACKEND, MAX_PENDING_PER_WORKER, RANGES_PER_WORKER
+import concurrent.futures
+import gc
+import pandas as pd
+
+
+class ReportThreadAnalyzer:
+    """
+    Processes a JSON file concurrently and answers q1, q2 and q3 from a single read of every chunk.
+    Supports the same "threads", "ranges" and "processes" backends, bounded in-flight window, columnar
+    cache, adaptive chunk sizing, multi-file input and date window as the per-query thread analyzers.
+    Every chunk yields partial tweet, emoji and user aggregators, merged pairwise in parallel (see tree_reduce).
+    """
+
+    def __init__(self, file_path: FilePaths, chunk_size: int, num_workers: int, columns: Optional[List[str]] = None,
+                 backend: str = THREAD_BACKEND, max_pending: Optional[int] = None, use_cache: bool = False,
+                 adaptive: bool = False, start_date: Optional[date] = None, end_date: Optional[date] = None):
+        if backend not in (THREAD_BACKEND, PROCESS_BACKEND, RANGE_BACKEND):
+            raise ValueError(f"Unknown backend '{backend}'")
+        self.reader = open_reader(file_path, chunk_size, columns, use_cache=use_cache, adaptive=adaptive,
+                                  start_date=start_date, end_date=end_date)
+        self.num_workers = num_workers
+        self.backend = backend
+        self.max_pending = max_pending or num_workers * MAX_PENDING_PER_WORKER
+        self.emoji_prefilter_stats = PrefilterStats()
+        self.mention_prefilter_stats = PrefilterStats()
+
+    @staticmethod
+    def _process_chunk(chunk: pd.DataFrame) -> Tuple[Any, Any, Any]:
+        """
+        CALL: _process_chunk(chunk: pd.DataFrame)
+        DESCRIPTION: Runs the tweet, emoji and user chunk processing on the same decoded chunk.
+        RESULT: Tuple[TweetAggregator, EmojiAggregator, UserAggregator]
+        """
+        local_tweet_counts = TweetThreadAnalyzer._process_chunk(chunk) # type: ignore
+        local_emoji_counts = EmojiThreadAnalyzer._process_chunk(chunk) # type: ignore
+        local_mention_counts = UserThreadAnalyzer._process_chunk(chunk) # type: ignore
+
+        del chunk
+        gc.collect()
+
+        return local_tweet_counts, local_emoji_counts, local_mention_counts # type: ignore
+
+    @staticmethod
+    def _merge_results(overall: Tuple[Any, Any, Any], local: Tuple[Any, Any, Any]) -> Tuple[Any, Any, Any]:
+        """
+        CALL: _merge_results(overall, local)
+        DESCRIPTION: Merges the local results of the three queries into the overall ones.
+        RESULT: Tuple[TweetAggregator, EmojiAggregator, UserAggregator]
+        """
+        TweetThreadAnalyzer._merge_results(overall[0], local[0]) # type: ignore
+        EmojiThreadAnalyzer._merge_results(overall[1], local[1]) # type: ignore
+        UserThreadAnalyzer._merge_results(overall[2], local[2]) # type: ignore
+        return overall
+
+    @staticmethod
+    def _collect_results(overall: Tuple[Any, Any, Any], local: Tuple[Any, Any, Any]) -> Tuple[Any, Any, Any]:
+        """
+        CALL: _collect_results(overall, local)
+        DESCRIPTION: Merges the tweet counts of a range and keeps its emoji and mention counters apart for threshold_top_n.
+        RESULT: Tuple[TweetAggregator, Tuple[List[Counter[str]], PrefilterStats], Tuple[List[Counter[str]], PrefilterStats]]
+        """
+        TweetThreadAnalyzer._merge_results(overall[0], local[0]) # type: ignore
+        EmojiThreadAnalyzer._collect_results(overall[1], local[1]) # type: ignore
+        UserThreadAnalyzer._collect_results(overall[2], local[2]) # type: ignore
+        return overall
+
+    def analyze(self, top_n: int = 10) -> Dict[str, List[Tuple[Any, Any]]]:
+        """
+        CALL: analyze(self, top_n: int = 10)
+        DESCRIPTION: Processes all chunks concurrently, merges the partial counters of the
+        three queries and returns the q1, q2 and q3 results keyed by query name.
+        RESULT: Dict[str, List[Tuple[Any, Any]]]
+        """
+        if self.backend == THREAD_BACKEND:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+                partials = bounded_submit(executor, ReportThreadAnalyzer._process_chunk, self.reader.read_chunks(), self.max_pending) # type: ignore
+                overall = tree_reduce(partials, ReportThreadAnalyzer._merge_results, executor, self.max_pending) # type: ignore
+            tweet_aggregator, emoji_aggregator, user_aggregator = overall or (TweetAggregator(), EmojiAggregator(), UserAggregator()) # type: ignore
+            self.emoji_prefilter_stats = emoji_aggregator.prefilter_stats # type: ignore
+            self.mention_prefilter_stats = user_aggregator.prefilter_stats # type: ignore
+            top_emojis = emoji_aggregator.finalize(top_n) # type: ignore
+            top_mentions = user_aggregator.finalize(top_n) # type: ignore
+        else:
+            tweet_aggregator, (emoji_partials, self.emoji_prefilter_stats), (mention_partials, self.mention_prefilter_stats) = process_readers( # type: ignore
+                self.reader.split(self.num_workers * RANGES_PER_WORKER), self.num_workers,
+                ReportThreadAnalyzer._process_chunk, ReportThreadAnalyzer._merge_results,
+                (TweetAggregator(), ([], PrefilterStats()), ([], PrefilterStats())), self.backend == PROCESS_BACKEND, # type: ignore
+                ReportThreadAnalyzer._collect_results
+            )
+            with stage("q2.top_n", partials=len(emoji_partials)): # type: ignore
+                top_emojis = threshold_top_n(emoji_partials, top_n) # type: ignore
+            with stage("q3.top_n", partials=len(mention_partials)): # type: ignore
+                top_mentions = threshold_top_n(mention_partials, top_n) # type: ignore
+
+        return {
+            "q1": tweet_aggregator.finalize(top_n), # type: ignore
+            "q2": top_emojis, # type: ignore
+            "q3": top_mentions, # type: ignore
+        }
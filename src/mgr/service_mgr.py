@@ -0,0 +1,225 @@
+# pyright: strict
+# mgr/service_mgr.py
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+from datetime import date
+import logging
+import os
+import threading
+import time
+from mgr.checkpoint_mgr import complete_lines_end, head_fingerprint
+from mgr.chunk_mgr import JsonChunkReader
+from mgr.compression_mgr import detect_compression
+from mgr.multi_file_mgr import FilePaths, expand_paths
+from mgr.tweet_mgr.tweet_aggregator_mgr import TweetAggregator
+from mgr.emoji_mgr.emoji_aggregator_mgr import EmojiAggregator
+from mgr.user_mgr.user_aggregator_mgr import UserAggregator
+from utils.constants import SMALL_CHUNK_SIZE, REPORT_COLUMNS, SERVICE_CACHE_SIZE
+
+ResultKey = Tuple[str, int, Optional[date], Optional[date]]
+
+
+class QueryService:
+    """
+    Keeps the tweet, emoji and user aggregators of a dataset in memory and answers q1, q2 and q3 from them.
+    refresh() ingests what was appended to the files since the last call: new complete lines of plain files,
+    and new files matching a glob. A file that was truncated, replaced or removed, or a compressed file that
+    changed, cannot be subtracted from the counters, so the state is then rebuilt from scratch.
+    Results are cached per (query, top_n, window) and the cache is dropped whenever new rows are ingested.
+    Queries and ingestion are serialized by a lock taken per chunk, so a query never waits for a whole refresh.
+    q1 can be restricted to a window of UTC days from the per-date counts; q2 and q3 are kept overall only.
+    """
+
+    def __init__(self, file_path: FilePaths, chunk_size: int = SMALL_CHUNK_SIZE, capacity: Optional[int] = None,
+                 cache_size: int = SERVICE_CACHE_SIZE):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.capacity = capacity
+        self.cache_size = cache_size
+        self.lock = threading.RLock()
+        self.version = 0
+        self.rows = 0
+        self.refreshed_at: Optional[float] = None
+        self.results: Dict[ResultKey, List[Tuple[Any, Any]]] = {}
+        self._refreshing = threading.Lock()
+        self._stopped = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        """
+        CALL: _reset(self)
+        DESCRIPTION: Drops the aggregated state, so the next refresh reads every file from the start.
+        RESULT: None
+        """
+        with self.lock:
+            self.tweet_aggregator = TweetAggregator(self.capacity)
+            self.emoji_aggregator = EmojiAggregator(self.capacity)
+            self.user_aggregator = UserAggregator(self.capacity)
+            # Per file: the byte offset ingested so far, the fingerprint of its head and, for compressed files, its stat
+            self.offsets: Dict[str, int] = {}
+            self.fingerprints: Dict[str, str] = {}
+            self.stats: Dict[str, Tuple[int, int]] = {}
+            self.rows = 0
+            self.results.clear()
+
+    def _is_changed(self, file_path: str) -> bool:
+        """
+        CALL: _is_changed(self, file_path: str)
+        DESCRIPTION: Tells whether an ingested file changed in a way appending cannot explain.
+        RESULT: bool
+        """
+        if not os.path.exists(file_path):
+            return True
+        if file_path in self.stats:
+            stat = os.stat(file_path)
+            return self.stats[file_path] != (stat.st_size, stat.st_mtime_ns)
+        offset = self.offsets[file_path]
+        return os.path.getsize(file_path) < offset or self.fingerprints[file_path] != head_fingerprint(file_path, offset)
+
+    def refresh(self) -> int:
+        """
+        CALL: refresh(self)
+        DESCRIPTION: Ingests the rows appended since the last refresh, rebuilding the state first when a file
+        changed otherwise. Returns the number of rows ingested.
+        RESULT: int
+        """
+        with self._refreshing:
+            return self._refresh()
+
+    def _refresh(self) -> int:
+        """
+        CALL: _refresh(self)
+        DESCRIPTION: Body of refresh, run by one caller at a time so the watcher and a forced refresh never ingest twice.
+        RESULT: int
+        """
+        paths = expand_paths(self.file_path)
+        if any(self._is_changed(path) for path in self.offsets) or set(self.offsets) - set(paths):
+            logging.warning(f"{self.file_path} changed other than by appending, rebuilding the aggregates")
+            self._reset()
+
+        rows = 0
+        for path in paths:
+            if detect_compression(path):
+                if path in self.stats:
+                    continue
+                start, end = 0, None
+                stat = os.stat(path)
+                self.stats[path] = (stat.st_size, stat.st_mtime_ns)
+            else:
+                start, end = self.offsets.get(path, 0), complete_lines_end(path)
+                if end <= start:
+                    continue
+            rows += self._ingest(JsonChunkReader(path, self.chunk_size, REPORT_COLUMNS, start, end))
+            self.offsets[path] = end or 0
+            self.fingerprints[path] = head_fingerprint(path, end or 0)
+
+        with self.lock:
+            if rows:
+                self.version += 1
+                self.results.clear()
+            self.refreshed_at = time.time()
+        return rows
+
+    def _ingest(self, reader: JsonChunkReader) -> int:
+        """
+        CALL: _ingest(self, reader: JsonChunkReader)
+        DESCRIPTION: Feeds every chunk of the reader to the three aggregators. Chunks are decoded outside the lock.
+        RESULT: int
+        """
+        rows = 0
+        for chunk in reader.read_chunks():
+            with self.lock:
+                self.tweet_aggregator.process_chunk(chunk)
+                self.emoji_aggregator.process_chunk(chunk)
+                self.user_aggregator.process_chunk(chunk)
+                self.rows += len(chunk)
+                # Results computed from a partly ingested batch must not outlive it
+                self.results.clear()
+            rows += len(chunk)
+        return rows
+
+    def query(self, query: str, top_n: int = 10, start_date: Optional[date] = None,
+              end_date: Optional[date] = None) -> Tuple[List[Tuple[Any, Any]], bool]:
+        """
+        CALL: query(self, query: str, top_n: int = 10, start_date: Optional[date] = None, end_date: Optional[date] = None)
+        DESCRIPTION: Returns the results of "q1", "q2" or "q3" and whether they came from the result cache.
+        A window (both days included) only applies to q1.
+        RESULT: Tuple[List[Tuple[Any, Any]], bool]
+        """
+        if query not in ("q1", "q2", "q3"):
+            raise ValueError(f"Unknown query '{query}'")
+        if query != "q1" and (start_date or end_date):
+            raise ValueError(f"{query} is aggregated over all dates, only q1 takes a date window")
+
+        key: ResultKey = (query, top_n, start_date, end_date)
+        with self.lock:
+            if key in self.results:
+                return self.results[key], True
+            if query == "q1":
+                results = self._top_dates(top_n, start_date, end_date)
+            elif query == "q2":
+                results = self.emoji_aggregator.get_top_emojis(top_n)
+            else:
+                results = self.user_aggregator.get_top_mentions(top_n)
+            if len(self.results) >= self.cache_size:
+                self.results.clear()
+            self.results[key] = results # type: ignore
+            return results, False # type: ignore
+
+    def _top_dates(self, top_n: int, start_date: Optional[date], end_date: Optional[date]) -> List[Tuple[date, str]]:
+        """
+        CALL: _top_dates(self, top_n: int, start_date: Optional[date], end_date: Optional[date])
+        DESCRIPTION: Answers q1 over the days of the window, with the top user of each of the top dates.
+        RESULT: List[Tuple[date, str]]
+        """
+        date_counts: Counter[date] = self.tweet_aggregator.date_counts
+        if start_date or end_date:
+            date_counts = Counter({day: count for day, count in date_counts.items()
+                                   if (not start_date or day >= start_date) and (not end_date or day <= end_date)})
+        results: List[Tuple[date, str]] = []
+        for day, _ in date_counts.most_common(top_n):
+            top_user = self.tweet_aggregator.get_top_user_for_date(day)
+            if top_user:
+                results.append((day, top_user))
+        return results
+
+    def status(self) -> Dict[str, Any]:
+        """
+        CALL: status(self)
+        DESCRIPTION: Returns the ingested files and offsets, row count, state version and last refresh time.
+        RESULT: Dict[str, Any]
+        """
+        with self.lock:
+            return {"files": dict(self.offsets), "rows": self.rows, "version": self.version,
+                    "cached_results": len(self.results), "refreshed_at": self.refreshed_at}
+
+    def watch(self, interval: float) -> None:
+        """
+        CALL: watch(self, interval: float)
+        DESCRIPTION: Starts a daemon thread calling refresh every interval seconds until stop is called.
+        RESULT: None
+        """
+        def run() -> None:
+            while not self._stopped.wait(interval):
+                try:
+                    rows = self.refresh()
+                    if rows:
+                        logging.info(f"Ingested {rows} new rows of {self.file_path}")
+                except Exception as err:
+                    logging.error(f"Refreshing {self.file_path} failed, exception is {str(err)}", exc_info=err)
+
+        self._stopped.clear()
+        self._watcher = threading.Thread(target=run, name="latam-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        """
+        CALL: stop(self)
+        DESCRIPTION: Stops the watcher thread.
+        RESULT: None
+        """
+        self._stopped.set()
+        if self._watcher:
+            self._watcher.join()
+            self._watcher = None
@@ -0,0 +1,33 @@
+# pyright: strict
+# mgr/split_mgr.py
+from typing import List, Optional, Tuple
+import mmap
+import os
+
+
+def split_newline_ranges(file_path: str, num_parts: int, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    CALL: split_newline_ranges(file_path: str, num_parts: int, start: int = 0, end: Optional[int] = None)
+    DESCRIPTION: Divides the bytes [start, end) of a JSONL file into at most num_parts contiguous ranges
+    of about the same size. Every boundary is moved forward to just after the next newline, so each
+    range starts at the beginning of a line and can be read independently. Empty ranges are dropped.
+    RESULT: List[Tuple[int, int]]
+    """
+    file_size = os.path.getsize(file_path)
+    end = file_size if end is None else min(end, file_size)
+    if end <= start:
+        return []
+
+    num_parts = max(1, min(num_parts, end - start))
+    bounds = [start]
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for part in range(1, num_parts):
+            target = max(start + (end - start) * part // num_parts, bounds[-1])
+            newline = mapped.find(b"\n", target, end)
+            bound = end if newline == -1 else newline + 1
+            if bound > bounds[-1]:
+                bounds.append(bound)
+    if bounds[-1] < end:
+        bounds.append(end)
+
+    return [(bounds[part], bounds[part + 1]) for part in range(len(bounds) - 1)]
@@ -1,28 +1,116 @@
 # pyright: strict
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from collections import Counter, defaultdict
 from datetime import date
+from functools import partial
 import pandas as pd
+from utils.tools import count_date_users
+from utils.heavy_hitters import HeavyHitters
+from utils.date_user_counts import DateUserCounts
+from utils.spill_counter import SpillCounter
+from utils.constants import SPILL_BYTES_PER_DATE_USER
+from utils.metrics import stage
+from mgr.partial_mgr import decode_state, encode_state
 
 class TweetAggregator:
-    """Aggregates date counts and user occurrences per date."""
+    """
+    Aggregates date counts and user occurrences per date.
+    Users per date are kept in a compact integer-coded DateUserCounts. With a capacity they are kept instead in
+    one bounded HeavyHitters summary per date; date counts always stay exact.
+    With a memory_budget_mb they stay exact in a SpillCounter keyed by (date, username), which spills sorted
+    runs to spill_dir (the system temporary directory by default) once it outgrows the budget.
+    Implements the MergeableAggregator interface: partial aggregators merge, serialize and finalize into q1.
+    """
     
-    def __init__(self):
+    def __init__(self, capacity: Optional[int] = None, memory_budget_mb: Optional[float] = None, spill_dir: Optional[str] = None):
+        if capacity and memory_budget_mb:
+            raise ValueError("capacity approximates the counts and memory_budget_mb keeps them exact, pass only one")
+        self.capacity = capacity
+        self.memory_budget_mb = memory_budget_mb
+        self.spill_dir = spill_dir
         self.date_counts: Counter = Counter() #type: ignore
-        self.date_user_counts: defaultdict = defaultdict(Counter) #type: ignore
+        if capacity:
+            self.date_user_counts: Any = defaultdict(partial(HeavyHitters, capacity))
+        elif memory_budget_mb:
+            self.date_user_counts = SpillCounter(max(1, int(memory_budget_mb * 2**20 / SPILL_BYTES_PER_DATE_USER)), spill_dir=spill_dir)
+        else:
+            self.date_user_counts = DateUserCounts()
 
     def process_chunk(self, chunk: pd.DataFrame) -> None:
         """
         CALL: process_chunk(self, chunk: pd.DataFrame)
-        DESCRIPTION: Processes a DataFrame chunk and updates counters.
+        DESCRIPTION: Processes a DataFrame chunk and updates counters from its grouped (date, username) counts.
         RESULT: None
         """
-        chunk['date'] = chunk['date'].dt.date
-        self.date_counts.update(chunk['date'].value_counts().to_dict()) #type: ignore
+        with stage("q1.group", rows=len(chunk)):
+            date_counts, date_user_counts = count_date_users(chunk)
 
-        for date, user in zip(chunk['date'], chunk['user'].apply(lambda u: u.get('username'))): #type: ignore
-            if user:
-                self.date_user_counts[date][user] += 1#type: ignore
+        with stage("q1.merge", keys=len(date_user_counts)):
+            self.date_counts.update(date_counts.to_dict()) #type: ignore
+
+            if self.memory_budget_mb:
+                self.date_user_counts.update(date_user_counts.to_dict()) #type: ignore
+                return
+            if not self.capacity:
+                self.date_user_counts.update(date_user_counts)
+                return
+
+            for date, user_counts in date_user_counts.groupby(level=0, sort=False): #type: ignore
+                self.date_user_counts[date].update(user_counts.droplevel(0).to_dict()) #type: ignore
+
+    def merge(self, other: "TweetAggregator") -> "TweetAggregator":
+        """
+        CALL: merge(self, other: TweetAggregator)
+        DESCRIPTION: Adds the date and per-date user counts of another aggregator (e.g. a worker's partial) and
+        returns self. Both must have the same capacity.
+        RESULT: TweetAggregator
+        """
+        if self.capacity != other.capacity:
+            raise ValueError(f"Cannot merge a TweetAggregator of capacity {other.capacity} into one of capacity {self.capacity}")
+        if bool(self.memory_budget_mb) != bool(other.memory_budget_mb):
+            raise ValueError("Cannot merge a TweetAggregator with a memory budget and one without")
+
+        with stage("q1.merge", keys=len(other.date_user_counts)):
+            self.date_counts.update(other.date_counts) #type: ignore
+            if not self.capacity:
+                self.date_user_counts.merge(other.date_user_counts) #type: ignore
+            else:
+                for date, user_counts in other.date_user_counts.items():
+                    self.date_user_counts[date].merge(user_counts) #type: ignore
+        return self
+
+    def finalize(self, top_n: int = 10) -> List[Tuple[date, str]]:
+        """
+        CALL: finalize(self, top_n: int = 10)
+        DESCRIPTION: Returns the q1 results: the top N dates with their most common user.
+        RESULT: List[Tuple[date, str]]
+        """
+        results: List[Tuple[date, str]] = []
+        with stage("q1.top_n"):
+            top_dates = [day for day, _ in self.get_top_dates(top_n)]
+            if self.memory_budget_mb:
+                # One pass over the spilled runs answers every date at once
+                top_users = self._top_users(top_dates)
+            else:
+                top_users = {day: self.get_top_user_for_date(day) for day in top_dates}
+            for day in top_dates:
+                if top_users.get(day):
+                    results.append((day, top_users[day]))
+        return results
+
+    def _top_users(self, dates: List[date]) -> Dict[date, str]:
+        """
+        CALL: _top_users(self, dates: List[date])
+        DESCRIPTION: Returns the most common user of each date with a single scan of the exact (date, username)
+        totals of the SpillCounter, run partition by partition.
+        RESULT: Dict[date, str]
+        """
+        wanted = set(dates)
+        best: Dict[date, Tuple[str, int]] = {}
+        for (day, username), count in self.date_user_counts.items(): #type: ignore
+            if day in wanted and count > best.get(day, ("", 0))[1]: #type: ignore
+                best[day] = (username, count) #type: ignore
+        return {day: username for day, (username, _) in best.items()}
 
     def get_top_dates(self, top_n: int = 10) -> List[Tuple[date, int]]:
         """
@@ -38,9 +126,60 @@ class TweetAggregator:
         DESCRIPTION: Returns the most common user for a given date.
         RESULT: str
         """
-        top_user: str = self.date_user_counts[date].most_common(1) #type: ignore
+        if self.memory_budget_mb:
+            return self._top_users([date]).get(date, "")
+        if self.capacity:
+            # get() so a lookup (e.g. a date of the server's q1 window) never adds an empty summary to the defaultdict
+            user_counts = self.date_user_counts.get(date)
+            top_user = user_counts.most_common(1) if user_counts is not None else [] #type: ignore
+        else:
+            top_user = self.date_user_counts.most_common(date, 1)
         if top_user:
             return top_user[0][0] #type: ignore
         return ""
 
+    def get_state(self) -> Dict[str, Any]:
+        """
+        CALL: get_state(self)
+        DESCRIPTION: Returns the aggregated counters, to be checkpointed and restored with set_state. With a memory
+        budget the spilled runs stay on local disk, so the state holds a compressed SpillSnapshot of the (date,
+        username) totals and the budget, and loading it spills them again.
+        RESULT: Dict[str, Any]
+        """
+        if self.memory_budget_mb:
+            return {"date_counts": self.date_counts, "date_user_counts": self.date_user_counts.snapshot(),
+                    "memory_budget_mb": self.memory_budget_mb, "spill_dir": self.spill_dir}
+        return {"date_counts": self.date_counts, "date_user_counts": self.date_user_counts}
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        CALL: set_state(self, state: Dict[str, Any])
+        DESCRIPTION: Restores the counters returned by get_state.
+        RESULT: None
+        """
+        self.date_counts = state["date_counts"]
+        if self.memory_budget_mb:
+            self.date_user_counts.close()
+            self.date_user_counts.merge(state["date_user_counts"])
+        else:
+            self.date_user_counts = state["date_user_counts"]
 
+    def serialize(self) -> bytes:
+        """
+        CALL: serialize(self)
+        DESCRIPTION: Returns the counters and capacity as a compact partial-state payload (see encode_state).
+        RESULT: bytes
+        """
+        return encode_state("TweetAggregator", self.capacity, self.get_state())
+
+    @classmethod
+    def deserialize(cls, data: bytes) -> "TweetAggregator":
+        """
+        CALL: TweetAggregator.deserialize(data: bytes)
+        DESCRIPTION: Rebuilds an aggregator from a payload of serialize, with the same capacity or memory budget.
+        RESULT: TweetAggregator
+        """
+        capacity, state = decode_state(data, "TweetAggregator")
+        aggregator = cls(capacity, state.get("memory_budget_mb"), state.get("spill_dir"))
+        aggregator.set_state(state)
+        return aggregator
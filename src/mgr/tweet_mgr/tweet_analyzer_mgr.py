@@ -1,35 +1,36 @@
 # pyright: strict
-from typing import List, Tuple
-from mgr.chunk_mgr import JsonChunkReader
+from typing import List, Optional, Tuple
+from mgr.multi_file_mgr import ChunkReader
+from mgr.pipeline_mgr import PipelineStats, run_pipeline
 from mgr.tweet_mgr.tweet_aggregator_mgr import TweetAggregator
 import gc
 from datetime import date
 
 class TweetAnalyzer:
-    """Orchestrates the analysis by reading chunks and aggregating statistics."""
+    """
+    Orchestrates the analysis by reading chunks and aggregating statistics.
+    With pipelined, reading, decoding and counting overlap as pipeline stages (see run_pipeline).
+    """
     
-    def __init__(self, reader: JsonChunkReader, aggregator: TweetAggregator):
+    def __init__(self, reader: ChunkReader, aggregator: TweetAggregator, pipelined: bool = False):
         self.reader = reader
         self.aggregator = aggregator
+        self.pipelined = pipelined
+        self.pipeline_stats: Optional[PipelineStats] = None
 
-    def analyze(self) -> List[Tuple[date, str]]:
+    def analyze(self, top_n: int = 10) -> List[Tuple[date, str]]:
         """
-        CALL: analyze(self)
+        CALL: analyze(self, top_n: int = 10)
         DESCRIPTION: Processes all chunks and computes the results.
         RESULT: List[Tuple[date, str]]
         """
-        for chunk in self.reader.read_chunks():
-            self.aggregator.process_chunk(chunk)
+        if self.pipelined:
+            self.pipeline_stats = run_pipeline(self.reader, self.aggregator.process_chunk)
+        else:
+            for chunk in self.reader.read_chunks():
+                self.aggregator.process_chunk(chunk)
 
-            del chunk
-            gc.collect()
+                del chunk
+                gc.collect()
 
-        top_dates = self.aggregator.get_top_dates()
-        results: List[Tuple[date, str]] = [] # type: ignore
-        
-        for date, _ in top_dates:
-            top_user = self.aggregator.get_top_user_for_date(date)
-            if top_user:
-                results.append((date, top_user)) # type: ignore
-                
-        return results # type: ignore
\ No newline at end of file
+        return self.aggregator.finalize(top_n)
@@ -1,76 +1,81 @@
 # pyright: strict
-from mgr.chunk_mgr import JsonChunkReader
-from typing import List, Tuple, Dict
+from mgr.multi_file_mgr import FilePaths, open_reader
+from mgr.concurrent_mgr import bounded_submit, process_readers, tree_reduce
+from mgr.tweet_mgr.tweet_aggregator_mgr import TweetAggregator
+from typing import List, Optional, Tuple
 from datetime import date
-from collections import Counter, defaultdict
+from utils.constants import THREAD_BACKEND, PROCESS_BACKEND, RANGE_BACKEND, MAX_PENDING_PER_WORKER, RANGES_PER_WORKER
 import concurrent.futures
 import gc
 import pandas as pd
 
 
 class TweetThreadAnalyzer:
-    """Processes a JSON file concurrently to aggregate date and user counts."""
-    
-    def __init__(self, file_path: str, chunk_size: int, num_workers: int):
-        self.reader = JsonChunkReader(file_path, chunk_size)
+    """
+    Processes a JSON file concurrently to aggregate date and user counts.
+    The "threads" backend parses in the calling thread and counts on a thread pool; the "ranges" and
+    "processes" backends split the file into newline-aligned byte ranges and let each worker thread or
+    process read, parse and count its own ranges.
+    At most max_pending chunks are in flight at once, so peak memory follows num_workers x chunk_size.
+    Every chunk or range yields a partial TweetAggregator; the partials are merged pairwise in parallel (see tree_reduce).
+    use_cache reads through the columnar cache; it only applies to the "threads" backend.
+    adaptive lets every reader tune its chunk size from chunk_size (see ChunkSizer).
+    file_path can also be a glob or a list of files, read as one input (see MultiJsonChunkReader).
+    start_date and end_date restrict the counts to a window of UTC days (see JsonChunkReader).
+    """
+
+    def __init__(self, file_path: FilePaths, chunk_size: int, num_workers: int, columns: Optional[List[str]] = None,
+                 backend: str = THREAD_BACKEND, max_pending: Optional[int] = None, use_cache: bool = False,
+                 adaptive: bool = False, start_date: Optional[date] = None, end_date: Optional[date] = None):
+        if backend not in (THREAD_BACKEND, PROCESS_BACKEND, RANGE_BACKEND):
+            raise ValueError(f"Unknown backend '{backend}'")
+        self.reader = open_reader(file_path, chunk_size, columns, use_cache=use_cache, adaptive=adaptive,
+                                  start_date=start_date, end_date=end_date)
         self.num_workers = num_workers
+        self.backend = backend
+        self.max_pending = max_pending or num_workers * MAX_PENDING_PER_WORKER
 
     @staticmethod
-    def _process_chunk(chunk: pd.DataFrame) -> Tuple[Counter, Dict[date, Counter]]: # type: ignore
+    def _process_chunk(chunk: pd.DataFrame) -> TweetAggregator:
         """
         CALL: process_chunk(chunk: pd.DataFrame)
         DESCRIPTION: Processes a single chunk:
-        - Normalizes the 'date' column.
-        - Computes local date counts.
-        - Computes per-date user counts.
-        RESULT: Tuple[Counter, Dict[date, Counter]]
+        - Counts tweets per date and per (date, username) with a groupby.
+        - Returns them as a partial TweetAggregator, with the per-date user counts in an integer-coded DateUserCounts.
+        RESULT: TweetAggregator
         """
-        chunk['date'] = chunk['date'].dt.date
-        local_date_counts = Counter(chunk['date'].value_counts().to_dict()) # type: ignore
-        local_date_user_counts = defaultdict(Counter) # type: ignore
-        
-        # Process each row in the chunk using dropna on 'user'
-        for d, user in zip( # type: ignore
-            chunk['date'], # type: ignore
-            chunk['user'].dropna().map(lambda u: u.get('username')) # type: ignore
-        ):
-            if user:
-                local_date_user_counts[d][user] += 1
-        
+        aggregator = TweetAggregator()
+        aggregator.process_chunk(chunk)
+
         del chunk
         gc.collect()
-        
-        return local_date_counts, local_date_user_counts # type: ignore
 
-    def analyze(self) -> List[Tuple[date, str]]:
+        return aggregator
+
+    @staticmethod
+    def _merge_results(overall: TweetAggregator, local: TweetAggregator) -> TweetAggregator:
+        """
+        CALL: _merge_results(overall, local)
+        DESCRIPTION: Adds the local date and per-date user counts into the overall ones.
+        RESULT: TweetAggregator
+        """
+        return overall.merge(local)
+
+    def analyze(self, top_n: int = 10) -> List[Tuple[date, str]]:
         """
-        CALL: analyze(self)
+        CALL: analyze(self, top_n: int = 10)
         DESCRIPTION:  Processes all chunks concurrently and aggregates the results.
-        Returns a list of tuples with the top 10 dates and their most common user.
+        Returns a list of tuples with the top N dates and their most common user.
         RESULT: List[Tuple[date, str]]
         """
-        overall_date_counts = Counter() # type: ignore
-        overall_date_user_counts = defaultdict(Counter) # type: ignore
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.num_workers) as executor:
-            futures = [ # type: ignore
-                executor.submit(TweetThreadAnalyzer._process_chunk, chunk) # type: ignore
-                for chunk in self.reader.read_chunks()
-            ]
+        if self.backend == THREAD_BACKEND:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+                partials = bounded_submit(executor, TweetThreadAnalyzer._process_chunk, self.reader.read_chunks(), self.max_pending) # type: ignore
+                overall = tree_reduce(partials, TweetThreadAnalyzer._merge_results, executor, self.max_pending) # type: ignore
+        else:
+            overall = process_readers(
+                self.reader.split(self.num_workers * RANGES_PER_WORKER), self.num_workers,
+                TweetThreadAnalyzer._process_chunk, TweetThreadAnalyzer._merge_results, None, self.backend == PROCESS_BACKEND # type: ignore
+            )
 
-            for future in concurrent.futures.as_completed(futures): # type: ignore
-                local_date_counts, local_date_user_counts = future.result() # type: ignore
-                overall_date_counts.update(local_date_counts) # type: ignore
-                for d, counter in local_date_user_counts.items(): # type: ignore
-                    overall_date_user_counts[d].update(counter) # type: ignore
-        
-        top_10_dates = overall_date_counts.most_common(10) # type: ignore
-        
-        results: List[Tuple[date, str]] = []
-        
-        for d, _ in top_10_dates: # type: ignore
-            top_user = overall_date_user_counts[d].most_common(1) # type: ignore
-            if top_user:
-                results.append((d, top_user[0][0])) # type: ignore
-        
-        return results
+        return (overall or TweetAggregator()).finalize(top_n)
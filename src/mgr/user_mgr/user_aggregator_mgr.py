@@ -1,34 +1,135 @@
 # pyright: strict
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 from collections import Counter
 import pandas as pd
 import gc
-from utils.tools import extract_mentions
+from utils.tools import count_mentions
+from utils.heavy_hitters import HeavyHitters
+from utils.spill_counter import SpillCounter
+from utils.constants import SPILL_BYTES_PER_USER
+from utils.prefilter import PrefilterStats, screen_mentions
+from utils.metrics import stage
+from mgr.partial_mgr import decode_state, encode_state
 
 class UserAggregator:
-    """Aggregates user mention counts from JSON chunks."""
+    """
+    Aggregates user mention counts from JSON chunks.
+    With a capacity the counts are kept in a bounded HeavyHitters summary instead of an exact Counter.
+    With a memory_budget_mb they stay exact in a SpillCounter, which spills sorted runs to spill_dir (the system
+    temporary directory by default) once it outgrows the budget.
+    Implements the MergeableAggregator interface: partial aggregators merge, serialize and finalize into q3.
+    """
     
-    def __init__(self):
-        self.user_counter: Counter[str] = Counter()
+    def __init__(self, capacity: Optional[int] = None, memory_budget_mb: Optional[float] = None, spill_dir: Optional[str] = None):
+        if capacity and memory_budget_mb:
+            raise ValueError("capacity approximates the counts and memory_budget_mb keeps them exact, pass only one")
+        self.capacity = capacity
+        self.memory_budget_mb = memory_budget_mb
+        self.spill_dir = spill_dir
+        self.user_counter: Union[Counter[str], HeavyHitters, SpillCounter] = Counter()
+        if capacity:
+            self.user_counter = HeavyHitters(capacity)
+        elif memory_budget_mb:
+            self.user_counter = SpillCounter(max(1, int(memory_budget_mb * 2**20 / SPILL_BYTES_PER_USER)), spill_dir=spill_dir)
+        self.prefilter_stats = PrefilterStats()
 
     def process_chunk(self, chunk: pd.DataFrame) -> None:
         """
         CALL: process_chunk(self, chunk: pd.DataFrame)
         DESCRIPTION: Processes a DataFrame chunk, extracts mentions from the 'content' column, and updates the counter.
+        Rows without an '@' are screened out before extraction.
         RESULT: None
         """
-        chunk['mentions'] = chunk['content'].fillna("").map(extract_mentions) # type: ignore
-        
-        for mentions in chunk['mentions']: # type: ignore
-            self.user_counter.update(mentions) # type: ignore
+        with stage("q3.screen", rows=len(chunk)) as screened:
+            contents = screen_mentions(chunk['content'], self.prefilter_stats)
+            screened.update(kept=len(contents))
+        with stage("q3.extract", rows=len(contents)):
+            counts = count_mentions(contents)
+        with stage("q3.merge", keys=len(counts)):
+            self.user_counter.update(counts) # type: ignore
         
         del chunk
         gc.collect()
 
+    def merge(self, other: "UserAggregator") -> "UserAggregator":
+        """
+        CALL: merge(self, other: UserAggregator)
+        DESCRIPTION: Adds the mention counts and pre-screen stats of another aggregator (e.g. a worker's partial) and
+        returns self. Both must have the same capacity.
+        RESULT: UserAggregator
+        """
+        if self.capacity != other.capacity:
+            raise ValueError(f"Cannot merge a UserAggregator of capacity {other.capacity} into one of capacity {self.capacity}")
+        if bool(self.memory_budget_mb) != bool(other.memory_budget_mb):
+            raise ValueError("Cannot merge a UserAggregator with a memory budget and one without")
+
+        with stage("q3.merge", keys=len(other.user_counter)):
+            if self.capacity or self.memory_budget_mb:
+                self.user_counter.merge(other.user_counter) # type: ignore
+            else:
+                self.user_counter.update(other.user_counter) # type: ignore
+            self.prefilter_stats.merge(other.prefilter_stats)
+        return self
+
+    def finalize(self, top_n: int = 10) -> List[Tuple[str, int]]:
+        """
+        CALL: finalize(self, top_n: int = 10)
+        DESCRIPTION: Returns the q3 results, same as get_top_mentions.
+        RESULT: List[Tuple[str, int]]
+        """
+        return self.get_top_mentions(top_n)
+
     def get_top_mentions(self, top_n: int = 10) -> List[Tuple[str, int]]:
         """
         CALL: get_top_mentions(self, top_n: int = 10) 
         DESCRIPTION: Returns the top N mentions with their counts.
         RESULT: List[Tuple[str, int]]
         """
-        return self.user_counter.most_common(top_n)
+        with stage("q3.top_n"):
+            return self.user_counter.most_common(top_n)
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        CALL: get_state(self)
+        DESCRIPTION: Returns the aggregated counter and pre-screen stats, to be checkpointed and restored with set_state.
+        With a memory budget the spilled runs stay on local disk, so the state holds a compressed SpillSnapshot of
+        the totals and the budget, and loading it spills them again.
+        RESULT: Dict[str, Any]
+        """
+        if isinstance(self.user_counter, SpillCounter):
+            return {"user_counter": self.user_counter.snapshot(), "prefilter_stats": self.prefilter_stats,
+                    "memory_budget_mb": self.memory_budget_mb, "spill_dir": self.spill_dir}
+        return {"user_counter": self.user_counter, "prefilter_stats": self.prefilter_stats}
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        CALL: set_state(self, state: Dict[str, Any])
+        DESCRIPTION: Restores the counter and pre-screen stats returned by get_state.
+        RESULT: None
+        """
+        if isinstance(self.user_counter, SpillCounter):
+            self.user_counter.close()
+            self.user_counter.merge(state["user_counter"])
+        else:
+            self.user_counter = state["user_counter"]
+        self.prefilter_stats = state["prefilter_stats"]
+
+    def serialize(self) -> bytes:
+        """
+        CALL: serialize(self)
+        DESCRIPTION: Returns the counter, pre-screen stats and capacity as a compact partial-state payload (see encode_state).
+        RESULT: bytes
+        """
+        return encode_state("UserAggregator", self.capacity, self.get_state())
+
+    @classmethod
+    def deserialize(cls, data: bytes) -> "UserAggregator":
+        """
+        CALL: UserAggregator.deserialize(data: bytes)
+        DESCRIPTION: Rebuilds an aggregator from a payload of serialize, with the same capacity or memory budget.
+        RESULT: UserAggregator
+        """
+        capacity, state = decode_state(data, "UserAggregator")
+        aggregator = cls(capacity, state.get("memory_budget_mb"), state.get("spill_dir"))
+        aggregator.set_state(state)
+        return aggregator
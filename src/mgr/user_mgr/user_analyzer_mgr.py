@@ -1,25 +1,32 @@
 # pyright: strict
-from typing import List, Tuple
-from mgr.chunk_mgr import JsonChunkReader
+from typing import List, Optional, Tuple
+from mgr.multi_file_mgr import ChunkReader
+from mgr.pipeline_mgr import PipelineStats, run_pipeline
 from mgr.user_mgr.user_aggregator_mgr import UserAggregator
 
 class UserAnalyzer:
     """
     Orchestrates the user mention extraction analysis by reading JSON chunks and
     aggregating mention counts using a UserAggregator.
+    With pipelined, reading, decoding and counting overlap as pipeline stages (see run_pipeline).
     """
     
-    def __init__(self, reader: JsonChunkReader, aggregator: UserAggregator):
+    def __init__(self, reader: ChunkReader, aggregator: UserAggregator, pipelined: bool = False):
         self.reader = reader
         self.aggregator = aggregator
+        self.pipelined = pipelined
+        self.pipeline_stats: Optional[PipelineStats] = None
 
-    def analyze(self) -> List[Tuple[str, int]]:
+    def analyze(self, top_n: int = 10) -> List[Tuple[str, int]]:
         """
-        CALL: analyze(self)
+        CALL: analyze(self, top_n: int = 10)
         DESCRIPTION: Processes all chunks to update the user mention counter and returns the top mentions.
         RESULT: List[Tuple[str, int]]
         """
-        for chunk in self.reader.read_chunks():
-            self.aggregator.process_chunk(chunk)
+        if self.pipelined:
+            self.pipeline_stats = run_pipeline(self.reader, self.aggregator.process_chunk)
+        else:
+            for chunk in self.reader.read_chunks():
+                self.aggregator.process_chunk(chunk)
             
-        return self.aggregator.get_top_mentions()
+        return self.aggregator.get_top_mentions(top_n)
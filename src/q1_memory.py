@@ -1,32 +1,51 @@
 # pyright: strict
 from mgr.tweet_mgr.tweet_aggregator_mgr import TweetAggregator
 from mgr.tweet_mgr.tweet_analyzer_mgr import TweetAnalyzer
-from mgr.chunk_mgr import JsonChunkReader
-from utils.constants import SMALL_CHUNK_SIZE
-from utils.tools import get_app_args, get_stats_in_memory
-from typing import List, Tuple
+from mgr.multi_file_mgr import FilePaths, open_reader
+from mgr.checkpoint_mgr import AggregationCheckpoint
+from utils.constants import SMALL_CHUNK_SIZE, TWEET_COLUMNS
+from utils.tools import get_app_args
+from utils.metrics import memory_profiled, run_instrumented
+from typing import List, Optional, Tuple
 from pprint import pprint
-from memory_profiler import profile  # type: ignore
 from datetime import date
-import cProfile
 import gc
 import argparse
 import logging
 
 
-@profile
-def q1_memory(file_path: str) -> List[Tuple[date, str]]:
+@memory_profiled
+def q1_memory(file_path: FilePaths, use_cache: bool = False, checkpoint_path: Optional[str] = None,
+              capacity: Optional[int] = None, adaptive: bool = False,
+              start_date: Optional[date] = None, end_date: Optional[date] = None, pipelined: bool = False,
+              memory_budget_mb: Optional[float] = None, spill_dir: Optional[str] = None) -> List[Tuple[date, str]]:
     """
-    CALL: q1_memory(file_path: str)
+    CALL: q1_memory(file_path: FilePaths, use_cache: bool = False, checkpoint_path: Optional[str] = None,
+          capacity: Optional[int] = None, adaptive: bool = False,
+          start_date: Optional[date] = None, end_date: Optional[date] = None, pipelined: bool = False,
+          memory_budget_mb: Optional[float] = None, spill_dir: Optional[str] = None)
     DESCRIPTION: Processes a JSON file to extract the top user for each of the top 10 dates (Focus on optimizing memory).
+    With a checkpoint_path only the lines appended since the previous run are processed.
+    With a capacity the counts are approximated in bounded memory (see HeavyHitters).
+    With adaptive the chunk size is tuned while reading (see ChunkSizer).
+    With pipelined, reading, decoding and counting overlap (see run_pipeline).
+    With a memory_budget_mb the counts stay exact and spill to sorted runs in spill_dir past the budget (see SpillCounter).
     RESULT: List[Tuple[date, str]]
     """
-    reader = JsonChunkReader(file_path, SMALL_CHUNK_SIZE)
-    aggregator = TweetAggregator()
-    analyzer = TweetAnalyzer(reader, aggregator)
-    results = analyzer.analyze()
+    aggregator = TweetAggregator(capacity, memory_budget_mb, spill_dir)
+    with AggregationCheckpoint(checkpoint_path, file_path, {"tweets": aggregator}, start_date, end_date) as checkpoint:
+        reader = open_reader(file_path, SMALL_CHUNK_SIZE, TWEET_COLUMNS, checkpoint.start, checkpoint.end,
+                                 use_cache=use_cache, adaptive=adaptive, start_date=start_date, end_date=end_date)
+        analyzer = TweetAnalyzer(reader, aggregator, pipelined)
+        results = analyzer.analyze()
 
     pprint(results, sort_dicts=False)
+    if reader.sizer:
+        print(f"Chunk size: {reader.sizer}")
+    if analyzer.pipeline_stats:
+        print(f"Pipeline:\n{analyzer.pipeline_stats}")
+    if aggregator.memory_budget_mb:
+        print(f"Spill: {aggregator.date_user_counts}")
     return results
 
 if __name__ == '__main__':
@@ -35,16 +54,10 @@ if __name__ == '__main__':
         file_path = app_args.file_path
 
         gc.collect()
-        
-        profiler = cProfile.Profile()
-        profiler.enable()
-        
-        q1_memory(file_path)
-        
-        profiler.disable()
-        
-        get_stats_in_memory(profiler)
-        
+        run_instrumented(q1_memory, file_path, app_args.use_cache, app_args.checkpoint_path, app_args.capacity, app_args.adaptive_chunks,
+                         app_args.start_date, app_args.end_date, app_args.pipeline, app_args.memory_budget_mb, app_args.spill_dir,
+                         profile=app_args.profile, metrics_path=app_args.metrics_path)
+
     except Exception as err:
         logging.error(f"An unexpected error occurred, exception is {str(err)}", exc_info=err)
     finally:
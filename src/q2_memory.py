@@ -1,30 +1,46 @@
 # pyright: strict
 from mgr.emoji_mgr.emoji_aggregator_mgr import EmojiAggregator
 from mgr.emoji_mgr.emoji_analyzer_mgr import EmojiAnalyzer
-from mgr.chunk_mgr import JsonChunkReader
-from utils.constants import SMALL_CHUNK_SIZE
-from utils.tools import get_app_args, get_stats_in_memory
-from typing import List, Tuple
+from mgr.multi_file_mgr import FilePaths, open_reader
+from mgr.checkpoint_mgr import AggregationCheckpoint
+from utils.constants import SMALL_CHUNK_SIZE, CONTENT_COLUMNS
+from utils.tools import get_app_args
+from utils.metrics import memory_profiled, run_instrumented
+from typing import List, Optional, Tuple
 from pprint import pprint
-from memory_profiler import profile  # type: ignore
-import cProfile
+from datetime import date
 import gc
 import logging
 
 
-@profile
-def q2_memory(file_path: str) -> List[Tuple[str, int]]:
+@memory_profiled
+def q2_memory(file_path: FilePaths, use_cache: bool = False, checkpoint_path: Optional[str] = None,
+              capacity: Optional[int] = None, adaptive: bool = False,
+              start_date: Optional[date] = None, end_date: Optional[date] = None, pipelined: bool = False) -> List[Tuple[str, int]]:
     """
-    CALL: q2_memory(file_path: str)
+    CALL: q2_memory(file_path: FilePaths, use_cache: bool = False, checkpoint_path: Optional[str] = None,
+          capacity: Optional[int] = None, adaptive: bool = False,
+          start_date: Optional[date] = None, end_date: Optional[date] = None, pipelined: bool = False)
     DESCRIPTION: Processes a JSON file to extract the top 10 most used emojis (Focus on optimizing memory).
+    With a checkpoint_path only the lines appended since the previous run are processed.
+    With a capacity the counts are approximated in bounded memory (see HeavyHitters).
+    With adaptive the chunk size is tuned while reading (see ChunkSizer).
+    With pipelined, reading, decoding and counting overlap (see run_pipeline).
     RESULT: List[Tuple[str, int]
     """
-    reader = JsonChunkReader(file_path, SMALL_CHUNK_SIZE)
-    aggregator = EmojiAggregator()
-    analyzer = EmojiAnalyzer(reader, aggregator)
-    results = analyzer.analyze()
+    aggregator = EmojiAggregator(capacity)
+    with AggregationCheckpoint(checkpoint_path, file_path, {"emojis": aggregator}, start_date, end_date) as checkpoint:
+        reader = open_reader(file_path, SMALL_CHUNK_SIZE, CONTENT_COLUMNS, checkpoint.start, checkpoint.end,
+                                 use_cache=use_cache, adaptive=adaptive, start_date=start_date, end_date=end_date)
+        analyzer = EmojiAnalyzer(reader, aggregator, pipelined)
+        results = analyzer.analyze()
     
     pprint(results, sort_dicts=False)
+    if reader.sizer:
+        print(f"Chunk size: {reader.sizer}")
+    if analyzer.pipeline_stats:
+        print(f"Pipeline:\n{analyzer.pipeline_stats}")
+    print(f"Prefilter: {aggregator.prefilter_stats}")
     return results
 
 if __name__ == '__main__':
@@ -33,13 +49,9 @@ if __name__ == '__main__':
         file_path = app_args.file_path
         
         gc.collect()
-        profiler = cProfile.Profile()
-        profiler.enable()
-
-        q2_memory(file_path)
-
-        profiler.disable()
-        get_stats_in_memory(profiler)
+        run_instrumented(q2_memory, file_path, app_args.use_cache, app_args.checkpoint_path, app_args.capacity, app_args.adaptive_chunks,
+                         app_args.start_date, app_args.end_date, app_args.pipeline,
+                         profile=app_args.profile, metrics_path=app_args.metrics_path)
 
     except Exception as err:
         logging.error(f"An unexpected error occurred, exception is {str(err)}", exc_info=err)
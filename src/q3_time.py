@@ -1,29 +1,35 @@
 # pyright: strict
 from mgr.user_mgr.user_thread_mgr import UserThreadAnalyzer
-from utils.constants import MEDIUM_CHUNK_SIZE
-from utils.tools import get_app_args, get_stats_in_memory
-from typing import List, Tuple
+from utils.constants import MEDIUM_CHUNK_SIZE, CONTENT_COLUMNS, THREAD_BACKEND
+from mgr.multi_file_mgr import FilePaths
+from utils.tools import get_app_args
+from utils.metrics import memory_profiled, run_instrumented
+from typing import List, Optional, Tuple
 from pprint import pprint
-from memory_profiler import profile  # type: ignore
-import cProfile
+from datetime import date
 import gc
 import multiprocessing
 import argparse
 import logging
 
 
-@profile
-def q3_time(file_path: str) -> List[Tuple[str, int]]:
+@memory_profiled
+def q3_time(file_path: FilePaths, backend: str = THREAD_BACKEND, use_cache: bool = False, adaptive: bool = False,
+            start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Tuple[str, int]]:
     """
-    CALL: q3_time(file_path: str)
+    CALL: q3_time(file_path: FilePaths, backend: str = THREAD_BACKEND, use_cache: bool = False, adaptive: bool = False,
+          start_date: Optional[date] = None, end_date: Optional[date] = None)
     DESCRIPTION: Processes a JSON file to extract the top 10 mentioned users (Focus on optimizing time).
     RESULT: List[Tuple[str, int]
     """
     num_workers = multiprocessing.cpu_count()
-    analyzer = UserThreadAnalyzer(file_path, MEDIUM_CHUNK_SIZE, num_workers)
+    analyzer = UserThreadAnalyzer(file_path, MEDIUM_CHUNK_SIZE, num_workers, CONTENT_COLUMNS, backend, use_cache=use_cache, adaptive=adaptive, start_date=start_date, end_date=end_date)
     results = analyzer.analyze()
     
     pprint(results, sort_dicts=False)
+    if analyzer.reader.sizer:
+        print(f"Chunk size: {analyzer.reader.sizer}")
+    print(f"Prefilter: {analyzer.prefilter_stats}")
     return results
 
 if __name__ == '__main__':
@@ -32,13 +38,8 @@ if __name__ == '__main__':
         file_path = app_args.file_path
 
         gc.collect()
-        profiler = cProfile.Profile()
-        profiler.enable()
-
-        q3_time(file_path)
-
-        profiler.disable()
-        get_stats_in_memory(profiler)
+        run_instrumented(q3_time, file_path, app_args.backend, app_args.use_cache, app_args.adaptive_chunks, app_args.start_date, app_args.end_date,
+                         profile=app_args.profile, metrics_path=app_args.metrics_path)
 
     except Exception as err:
         logging.error(f"An unexpected error occurred, exception is {str(err)}", exc_info=err)
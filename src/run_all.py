@@ -0,0 +1,96 @@
+# pyright: strict
+from mgr.tweet_mgr.tweet_aggregator_mgr import TweetAggregator
+from mgr.emoji_mgr.emoji_aggregator_mgr import EmojiAggregator
+from mgr.user_mgr.user_aggregator_mgr import UserAggregator
+from mgr.report_mgr.report_analyzer_mgr import ReportAnalyzer
+from mgr.report_mgr.report_thread_mgr import ReportThreadAnalyzer
+from mgr.multi_file_mgr import FilePaths, open_reader
+from utils.constants import SMALL_CHUNK_SIZE, MEDIUM_CHUNK_SIZE, REPORT_COLUMNS, THREAD_BACKEND
+from utils.tools import get_app_args
+from utils.metrics import memory_profiled, run_instrumented
+from typing import Any, Dict, List, Optional, Tuple
+from pprint import pprint
+from datetime import date
+import gc
+import multiprocessing
+import argparse
+import logging
+
+
+def run_all_memory(file_path: FilePaths, use_cache: bool = False, capacity: Optional[int] = None,
+                   adaptive: bool = False, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                   pipelined: bool = False, memory_budget_mb: Optional[float] = None,
+                   spill_dir: Optional[str] = None) -> Dict[str, List[Tuple[Any, Any]]]:
+    """
+    CALL: run_all_memory(file_path: FilePaths, use_cache: bool = False, capacity: Optional[int] = None, adaptive: bool = False,
+          start_date: Optional[date] = None, end_date: Optional[date] = None, pipelined: bool = False,
+          memory_budget_mb: Optional[float] = None, spill_dir: Optional[str] = None)
+    DESCRIPTION: Answers q1, q2 and q3 with a single sequential read of the JSON file (Focus on optimizing memory).
+    With a capacity the counts are approximated in bounded memory (see HeavyHitters).
+    With pipelined, reading, decoding and counting overlap (see run_pipeline).
+    With a memory_budget_mb the q1 and q3 counters stay exact and each spills to sorted runs in spill_dir past
+    the budget (see SpillCounter).
+    RESULT: Dict[str, List[Tuple[Any, Any]]]
+    """
+    reader = open_reader(file_path, SMALL_CHUNK_SIZE, REPORT_COLUMNS, use_cache=use_cache, adaptive=adaptive, start_date=start_date, end_date=end_date)
+    tweet_aggregator = TweetAggregator(capacity, memory_budget_mb, spill_dir)
+    user_aggregator = UserAggregator(capacity, memory_budget_mb, spill_dir)
+    analyzer = ReportAnalyzer(reader, tweet_aggregator, EmojiAggregator(capacity), user_aggregator, pipelined)
+    results = analyzer.analyze()
+    if analyzer.pipeline_stats:
+        print(f"Pipeline:\n{analyzer.pipeline_stats}")
+    if memory_budget_mb:
+        print(f"Spill: q1 {tweet_aggregator.date_user_counts}, q3 {user_aggregator.user_counter}")
+    return results
+
+def run_all_time(file_path: FilePaths, backend: str = THREAD_BACKEND, use_cache: bool = False, adaptive: bool = False,
+                 start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict[str, List[Tuple[Any, Any]]]:
+    """
+    CALL: run_all_time(file_path: FilePaths, backend: str = THREAD_BACKEND, use_cache: bool = False, adaptive: bool = False,
+          start_date: Optional[date] = None, end_date: Optional[date] = None)
+    DESCRIPTION: Answers q1, q2 and q3 with a single concurrent read of the JSON file (Focus on optimizing time).
+    RESULT: Dict[str, List[Tuple[Any, Any]]]
+    """
+    num_workers = multiprocessing.cpu_count()
+    analyzer = ReportThreadAnalyzer(file_path, MEDIUM_CHUNK_SIZE, num_workers, REPORT_COLUMNS, backend, use_cache=use_cache, adaptive=adaptive, start_date=start_date, end_date=end_date)
+    return analyzer.analyze()
+
+@memory_profiled
+def run_all(file_path: FilePaths, optimize: str = "memory", backend: str = THREAD_BACKEND, use_cache: bool = False,
+            capacity: Optional[int] = None, adaptive: bool = False,
+            start_date: Optional[date] = None, end_date: Optional[date] = None, pipelined: bool = False,
+            memory_budget_mb: Optional[float] = None, spill_dir: Optional[str] = None) -> Dict[str, List[Tuple[Any, Any]]]:
+    """
+    CALL: run_all(file_path: FilePaths, optimize: str = "memory", backend: str = THREAD_BACKEND, use_cache: bool = False,
+          capacity: Optional[int] = None, adaptive: bool = False,
+          start_date: Optional[date] = None, end_date: Optional[date] = None, pipelined: bool = False,
+          memory_budget_mb: Optional[float] = None, spill_dir: Optional[str] = None)
+    DESCRIPTION: Processes a JSON file once to answer q1, q2 and q3 together, either sequentially ("memory")
+    or concurrently ("time") on the given backend. capacity, pipelined and memory_budget_mb only apply to the sequential run
+    (a memory_budget_mb with "time" raises ValueError);
+    adaptive tunes the chunk size while reading (see ChunkSizer); start_date and end_date keep only the
+    tweets of those UTC days (see DateIndex).
+    RESULT: Dict[str, List[Tuple[Any, Any]]]
+    """
+    if optimize == "time" and memory_budget_mb:
+        raise ValueError("-memory_budget_mb only applies to -optimize memory")
+    results = (run_all_time(file_path, backend, use_cache, adaptive, start_date, end_date) if optimize == "time"
+               else run_all_memory(file_path, use_cache, capacity, adaptive, start_date, end_date, pipelined, memory_budget_mb, spill_dir))
+
+    pprint(results, sort_dicts=False)
+    return results
+
+if __name__ == '__main__':
+    try:
+        app_args: argparse.Namespace = get_app_args()
+        file_path = app_args.file_path
+
+        gc.collect()
+        run_instrumented(run_all, file_path, app_args.optimize, app_args.backend, app_args.use_cache, app_args.capacity, app_args.adaptive_chunks,
+                         app_args.start_date, app_args.end_date, app_args.pipeline, app_args.memory_budget_mb, app_args.spill_dir,
+                         profile=app_args.profile, metrics_path=app_args.metrics_path)
+
+    except Exception as err:
+        logging.error(f"An unexpected error occurred, exception is {str(err)}", exc_info=err)
+    finally:
+        gc.collect()
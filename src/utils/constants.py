@@ -1,3 +1,44 @@
 # Chunk params
 SMALL_CHUNK_SIZE = 10000
-MEDIUM_CHUNK_SIZE = 20000
\ No newline at end of file
+MEDIUM_CHUNK_SIZE = 20000
+
+# Adaptive chunk sizing (see ChunkSizer)
+ADAPTIVE_BYTE_BUDGET = 64 * 2**20
+ADAPTIVE_MIN_CHUNK_SIZE = 1000
+ADAPTIVE_MAX_CHUNK_SIZE = 320000
+# A larger chunk size must be this much faster to be preferred, since it also costs memory
+ADAPTIVE_MIN_GAIN = 0.05
+
+# Column projections (nested fields use dotted paths)
+DATE_COLUMN = "date"
+USERNAME_COLUMN = "user.username"
+TWEET_COLUMNS = [DATE_COLUMN, USERNAME_COLUMN]
+CONTENT_COLUMNS = ["content"]
+REPORT_COLUMNS = [DATE_COLUMN, USERNAME_COLUMN, "content"]
+
+# Columnar cache
+CACHE_COLUMNS = REPORT_COLUMNS
+CACHE_DIR_NAME = ".latam_cache"
+
+# Date index: selected day ranges closer than this many bytes are read as one range
+DATE_INDEX_MAX_GAP = 2**20
+
+# Concurrent backends
+THREAD_BACKEND = "threads"
+PROCESS_BACKEND = "processes"
+RANGE_BACKEND = "ranges"
+RANGES_PER_WORKER = 4
+MAX_PENDING_PER_WORKER = 2
+
+# Pipelined memory analyzers: batches waiting between the read, decode and aggregate stages
+PIPELINE_QUEUE_SIZE = 2
+
+# Query service
+SERVICE_CACHE_SIZE = 256
+SERVICE_POLL_INTERVAL = 2.0
+SERVICE_PORT = 8765
+
+# Memory-budgeted exact counters (see SpillCounter): measured bytes per counted key, and partitions of the spilled runs
+SPILL_BYTES_PER_USER = 120
+SPILL_BYTES_PER_DATE_USER = 240
+SPILL_PARTITIONS = 16
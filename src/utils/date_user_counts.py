@@ -0,0 +1,143 @@
+# src/utils/date_user_counts.py
+from typing import Any, Dict, Hashable, List, Tuple
+import numpy as np
+import pandas as pd
+
+# A (date, user) pair is stored as one int64 key: date code in the high bits, user code in the low ones
+USER_CODE_BITS = 32
+USER_CODE_MASK = (1 << USER_CODE_BITS) - 1
+# Pending chunk counts are folded into the sorted arrays once they outgrow them (or this many entries)
+MIN_COMPACT_SIZE = 1 << 16
+
+
+class DateUserCounts:
+    """
+    Compact per-date user counts for q1. Every username and date is interned once as an integer code,
+    and the counts are kept as two NumPy arrays: sorted unique (date, user) keys and their counts.
+    Grouped chunk counts are recoded vectorized; they are buffered and folded into the arrays with one sort
+    once the buffer outgrows them, so adding a chunk or a worker's partial is an array operation.
+    """
+
+    def __init__(self):
+        self.usernames: List[str] = []
+        self.user_codes: Dict[str, int] = {}
+        self.dates: List[Any] = []
+        self.date_codes: Dict[Any, int] = {}
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._pending_size = 0
+
+    @staticmethod
+    def _intern(values: List[Hashable], table: List[Any], codes: Dict[Any, int]) -> np.ndarray:
+        """
+        CALL: _intern(values, table, codes)
+        DESCRIPTION: Returns the code of each value, adding unseen values to the table. Empty values get -1.
+        RESULT: np.ndarray
+        """
+        result: List[int] = []
+        for value in values:
+            if not value:
+                result.append(-1)
+                continue
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(table)
+                table.append(value)
+            result.append(code)
+        return np.array(result, dtype=np.int64)
+
+    def update(self, counts: pd.Series) -> None: # type: ignore
+        """
+        CALL: update(self, counts: pd.Series)
+        DESCRIPTION: Adds one chunk of counts indexed by (date, username), as returned by count_date_users. Only
+        the distinct values of each index level are interned; the rows are recoded with the level codes.
+        RESULT: None
+        """
+        index: pd.MultiIndex = counts.index # type: ignore
+        date_map = self._intern(list(index.levels[0]), self.dates, self.date_codes) # type: ignore
+        user_map = self._intern(list(index.levels[1]), self.usernames, self.user_codes) # type: ignore
+        date_codes = date_map[index.codes[0]] # type: ignore
+        user_codes = user_map[index.codes[1]] # type: ignore
+        valid = (date_codes >= 0) & (user_codes >= 0)
+
+        keys = (date_codes[valid] << USER_CODE_BITS) | user_codes[valid]
+        self._add(keys, counts.to_numpy(dtype=np.int64)[valid]) # type: ignore
+
+    def merge(self, other: "DateUserCounts") -> "DateUserCounts":
+        """
+        CALL: merge(self, other: DateUserCounts)
+        DESCRIPTION: Adds the counts of another instance (e.g. a worker's partial) and returns self. Only the other
+        instance's distinct names are re-interned; its keys are recoded with array lookups.
+        RESULT: DateUserCounts
+        """
+        other._compact()
+        date_map = self._intern(other.dates, self.dates, self.date_codes)
+        user_map = self._intern(other.usernames, self.usernames, self.user_codes) # type: ignore
+        keys = (date_map[other.keys >> USER_CODE_BITS] << USER_CODE_BITS) | user_map[other.keys & USER_CODE_MASK]
+        self._add(keys, other.counts)
+        return self
+
+    def _add(self, keys: np.ndarray, counts: np.ndarray) -> None:
+        """
+        CALL: _add(self, keys: np.ndarray, counts: np.ndarray)
+        DESCRIPTION: Buffers counted keys, compacting when the buffer holds more entries than the sorted arrays.
+        RESULT: None
+        """
+        self._pending.append((keys, counts))
+        self._pending_size += len(keys)
+        if self._pending_size >= max(len(self.keys), MIN_COMPACT_SIZE):
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        CALL: _compact(self)
+        DESCRIPTION: Folds the buffered counts into the sorted key and count arrays.
+        RESULT: None
+        """
+        if not self._pending:
+            return
+        keys = np.concatenate([self.keys] + [keys for keys, _ in self._pending])
+        counts = np.concatenate([self.counts] + [counts for _, counts in self._pending])
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts, minlength=len(self.keys)).astype(np.int64)
+        self._pending = []
+        self._pending_size = 0
+
+    def most_common(self, date: Any, top_n: int = 1) -> List[Tuple[str, int]]:
+        """
+        CALL: most_common(self, date: Any, top_n: int = 1)
+        DESCRIPTION: Returns the top N users of a date with their counts. The keys of a date are a contiguous slice
+        of the sorted arrays; ties go to the user interned first.
+        RESULT: List[Tuple[str, int]]
+        """
+        code = self.date_codes.get(date)
+        if code is None:
+            return []
+        self._compact()
+        start, end = np.searchsorted(self.keys, [code << USER_CODE_BITS, (code + 1) << USER_CODE_BITS])
+        counts = self.counts[start:end]
+        if top_n == 1:
+            # q1 only needs the top user: one linear argmax in place of a sort of the date's slice
+            top = [int(np.argmax(counts))] if len(counts) else []
+        else:
+            top = np.argsort(-counts, kind="stable")[:top_n]
+        return [(self.usernames[int(self.keys[start + index] & USER_CODE_MASK)], int(counts[index])) for index in top]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pickled (for worker processes and checkpoints) without the lookup dicts, which are rebuilt on load
+        self._compact()
+        return {"usernames": self.usernames, "dates": self.dates, "keys": self.keys, "counts": self.counts}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__()
+        self.usernames = state["usernames"]
+        self.dates = state["dates"]
+        self.user_codes = {username: code for code, username in enumerate(self.usernames)}
+        self.date_codes = {date: code for code, date in enumerate(self.dates)}
+        self.keys = state["keys"]
+        self.counts = state["counts"]
+
+    def __len__(self) -> int:
+        self._compact()
+        return len(self.keys)
@@ -0,0 +1,102 @@
+# src/utils/emoji_matcher.py
+from typing import Any, Dict, List, Pattern, Tuple
+from collections import Counter
+import re
+import emoji
+import pandas as pd
+
+# Emoji first codepoints closer than this are merged into one candidate range. Fewer, wider ranges scan
+# faster; the false candidates they let through are rejected by the trie.
+CANDIDATE_RANGE_GAP = 1024
+KEYCAP_SIGN = "\u20e3"
+VARIATION_SELECTOR = "\ufe0f"
+
+class EmojiMatcher:
+    """
+    Longest-match emoji scanner built once from emoji.EMOJI_DATA.
+    A coarse character-class regex jumps to the positions where an emoji can start, and a trie of the
+    emoji database returns the longest sequence from there, so ZWJ sequences, skin tones, flags and
+    keycaps come back whole.
+    """
+
+    def __init__(self):
+        self.trie: Dict[str, Any] = {}
+        for emoji_sequence in emoji.EMOJI_DATA:
+            node = self.trie
+            for char in emoji_sequence:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        self.candidate_pattern = self._build_candidate_pattern()
+
+    def _build_candidate_pattern(self) -> Pattern[str]:
+        """
+        CALL: _build_candidate_pattern(self)
+        DESCRIPTION: Builds a single character class of possible emoji starts: a few codepoint ranges covering
+        every non-ASCII first character, plus the keycap sign. ASCII keycap bases (#, *, 0-9) are far too
+        common to be candidates themselves; spans() finds them by looking back from the keycap sign.
+        RESULT: Pattern[str]
+        """
+        codepoints = sorted({ord(char) for char in self.trie if ord(char) >= 128} | {ord(KEYCAP_SIGN)})
+        ranges: List[List[int]] = []
+        for codepoint in codepoints:
+            if ranges and codepoint - ranges[-1][1] <= CANDIDATE_RANGE_GAP:
+                ranges[-1][1] = codepoint
+            else:
+                ranges.append([codepoint, codepoint])
+
+        char_class = "".join(re.escape(chr(low)) + "-" + re.escape(chr(high)) for low, high in ranges)
+        return re.compile(f"[{char_class}]")
+
+    def _longest_match(self, text: str, start: int) -> int:
+        """
+        CALL: _longest_match(self, text: str, start: int)
+        DESCRIPTION: Walks the trie from start and returns the end of the longest emoji found (start if none).
+        RESULT: int
+        """
+        node = self.trie
+        end = start
+        for position in range(start, len(text)):
+            node = node.get(text[position])
+            if node is None:
+                break
+            if "" in node:
+                end = position + 1
+        return end
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        """
+        CALL: spans(self, text: str)
+        DESCRIPTION: Scans the text once and returns the (start, end) positions of every emoji, left to right.
+        RESULT: List[Tuple[int, int]]
+        """
+        found: List[Tuple[int, int]] = []
+        position = 0
+        for candidate in self.candidate_pattern.finditer(text):
+            start = candidate.start()
+            if text[start] == KEYCAP_SIGN:
+                start -= 2 if text[start - 1:start] == VARIATION_SELECTOR else 1
+            if start < position:
+                continue
+            end = self._longest_match(text, start)
+            if end > start:
+                found.append((start, end))
+                position = end
+        return found
+
+    def findall(self, text: str) -> List[str]:
+        """
+        CALL: findall(self, text: str)
+        DESCRIPTION: Returns every emoji of the text, keeping multi-codepoint sequences whole.
+        RESULT: List[str]
+        """
+        return [text[start:end] for start, end in self.spans(text)]
+
+    def count(self, contents: pd.Series) -> Counter[str]: # type: ignore
+        """
+        CALL: count(self, contents: pd.Series)
+        DESCRIPTION: Counts the emojis of a whole column (or list) of texts. The texts are joined with newlines,
+        which are never part of an emoji, and scanned in a single pass.
+        RESULT: Counter[str]
+        """
+        texts = pd.Series(contents).dropna().astype(str) # type: ignore
+        return Counter(self.findall("\n".join(texts)))
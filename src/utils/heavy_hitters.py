@@ -0,0 +1,84 @@
+# src/utils/heavy_hitters.py
+from typing import Dict, Iterator, List, Mapping, Tuple
+import heapq
+
+
+class HeavyHitters:
+    """
+    Bounded-memory replacement for Counter when only the top keys are needed: a mergeable
+    Misra-Gries summary that keeps at most `capacity` keys whatever the number of distinct keys seen.
+
+    Error bounds, with N the total weight added (`total`) and k the capacity:
+    - counts are never overestimated: true_count - error_bound <= self[key] <= true_count;
+    - error_bound <= (N - sum of the kept counts) / (k + 1) <= N / (k + 1);
+    - every key whose true count is above N / (k + 1) is kept.
+    The top-N ranking is exact whenever the N-th largest count exceeds the N+1-th by more than error_bound.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.total = 0
+        self.error_bound = 0
+
+    def update(self, counts: Mapping[str, int]) -> None:
+        """
+        CALL: update(self, counts: Mapping[str, int])
+        DESCRIPTION: Adds a batch of counts (e.g. the Counter of one chunk), then shrinks the summary back to capacity.
+        RESULT: None
+        """
+        own = self.counts
+        for key, count in counts.items():
+            own[key] = own.get(key, 0) + count
+            self.total += count
+        self._prune()
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        """
+        CALL: merge(self, other: HeavyHitters)
+        DESCRIPTION: Adds another summary (e.g. from a worker) and returns self. The error bounds add up, and
+        still hold against the combined total.
+        RESULT: HeavyHitters
+        """
+        own = self.counts
+        for key, count in other.counts.items():
+            own[key] = own.get(key, 0) + count
+        self.total += other.total
+        self.error_bound += other.error_bound
+        self._prune()
+        return self
+
+    def _prune(self) -> None:
+        """
+        CALL: _prune(self)
+        DESCRIPTION: When more than capacity keys are held, subtracts the (capacity + 1)-th largest count from
+        every key and drops the ones left at zero, which keeps at most capacity keys.
+        RESULT: None
+        """
+        if len(self.counts) <= self.capacity:
+            return
+        threshold = heapq.nlargest(self.capacity + 1, self.counts.values())[-1]
+        self.counts = {key: count - threshold for key, count in self.counts.items() if count > threshold}
+        self.error_bound += threshold
+
+    def most_common(self, n: int) -> List[Tuple[str, int]]:
+        """
+        CALL: most_common(self, n: int)
+        DESCRIPTION: Returns the n keys with the highest estimated counts, like Counter.most_common.
+        RESULT: List[Tuple[str, int]]
+        """
+        return heapq.nlargest(n, self.counts.items(), key=lambda item: item[1])
+
+    def __getitem__(self, key: str) -> int:
+        return self.counts.get(key, 0)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.counts)
+
+    def __str__(self) -> str:
+        return f"{len(self.counts):,} of {self.capacity:,} keys over {self.total:,} counts, error bound {self.error_bound:,}"
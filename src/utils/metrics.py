@@ -0,0 +1,230 @@
+# src/utils/metrics.py
+from typing import Any, Callable, Dict, List, Optional
+from collections import defaultdict
+from cProfile import Profile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import psutil  # type: ignore
+except ImportError:
+    psutil = None
+
+MetricsSink = Callable[[Dict[str, Any]], None]
+
+_sinks: List[MetricsSink] = []
+_memory_profiling = False
+
+
+def _rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB, or None without psutil (a memory_profiler dependency)."""
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss / 2**20 # type: ignore
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, from getrusage on POSIX and psutil on Windows."""
+    try:
+        import resource
+    except ImportError:
+        return psutil.Process().memory_info().peak_wset / 2**20 if psutil is not None else None # type: ignore
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class JsonLinesSink:
+    """Appends every metrics record as one JSON line to a file. Safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=str) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class StageSummary:
+    """Accumulates the records of each stage (calls, seconds, rows, bytes, largest RSS delta) for a final report."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def __call__(self, record: Dict[str, Any]) -> None:
+        with self.lock:
+            totals = self.stages[record["stage"]]
+            totals["calls"] += 1
+            totals["seconds"] += record["seconds"]
+            totals["rows"] += record.get("rows") or 0
+            totals["bytes"] += record.get("bytes") or 0
+            totals["max_rss_delta_mb"] = max(totals["max_rss_delta_mb"], record.get("rss_delta_mb") or 0.0)
+
+    def __str__(self) -> str:
+        lines = [f"{'stage':<14} {'calls':>7} {'seconds':>10} {'rows':>12} {'MB read':>10} {'max RSS +MB':>12}"]
+        for name, totals in sorted(self.stages.items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"{name:<14} {totals['calls']:>7,.0f} {totals['seconds']:>10.3f} {totals['rows']:>12,.0f} "
+                         f"{totals['bytes'] / 2**20:>10,.1f} {totals['max_rss_delta_mb']:>12,.1f}")
+        return "\n".join(lines)
+
+
+class Stage:
+    """
+    Times one stage of the pipeline and emits a record with its duration, the RSS delta and any counters set
+    with update() (rows, bytes, ...). Only created while metrics are enabled; see stage().
+    """
+
+    def __init__(self, name: str, fields: Dict[str, Any]):
+        self.name = name
+        self.fields = fields
+
+    def update(self, **fields: Any) -> None:
+        self.fields.update(fields)
+
+    def __enter__(self) -> "Stage":
+        self.rss_before = _rss_mb()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        seconds = time.perf_counter() - self.started
+        rss = _rss_mb()
+        record: Dict[str, Any] = {
+            "ts": time.time(),
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+            "stage": self.name,
+            "seconds": seconds,
+            **self.fields,
+        }
+        if rss is not None and self.rss_before is not None:
+            record["rss_mb"] = rss
+            record["rss_delta_mb"] = rss - self.rss_before
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        for sink in _sinks:
+            sink(record)
+
+
+class _NoStage:
+    """Stand-in returned by stage() while metrics are disabled: entering, updating and leaving it cost nothing."""
+
+    def update(self, **fields: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoStage":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        pass
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str, **fields: Any) -> Any:
+    """
+    CALL: stage(name: str, **fields: Any)
+    DESCRIPTION: Context manager timing a pipeline stage (e.g. "decode", "q3.extract") and emitting a record to the
+    enabled sinks. While metrics are disabled it returns a shared no-op object, so the hooks can stay in place.
+    RSS is read for the whole process, so deltas of stages running in parallel threads overlap.
+    RESULT: Stage
+    """
+    if not _sinks:
+        return _NO_STAGE
+    return Stage(name, fields)
+
+def metrics_enabled() -> bool:
+    """
+    CALL: metrics_enabled()
+    DESCRIPTION: Tells whether stage records are being emitted, to skip computing counters nobody will read.
+    RESULT: bool
+    """
+    return bool(_sinks)
+
+def enable_metrics(*sinks: MetricsSink) -> None:
+    """
+    CALL: enable_metrics(*sinks: MetricsSink)
+    DESCRIPTION: Sends every stage record to the given callbacks (e.g. a JsonLinesSink and a StageSummary).
+    Worker processes only report when they inherit the sinks (fork start method).
+    RESULT: None
+    """
+    _sinks.extend(sinks)
+
+def disable_metrics() -> None:
+    """
+    CALL: disable_metrics()
+    DESCRIPTION: Stops emitting records and closes the sinks that hold a file.
+    RESULT: None
+    """
+    for sink in _sinks:
+        if isinstance(sink, JsonLinesSink):
+            sink.close()
+    _sinks.clear()
+
+def memory_profiled(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    CALL: memory_profiled(func: Callable[..., Any])
+    DESCRIPTION: Decorator running func under memory_profiler's line-by-line @profile only when run_instrumented
+    was asked to profile; otherwise func runs untouched, without the tracing overhead.
+    RESULT: Callable[..., Any]
+    """
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not _memory_profiling:
+            return func(*args, **kwargs)
+        from memory_profiler import profile  # type: ignore
+        return profile(func)(*args, **kwargs) # type: ignore
+    return wrapper
+
+def run_instrumented(func: Callable[..., Any], *args: Any, profile: bool = False, metrics_path: Optional[str] = None) -> Any:
+    """
+    CALL: run_instrumented(func: Callable[..., Any], *args: Any, profile: bool = False, metrics_path: Optional[str] = None)
+    DESCRIPTION: Runs an entry point and reports how it went. By default only the wall time and peak RSS are printed.
+    With metrics_path every stage record is appended to that JSON lines file and a per-stage summary is printed.
+    With profile the run is wrapped in cProfile and memory_profiler, as the scripts used to do; their overhead
+    is then included in the reported numbers.
+    RESULT: Any
+    """
+    global _memory_profiling
+    from utils.tools import get_stats_in_memory
+
+    summary: Optional[StageSummary] = None
+    if metrics_path:
+        summary = StageSummary()
+        enable_metrics(JsonLinesSink(metrics_path), summary)
+
+    _memory_profiling = profile
+    profiler = Profile() if profile else None
+    started = time.perf_counter()
+    try:
+        if profiler:
+            profiler.enable()
+        result = func(*args)
+        if profiler:
+            profiler.disable()
+    finally:
+        _memory_profiling = False
+        if metrics_path:
+            disable_metrics()
+
+    if profiler:
+        get_stats_in_memory(profiler)
+    else:
+        print(f"Total execution time: {time.perf_counter() - started:.6f} seconds")
+    peak = _peak_rss_mb()
+    if peak is not None:
+        print(f"Peak memory: {peak:,.1f} MB")
+    if summary:
+        print(summary)
+    return result
@@ -0,0 +1,64 @@
+# src/utils/prefilter.py
+from typing import Optional
+import pandas as pd
+from utils.tools import get_emoji_matcher
+
+class PrefilterStats:
+    """Counts how many rows a pre-screen looked at and how many it kept for full extraction."""
+
+    def __init__(self, rows_seen: int = 0, rows_kept: int = 0):
+        self.rows_seen = rows_seen
+        self.rows_kept = rows_kept
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of the screened rows that went on to full extraction."""
+        return self.rows_kept / self.rows_seen if self.rows_seen else 0.0
+
+    def update(self, rows_seen: int, rows_kept: int) -> None:
+        """
+        CALL: update(self, rows_seen: int, rows_kept: int)
+        DESCRIPTION: Adds the rows seen and kept by one screened chunk.
+        RESULT: None
+        """
+        self.rows_seen += rows_seen
+        self.rows_kept += rows_kept
+
+    def merge(self, other: "PrefilterStats") -> "PrefilterStats":
+        """
+        CALL: merge(self, other: PrefilterStats)
+        DESCRIPTION: Adds the counts of another PrefilterStats (e.g. from a worker) and returns self.
+        RESULT: PrefilterStats
+        """
+        self.update(other.rows_seen, other.rows_kept)
+        return self
+
+    def __str__(self) -> str:
+        return (f"kept {self.rows_kept:,} of {self.rows_seen:,} rows ({self.hit_rate:.1%}), "
+                f"skipped {self.rows_seen - self.rows_kept:,}")
+
+def screen_mentions(contents: pd.Series, stats: Optional[PrefilterStats] = None) -> pd.Series: # type: ignore
+    """
+    CALL: screen_mentions(contents: pd.Series, stats: Optional[PrefilterStats] = None)
+    DESCRIPTION: Keeps only the texts containing an '@', the only ones that can hold a mention.
+    RESULT: pd.Series
+    """
+    kept = contents[contents.str.contains("@", regex=False, na=False)] # type: ignore
+    if stats is not None:
+        stats.update(len(contents), len(kept)) # type: ignore
+    return kept # type: ignore
+
+def screen_emojis(contents: pd.Series, stats: Optional[PrefilterStats] = None) -> pd.Series: # type: ignore
+    """
+    CALL: screen_emojis(contents: pd.Series, stats: Optional[PrefilterStats] = None)
+    DESCRIPTION: Keeps only the texts with a codepoint that can start an emoji. Pure ASCII texts are dropped
+    first with str.isascii, which costs O(1) per string in CPython; the rest are searched with the
+    matcher's candidate character class.
+    RESULT: pd.Series
+    """
+    search = get_emoji_matcher().candidate_pattern.search
+    mask = [isinstance(text, str) and not text.isascii() and search(text) is not None for text in contents]
+    kept = contents[mask] # type: ignore
+    if stats is not None:
+        stats.update(len(contents), len(kept)) # type: ignore
+    return kept # type: ignore
@@ -0,0 +1,220 @@
+# src/utils/spill_counter.py
+from typing import Any, Hashable, Iterator, List, Mapping, Optional, Tuple, Union
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+import weakref
+import zlib
+from utils.constants import SPILL_PARTITIONS
+
+# Runs are written and read back in blocks of this many (key, count) pairs
+RUN_BLOCK_SIZE = 1 << 14
+
+
+class SpillCounter:
+    """
+    Exact replacement for Counter when the counts can outgrow RAM. Keys are counted in memory until more than
+    max_keys are held; the counts are then hash-partitioned and every partition is written to local disk as a
+    run sorted by key, and counting starts over in memory.
+    items() merges the runs of one partition at a time (a k-way merge of the sorted runs plus the in-memory
+    keys), so every key comes out once with its exact total while one block per run is held. most_common
+    streams these totals through a top-N heap, so memory stays bounded by max_keys whatever the input size.
+    Keys must be orderable among themselves (e.g. strings or (date, username) tuples).
+    The runs only live on local disk, so a SpillCounter itself cannot be pickled: the aggregators hand over a
+    SpillSnapshot of its merged totals instead (see get_state), which a new counter merges and spills again.
+    The runs are deleted by close() or when the counter is garbage collected.
+    """
+
+    def __init__(self, max_keys: int, partitions: int = SPILL_PARTITIONS, spill_dir: Optional[str] = None):
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+        self.max_keys = max_keys
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.counts: Counter[Any] = Counter()
+        self.runs: List[List[str]] = [[] for _ in range(partitions)]
+        self.spills = 0
+        self.spilled_keys = 0
+        self.directory: Optional[str] = None
+        self._cleanup: Optional[weakref.finalize] = None
+
+    def update(self, counts: Mapping[Hashable, int]) -> None:
+        """
+        CALL: update(self, counts: Mapping[Hashable, int])
+        DESCRIPTION: Adds a batch of counts (e.g. the Counter of one chunk), spilling once more than max_keys are held.
+        RESULT: None
+        """
+        self.counts.update(counts)
+        if len(self.counts) > self.max_keys:
+            self.spill()
+
+    def merge(self, other: Union["SpillCounter", "SpillSnapshot", Mapping[Hashable, int]]) -> "SpillCounter":
+        """
+        CALL: merge(self, other: Union[SpillCounter, SpillSnapshot, Mapping[Hashable, int]])
+        DESCRIPTION: Adds the exact totals of another counter (e.g. a partial aggregator or a restored state) block
+        by block and returns self.
+        RESULT: SpillCounter
+        """
+        items = iter(other.items())
+        while True:
+            block = dict(islice(items, RUN_BLOCK_SIZE))
+            if not block:
+                return self
+            self.update(block)
+
+    def _partition(self, key: Hashable) -> int:
+        """Partition of a key, stable across processes unlike hash()."""
+        return zlib.crc32(repr(key).encode("utf-8")) % self.partitions
+
+    def spill(self) -> None:
+        """
+        CALL: spill(self)
+        DESCRIPTION: Writes the in-memory counts as one sorted run per partition and empties them.
+        RESULT: None
+        """
+        if not self.counts:
+            return
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="latam-spill-", dir=self.spill_dir)
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self.directory, True)
+
+        buckets: List[List[Tuple[Any, int]]] = [[] for _ in range(self.partitions)]
+        for item in self.counts.items():
+            buckets[self._partition(item[0])].append(item)
+        self.spilled_keys += len(self.counts)
+        self.counts = Counter()
+
+        for partition, items in enumerate(buckets):
+            if not items:
+                continue
+            items.sort(key=itemgetter(0))
+            path = os.path.join(self.directory, f"p{partition:03d}-r{self.spills:05d}.run")
+            with open(path, "wb") as file:
+                for start in range(0, len(items), RUN_BLOCK_SIZE):
+                    pickle.dump(items[start:start + RUN_BLOCK_SIZE], file, protocol=pickle.HIGHEST_PROTOCOL)
+            self.runs[partition].append(path)
+            buckets[partition] = []
+        self.spills += 1
+
+    @staticmethod
+    def _read_run(path: str) -> Iterator[Tuple[Any, int]]:
+        """Yields the (key, count) pairs of a run, one block in memory at a time."""
+        with open(path, "rb") as file:
+            while True:
+                try:
+                    block: List[Tuple[Any, int]] = pickle.load(file)
+                except EOFError:
+                    return
+                yield from block
+
+    def items(self) -> Iterator[Tuple[Any, int]]:
+        """
+        CALL: items(self)
+        DESCRIPTION: Yields every key once with its exact total, partition by partition. Without spilled runs these
+        are just the in-memory counts.
+        RESULT: Iterator[Tuple[Any, int]]
+        """
+        if not self.spills:
+            yield from self.counts.items()
+            return
+
+        in_memory: List[List[Tuple[Any, int]]] = [[] for _ in range(self.partitions)]
+        for item in self.counts.items():
+            in_memory[self._partition(item[0])].append(item)
+
+        for partition in range(self.partitions):
+            in_memory[partition].sort(key=itemgetter(0))
+            sources = [self._read_run(path) for path in self.runs[partition]] + [iter(in_memory[partition])]
+            current: Optional[List[Any]] = None
+            for key, count in heapq.merge(*sources, key=itemgetter(0)):
+                if current is not None and current[0] == key:
+                    current[1] += count
+                    continue
+                if current is not None:
+                    yield current[0], current[1]
+                current = [key, count]
+            if current is not None:
+                yield current[0], current[1]
+            in_memory[partition] = []
+
+    def most_common(self, n: int) -> List[Tuple[Any, int]]:
+        """
+        CALL: most_common(self, n: int)
+        DESCRIPTION: Returns the n keys with the highest exact totals, merging the runs when there are any.
+        RESULT: List[Tuple[Any, int]]
+        """
+        if not self.spills:
+            return self.counts.most_common(n)
+        return heapq.nlargest(n, self.items(), key=itemgetter(1))
+
+    def snapshot(self) -> "SpillSnapshot":
+        """
+        CALL: snapshot(self)
+        DESCRIPTION: Returns the exact totals as a SpillSnapshot, built from items() one block at a time.
+        RESULT: SpillSnapshot
+        """
+        blocks: List[bytes] = []
+        keys = 0
+        items = self.items()
+        while True:
+            block = list(islice(items, RUN_BLOCK_SIZE))
+            if not block:
+                return SpillSnapshot(blocks, keys)
+            blocks.append(zlib.compress(pickle.dumps(block, protocol=pickle.HIGHEST_PROTOCOL), 1))
+            keys += len(block)
+
+    def close(self) -> None:
+        """
+        CALL: close(self)
+        DESCRIPTION: Deletes the spilled runs and empties the counter.
+        RESULT: None
+        """
+        if self._cleanup:
+            self._cleanup()
+        self.counts = Counter()
+        self.runs = [[] for _ in range(self.partitions)]
+        self.spills = 0
+        self.spilled_keys = 0
+        self.directory = None
+        self._cleanup = None
+
+    def __len__(self) -> int:
+        # Upper bound on the distinct keys: a key spilled in several runs is counted once per run
+        return len(self.counts) + self.spilled_keys
+
+    def __getstate__(self) -> Any:
+        raise TypeError("A SpillCounter keeps its runs on local disk and cannot be pickled")
+
+    def __str__(self) -> str:
+        return (f"{len(self.counts):,} keys in memory (max {self.max_keys:,}), {self.spilled_keys:,} keys spilled "
+                f"in {self.spills} spills x {self.partitions} partitions")
+
+
+class SpillSnapshot:
+    """
+    Picklable copy of the exact totals of a SpillCounter, for checkpoints and partial files. The (key, count)
+    pairs of items() are kept as zlib-compressed pickled blocks of RUN_BLOCK_SIZE pairs, a few bytes per key
+    instead of the hundred or more a key takes in a Counter. items() decompresses one block at a time, so
+    SpillCounter.merge spills a snapshot again without ever holding its keys at once.
+    """
+
+    def __init__(self, blocks: List[bytes], keys: int):
+        self.blocks = blocks
+        self.keys = keys
+
+    def items(self) -> Iterator[Tuple[Any, int]]:
+        """
+        CALL: items(self)
+        DESCRIPTION: Yields every key once with its total, one decompressed block at a time.
+        RESULT: Iterator[Tuple[Any, int]]
+        """
+        for block in self.blocks:
+            yield from pickle.loads(zlib.decompress(block))
+
+    def __len__(self) -> int:
+        return self.keys
@@ -1,29 +1,100 @@
 # src/utils/tools.py
-from typing import Any
+from typing import TYPE_CHECKING, Any, Optional, Tuple
+from collections import Counter
+from datetime import date
 from cProfile import Profile
 import argparse
 import pstats
 import io
-import emoji
 import re
+import pandas as pd
+from utils.constants import USERNAME_COLUMN, THREAD_BACKEND, PROCESS_BACKEND, RANGE_BACKEND
+
+if TYPE_CHECKING:
+    from utils.emoji_matcher import EmojiMatcher
+
+# Regular expression to extract mentions (@username)
+MENTION_PATTERN = re.compile(r"@(\w+)")
 
 def extract_mentions(text: Any) -> list[Any]:
     """
-    CALL: extract_emojis(text: Any)
+    CALL: extract_mentions(text: Any)
     DESCRIPTION: This method extracts mentions from a tweet.
     RESULT: list[Any]
     """
-    # Regular expression to extract mentions (@username)
-    mention_pattern = re.compile(r"@(\w+)")
-    return mention_pattern.findall(text) if isinstance(text, str) else []
-    
+    return MENTION_PATTERN.findall(text) if isinstance(text, str) else []
+
+def count_mentions(contents: pd.Series) -> Counter[str]: # type: ignore
+    """
+    CALL: count_mentions(contents: pd.Series)
+    DESCRIPTION: This method counts the mentions of a whole column of tweets at once. The texts are joined
+    with newlines, which can neither start nor continue a mention, and scanned by a single findall, so the
+    counts match calling extract_mentions row by row without a Python-level loop per row.
+    RESULT: Counter[str]
+    """
+    return Counter(MENTION_PATTERN.findall("\n".join(contents.dropna().astype(str))))
+
+_emoji_matcher: Optional["EmojiMatcher"] = None
+
+def get_emoji_matcher() -> "EmojiMatcher":
+    """
+    CALL: get_emoji_matcher()
+    DESCRIPTION: This method returns the shared EmojiMatcher, building it from emoji.EMOJI_DATA on first use.
+    The emoji package is only imported then, so queries without emojis never load its database.
+    RESULT: EmojiMatcher
+    """
+    global _emoji_matcher
+    if _emoji_matcher is None:
+        from utils.emoji_matcher import EmojiMatcher
+        _emoji_matcher = EmojiMatcher()
+    return _emoji_matcher
+
 def extract_emojis(text: Any) -> list[Any]:
     """
     CALL: extract_emojis(text: Any)
-    DESCRIPTION: This method extracts emojis from text.
+    DESCRIPTION: This method extracts emojis from text in a single scan, keeping multi-codepoint sequences whole.
     RESULT: list[Any]
     """
-    return [char for char in text if char in emoji.EMOJI_DATA] if isinstance(text, str) else []
+    return get_emoji_matcher().findall(text) if isinstance(text, str) else [] # type: ignore
+
+def count_emojis(contents: pd.Series) -> Counter[str]: # type: ignore
+    """
+    CALL: count_emojis(contents: pd.Series)
+    DESCRIPTION: This method counts the emojis of a whole column of tweets at once.
+    RESULT: Counter[str]
+    """
+    return get_emoji_matcher().count(contents)
+
+def get_usernames(chunk: pd.DataFrame) -> pd.Series: # type: ignore
+    """
+    CALL: get_usernames(chunk: pd.DataFrame)
+    DESCRIPTION: This method returns the author username of every row, either from a projected
+    'user.username' column or from the nested 'user' dict column.
+    RESULT: pd.Series
+    """
+    if USERNAME_COLUMN in chunk.columns:
+        return chunk[USERNAME_COLUMN] # type: ignore
+    return chunk['user'].map(lambda u: u.get('username') if isinstance(u, dict) else None) # type: ignore
+
+def count_date_users(chunk: pd.DataFrame) -> Tuple[pd.Series, pd.Series]: # type: ignore
+    """
+    CALL: count_date_users(chunk: pd.DataFrame)
+    DESCRIPTION: Counts the tweets of a chunk per date and per (date, username), without a Python loop over rows.
+    Dates are floored to the day in place of building a date object per row, rows without a username are
+    dropped once, and the pairs are counted with groupby([date, username]).size(). Only the resulting index
+    levels are converted to datetime.date.
+    RESULT: Tuple[pd.Series, pd.Series]
+    """
+    days = chunk['date'].dt.floor('D') # type: ignore
+    date_counts = days.value_counts() # type: ignore
+    date_counts.index = date_counts.index.date # type: ignore
+
+    usernames = get_usernames(chunk) # type: ignore
+    valid = usernames.notna() & (usernames != "") # type: ignore
+    date_user_counts = pd.DataFrame({"date": days[valid], "username": usernames[valid]}).groupby(["date", "username"], sort=False).size() # type: ignore
+    date_user_counts.index = date_user_counts.index.set_levels(date_user_counts.index.levels[0].date, level=0) # type: ignore
+
+    return date_counts, date_user_counts # type: ignore
 
 def get_app_args() -> argparse.Namespace:
     """
@@ -32,7 +103,20 @@ def get_app_args() -> argparse.Namespace:
     RESULT: argparse.Namespace
     """
     parser = argparse.ArgumentParser()
-    parser.add_argument("-file_path", type=str, help="file_path")
+    parser.add_argument("-file_path", type=str, nargs="+", help="file_path: one or more files or glob patterns")
+    parser.add_argument("-optimize", type=str, choices=["memory", "time"], default="memory", help="optimize")
+    parser.add_argument("-backend", type=str, choices=[THREAD_BACKEND, RANGE_BACKEND, PROCESS_BACKEND], default=THREAD_BACKEND, help="backend")
+    parser.add_argument("-use_cache", action="store_true", help="use_cache")
+    parser.add_argument("-checkpoint_path", type=str, default=None, help="checkpoint_path")
+    parser.add_argument("-capacity", type=int, default=None, help="capacity")
+    parser.add_argument("-adaptive_chunks", action="store_true", help="adaptive_chunks")
+    parser.add_argument("-metrics_path", type=str, default=None, help="metrics_path")
+    parser.add_argument("-profile", action="store_true", help="profile")
+    parser.add_argument("-start_date", type=date.fromisoformat, default=None, help="start_date: first UTC day, YYYY-MM-DD")
+    parser.add_argument("-end_date", type=date.fromisoformat, default=None, help="end_date: last UTC day, YYYY-MM-DD")
+    parser.add_argument("-pipeline", action="store_true", help="pipeline: overlap read, decode and aggregate (memory scripts)")
+    parser.add_argument("-memory_budget_mb", type=float, default=None, help="memory_budget_mb: exact q1/q3 counters spill to disk past this size (memory scripts)")
+    parser.add_argument("-spill_dir", type=str, default=None, help="spill_dir: directory of the spilled runs (default: system temporary directory)")
     return parser.parse_args()
 
 def get_stats_in_memory(profiler: Profile) -> None:
@@ -0,0 +1,61 @@
+# src/utils/top_n.py
+from typing import Dict, List, Mapping, Sequence, Set, Tuple
+import heapq
+
+
+def _nth_largest(values: List[int], top_n: int) -> int:
+    """
+    CALL: _nth_largest(values: List[int], top_n: int)
+    DESCRIPTION: Returns the top_n-th largest value, or 0 when there are fewer values.
+    RESULT: int
+    """
+    if len(values) < top_n:
+        return 0
+    return heapq.nlargest(top_n, values)[-1]
+
+def threshold_top_n(partials: Sequence[Mapping[str, int]], top_n: int = 10) -> List[Tuple[str, int]]:
+    """
+    CALL: threshold_top_n(partials: Sequence[Mapping[str, int]], top_n: int = 10)
+    DESCRIPTION: Returns the top N keys of the sum of several partial counters (e.g. one per worker range) without
+    building the merged counter, with the three phases of the TPUT threshold algorithm:
+    1. the local top N of every partial give partial sums whose N-th largest, tau1, is a lower bound of the answer;
+    2. every partial reports the keys counted at least tau1 / m (m partials). A key never reported sums to less than
+       tau1, and a reported key cannot exceed its reported counts plus tau1 / m for each partial that did not report it;
+       candidates whose upper bound is below the new N-th partial sum, tau2, are dropped;
+    3. the exact sums of the remaining candidates are looked up and the top N returned.
+    The result holds the same counts as Counter.most_common(top_n) on the merged counter; only ties may be ordered differently.
+    RESULT: List[Tuple[str, int]]
+    """
+    partials = [partial for partial in partials if partial]
+    if not partials or top_n <= 0:
+        return []
+    if len(partials) == 1:
+        return heapq.nlargest(top_n, partials[0].items(), key=lambda item: item[1])
+
+    # Phase 1: local top N lists
+    sums: Dict[str, int] = {}
+    reported: List[Set[str]] = []
+    for partial in partials:
+        local_top = heapq.nlargest(top_n, partial.items(), key=lambda item: item[1])
+        reported.append({key for key, _ in local_top})
+        for key, count in local_top:
+            sums[key] = sums.get(key, 0) + count
+    tau1 = _nth_largest(list(sums.values()), top_n)
+
+    # Phase 2: every key at or above tau1 / m
+    threshold = tau1 / len(partials)
+    sums = {}
+    for index, partial in enumerate(partials):
+        keys = reported[index]
+        keys.update(key for key, count in partial.items() if count >= threshold)
+        for key in keys:
+            sums[key] = sums.get(key, 0) + partial[key]
+    tau2 = _nth_largest(list(sums.values()), top_n)
+    candidates = [
+        key for key, partial_sum in sums.items()
+        if partial_sum + threshold * sum(1 for keys in reported if key not in keys) >= tau2
+    ]
+
+    # Phase 3: exact sums of the surviving candidates
+    totals = [(key, sum(partial.get(key, 0) for partial in partials)) for key in candidates]
+    return heapq.nlargest(top_n, totals, key=lambda item: item[1])
@@ -0,0 +1,24 @@
+# tests/conftest.py
+import os
+import sys
+import pytest
+
+# The modules are imported the way the scripts import them, from src
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from benchmarks.tweet_generator import generate_tweets  # noqa: E402
+from reference import Reference  # noqa: E402
+
+FIXTURE_ROWS = 2000
+
+
+@pytest.fixture(scope="session")
+def tweets_path(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """About 6 MB of synthetic tweets over 8 days, 300 authors and Zipf-distributed mentions and emojis."""
+    return generate_tweets(str(tmp_path_factory.mktemp("tweets") / "tweets.jsonl"), FIXTURE_ROWS,
+                           num_users=300, num_days=8, seed=7)
+
+
+@pytest.fixture(scope="session")
+def reference(tweets_path: str) -> Reference:
+    return Reference(tweets_path)
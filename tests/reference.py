@@ -0,0 +1,89 @@
+# tests/reference.py
+from typing import Any, Dict, List, Tuple
+from collections import Counter, defaultdict
+from datetime import date
+import bz2
+import gzip
+import json
+import re
+import struct
+import zlib
+import emoji
+
+BGZF_BLOCK_SIZE = 65280
+
+
+class Reference:
+    """
+    Straightforward answers of q1, q2 and q3: every line decoded in full with json, mentions found with a plain
+    regex and emojis with the emoji package. The engines must agree with it, up to the order of ties.
+    """
+
+    def __init__(self, file_path: str, start_date: Any = None, end_date: Any = None):
+        self.date_counts: Counter[date] = Counter()
+        self.date_users: Dict[date, Counter[str]] = defaultdict(Counter)
+        self.mentions: Counter[str] = Counter()
+        self.emojis: Counter[str] = Counter()
+        self.rows = 0
+        with open(file_path, encoding="utf-8") as file:
+            for line in file:
+                tweet = json.loads(line)
+                day = date.fromisoformat(tweet["date"][:10])
+                if (start_date and day < start_date) or (end_date and day > end_date):
+                    continue
+                self.rows += 1
+                self.date_counts[day] += 1
+                self.date_users[day][tweet["user"]["username"]] += 1
+                self.mentions.update(re.findall(r"@(\w+)", tweet["content"]))
+                self.emojis.update(match["emoji"] for match in emoji.emoji_list(tweet["content"]))
+
+    def check(self, results: Dict[str, List[Tuple[Any, Any]]], top_n: int = 10) -> None:
+        """Asserts that the results of every query present match the reference."""
+        if "q1" in results:
+            self.check_q1(results["q1"], top_n)
+        if "q2" in results:
+            check_top(results["q2"], self.emojis, top_n)
+        if "q3" in results:
+            check_top(results["q3"], self.mentions, top_n)
+
+    def check_q1(self, results: List[Tuple[Any, Any]], top_n: int = 10) -> None:
+        """The dates have the top N date counts and each user has the highest count of its date."""
+        expected = [count for _, count in self.date_counts.most_common(top_n)]
+        assert sorted((self.date_counts[day] for day, _ in results), reverse=True) == expected
+        for day, username in results:
+            assert self.date_users[day][username] == max(self.date_users[day].values())
+
+
+def check_top(results: List[Tuple[Any, Any]], counts: Counter[str], top_n: int = 10) -> None:
+    """Asserts that results hold the top N counts of counts, each with its true count."""
+    assert [count for _, count in results] == [count for _, count in counts.most_common(top_n)]
+    assert all(counts[key] == count for key, count in results)
+
+
+def _bgzf_block(data: bytes) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    header = struct.pack("<4BI2BH2BHH", 0x1F, 0x8B, 8, 4, 0, 0, 255, 6, 66, 67, 2, len(compressed) + 25)
+    return header + compressed + struct.pack("<II", zlib.crc32(data), len(data))
+
+def write_compressed(source_path: str, target_path: str, compression: str) -> str:
+    """
+    Writes source_path compressed as gzip, bz2, bgzf (blocks cut mid-line, like bgzip) or multi-frame zstd
+    (1 MB frames cut mid-line, like pzstd) and returns target_path.
+    """
+    with open(source_path, "rb") as source:
+        data = source.read()
+    with open(target_path, "wb") as target:
+        if compression == "gzip":
+            target.write(gzip.compress(data))
+        elif compression == "bz2":
+            target.write(bz2.compress(data))
+        elif compression == "bgzf":
+            for start in range(0, len(data), BGZF_BLOCK_SIZE):
+                target.write(_bgzf_block(data[start:start + BGZF_BLOCK_SIZE]))
+            target.write(_bgzf_block(b""))
+        else:
+            import zstandard
+            for start in range(0, len(data), 1 << 20):
+                target.write(zstandard.ZstdCompressor().compress(data[start:start + (1 << 20)]))
+    return target_path
@@ -0,0 +1,136 @@
+# tests/test_checkpoint.py
+from datetime import date
+import logging
+import pytest
+from mgr.checkpoint_mgr import AggregationCheckpoint
+from mgr.multi_file_mgr import open_reader
+from mgr.tweet_mgr.tweet_aggregator_mgr import TweetAggregator
+from mgr.user_mgr.user_aggregator_mgr import UserAggregator
+from utils.constants import REPORT_COLUMNS
+from reference import Reference, check_top
+
+WINDOW = (date(2021, 2, 2), date(2021, 2, 6))
+
+
+def run(path: str, checkpoint_path: str, start_date=None, end_date=None, **mode):
+    """One incremental run, like q1_memory / q3_memory: returns the aggregators and the offset it resumed from."""
+    aggregators = {"tweets": TweetAggregator(**mode), "mentions": UserAggregator(**mode)}
+    with AggregationCheckpoint(checkpoint_path, path, aggregators, start_date, end_date) as checkpoint:
+        reader = open_reader(path, 300, REPORT_COLUMNS, checkpoint.start, checkpoint.end,
+                             start_date=start_date, end_date=end_date)
+        for chunk in reader.read_chunks():
+            for aggregator in aggregators.values():
+                aggregator.process_chunk(chunk)
+    return aggregators, checkpoint.start
+
+
+def check(aggregators, reference: Reference) -> None:
+    reference.check_q1(aggregators["tweets"].finalize(10))
+    check_top(aggregators["mentions"].finalize(10), reference.mentions)
+
+
+@pytest.fixture
+def growing(tmp_path, tweets_path: str):
+    """A copy of the first half of the fixture, and a function appending the rest (or any bytes)."""
+    with open(tweets_path, "rb") as file:
+        lines = file.readlines()
+    path = str(tmp_path / "growing.jsonl")
+    with open(path, "wb") as file:
+        file.writelines(lines[:1000])
+
+    def append(data: bytes = b"".join(lines[1000:])) -> None:
+        with open(path, "ab") as file:
+            file.write(data)
+    return path, append
+
+
+def test_resume_reads_only_the_appended_lines(tmp_path, growing, reference: Reference) -> None:
+    path, append = growing
+    checkpoint_path = str(tmp_path / "run.ckpt")
+    _, start = run(path, checkpoint_path)
+    assert start == 0
+    append()
+    aggregators, start = run(path, checkpoint_path)
+    assert start > 0
+    check(aggregators, reference)
+
+
+def test_a_line_without_its_newline_is_left_for_the_next_run(tmp_path, growing, tweets_path: str) -> None:
+    path, append = growing
+    checkpoint_path = str(tmp_path / "run.ckpt")
+    with open(tweets_path, "rb") as file:
+        rest = file.readlines()[1000:]
+    run(path, checkpoint_path)
+    append(rest[0][:100])
+    aggregators, _ = run(path, checkpoint_path)
+    assert sum(aggregators["tweets"].date_counts.values()) == 1000
+    append(rest[0][100:])
+    aggregators, _ = run(path, checkpoint_path)
+    assert sum(aggregators["tweets"].date_counts.values()) == 1001
+
+
+def test_a_replaced_file_is_counted_from_the_start(tmp_path, growing, tweets_path: str, reference: Reference) -> None:
+    path, _ = growing
+    checkpoint_path = str(tmp_path / "run.ckpt")
+    run(path, checkpoint_path)
+    # The same tweets in another order: the head of the file changed, so it is not an append
+    with open(tweets_path, "rb") as source, open(path, "wb") as target:
+        target.writelines(reversed(source.readlines()))
+    aggregators, start = run(path, checkpoint_path)
+    assert start == 0
+    check(aggregators, reference)
+
+
+def test_the_same_window_resumes(tmp_path, growing, tweets_path: str) -> None:
+    path, append = growing
+    checkpoint_path = str(tmp_path / "run.ckpt")
+    run(path, checkpoint_path, *WINDOW)
+    append()
+    aggregators, start = run(path, checkpoint_path, *WINDOW)
+    assert start > 0
+    check(aggregators, Reference(tweets_path, *WINDOW))
+
+
+@pytest.mark.parametrize("saved, resumed", [((None, None), WINDOW), (WINDOW, (None, None)), (WINDOW, (WINDOW[0], None))])
+def test_another_window_is_counted_from_the_start(tmp_path, growing, tweets_path: str, caplog, saved, resumed) -> None:
+    path, append = growing
+    checkpoint_path = str(tmp_path / "run.ckpt")
+    run(path, checkpoint_path, *saved)
+    append()
+    with caplog.at_level(logging.WARNING):
+        aggregators, start = run(path, checkpoint_path, *resumed)
+    assert start == 0
+    assert "counts the dates" in caplog.text
+    check(aggregators, Reference(tweets_path, *resumed))
+
+
+# Capacities above the number of distinct keys keep the summaries exact, so every mode matches the reference
+EXACT, CAPACITY, OTHER_CAPACITY, BUDGET = {}, {"capacity": 100000}, {"capacity": 200000}, {"memory_budget_mb": 0.01}
+
+
+@pytest.mark.parametrize("saved, resumed", [
+    (EXACT, CAPACITY), (CAPACITY, EXACT), (CAPACITY, OTHER_CAPACITY),
+    (EXACT, BUDGET), (BUDGET, EXACT), (CAPACITY, BUDGET), (BUDGET, CAPACITY),
+], ids=["exact-capacity", "capacity-exact", "capacity-capacity", "exact-budget", "budget-exact",
+        "capacity-budget", "budget-capacity"])
+def test_another_mode_is_counted_from_the_start(tmp_path, growing, reference: Reference, caplog, saved, resumed) -> None:
+    path, append = growing
+    checkpoint_path = str(tmp_path / "run.ckpt")
+    run(path, checkpoint_path, **saved)
+    append()
+    with caplog.at_level(logging.WARNING):
+        aggregators, start = run(path, checkpoint_path, **resumed)
+    assert start == 0
+    assert "of mode" in caplog.text
+    check(aggregators, reference)
+
+
+@pytest.mark.parametrize("saved, resumed", [(CAPACITY, CAPACITY), (BUDGET, BUDGET), (BUDGET, {"memory_budget_mb": 0.02})])
+def test_the_same_mode_resumes(tmp_path, growing, reference: Reference, saved, resumed) -> None:
+    path, append = growing
+    checkpoint_path = str(tmp_path / "run.ckpt")
+    run(path, checkpoint_path, **saved)
+    append()
+    aggregators, start = run(path, checkpoint_path, **resumed)
+    assert start > 0
+    check(aggregators, reference)
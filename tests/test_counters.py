@@ -0,0 +1,118 @@
+# tests/test_counters.py
+from collections import Counter
+import pickle
+import random
+import pytest
+from utils.heavy_hitters import HeavyHitters
+from utils.spill_counter import SpillCounter, SpillSnapshot
+from utils.top_n import threshold_top_n
+
+
+def zipf_batches(seed: int, batches: int = 40, batch_size: int = 500, keys: int = 2000) -> list:
+    """Batches of Zipf-like key counts, like the Counter of one chunk."""
+    rng = random.Random(seed)
+    weights = [rank ** -1.1 for rank in range(1, keys + 1)]
+    return [Counter(rng.choices([f"user_{index}" for index in range(keys)], weights, k=batch_size)) for _ in range(batches)]
+
+
+def check_bounds(summary: HeavyHitters, truth: Counter) -> None:
+    """The Misra-Gries guarantees of HeavyHitters against the true counts."""
+    total = sum(truth.values())
+    assert summary.total == total
+    assert len(summary) <= summary.capacity
+    assert summary.error_bound <= total / (summary.capacity + 1)
+    for key in summary:
+        assert truth[key] - summary.error_bound <= summary[key] <= truth[key]
+    for key, count in truth.items():
+        if count > total / (summary.capacity + 1):
+            assert key in summary.counts
+
+
+@pytest.mark.parametrize("capacity", [1, 10, 100, 5000])
+@pytest.mark.parametrize("seed", range(3))
+def test_heavy_hitters_error_bounds(capacity: int, seed: int) -> None:
+    summary, truth = HeavyHitters(capacity), Counter()
+    for batch in zipf_batches(seed):
+        summary.update(batch)
+        truth.update(batch)
+    check_bounds(summary, truth)
+
+
+@pytest.mark.parametrize("capacity", [10, 100])
+def test_merged_heavy_hitters_keep_the_error_bounds(capacity: int) -> None:
+    summaries, truth = [HeavyHitters(capacity) for _ in range(4)], Counter()
+    for index, batch in enumerate(zipf_batches(11)):
+        summaries[index % 4].update(batch)
+        truth.update(batch)
+    merged = summaries[0].merge(summaries[1]).merge(summaries[2].merge(summaries[3]))
+    check_bounds(merged, truth)
+
+
+def test_heavy_hitters_with_room_for_every_key_are_exact() -> None:
+    summary, truth = HeavyHitters(5000), Counter()
+    for batch in zipf_batches(5):
+        summary.update(batch)
+        truth.update(batch)
+    assert summary.error_bound == 0
+    assert summary.most_common(10) == truth.most_common(10)
+
+
+@pytest.mark.parametrize("partitions", [2, 5, 32])
+@pytest.mark.parametrize("top_n", [1, 10, 50])
+@pytest.mark.parametrize("seed", range(4))
+def test_threshold_top_n_matches_the_merged_counter(partitions: int, top_n: int, seed: int) -> None:
+    partials = [Counter() for _ in range(partitions)]
+    for index, batch in enumerate(zipf_batches(seed)):
+        partials[index % partitions].update(batch)
+    merged = sum(partials, Counter())
+    result = threshold_top_n(partials, top_n)
+    assert [count for _, count in result] == [count for _, count in merged.most_common(top_n)]
+    assert all(merged[key] == count for key, count in result)
+
+
+def test_threshold_top_n_of_skewed_partials() -> None:
+    # A key below every local top N that wins on the sum must still be found
+    partials = [Counter({"a": 10, "b": 9, "spread": 8}), Counter({"c": 10, "d": 9, "spread": 8}),
+                Counter({"e": 10, "f": 9, "spread": 8})]
+    assert threshold_top_n(partials, 1) == [("spread", 24)]
+    assert threshold_top_n([Counter(), Counter({"a": 1})], 3) == [("a", 1)]
+    assert threshold_top_n([], 3) == []
+
+
+@pytest.mark.parametrize("max_keys", [1, 50, 700, 100000])
+def test_spill_counter_is_exact(tmp_path, max_keys: int) -> None:
+    counter, truth = SpillCounter(max_keys, spill_dir=str(tmp_path)), Counter()
+    for batch in zipf_batches(3):
+        counter.update(batch)
+        truth.update(batch)
+    assert (counter.spills > 0) == (max_keys < len(truth))
+    assert sorted(counter.items()) == sorted(truth.items())
+    result = counter.most_common(20)
+    assert [count for _, count in result] == [count for _, count in truth.most_common(20)]
+    counter.close()
+    assert not list(tmp_path.iterdir())
+
+
+def test_spill_counters_merge_exactly(tmp_path) -> None:
+    counters, truth = [SpillCounter(100, spill_dir=str(tmp_path)) for _ in range(3)], Counter()
+    for index, batch in enumerate(zipf_batches(8)):
+        counters[index % 3].update(batch)
+        truth.update(batch)
+    merged = counters[0].merge(counters[1]).merge(counters[2])
+    assert sorted(merged.items()) == sorted(truth.items())
+    del counters, merged
+    assert not list(tmp_path.iterdir())
+
+
+def test_spill_snapshot_spills_again_under_a_new_budget(tmp_path) -> None:
+    counter, truth = SpillCounter(50, spill_dir=str(tmp_path)), Counter()
+    for batch in zipf_batches(9):
+        counter.update(batch)
+        truth.update(batch)
+    snapshot = counter.snapshot()
+    assert isinstance(snapshot, SpillSnapshot) and len(snapshot) == len(truth)
+    restored = SpillCounter(200, spill_dir=str(tmp_path)).merge(snapshot)
+    assert restored.spills > 0 and len(restored.counts) <= 200
+    assert sorted(restored.items()) == sorted(truth.items())
+    with pytest.raises(TypeError):
+        pickle.dumps(counter)
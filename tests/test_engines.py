@@ -0,0 +1,58 @@
+# tests/test_engines.py
+from datetime import date
+import pytest
+from latam.cli import ENGINES, run_queries
+from reference import Reference, write_compressed
+
+QUERY_SETS = [["q1"], ["q2"], ["q3"], ["q1", "q2", "q3"]]
+CHUNK_SIZE = 300
+WORKERS = 3
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("queries", QUERY_SETS, ids=",".join)
+def test_engine_matches_reference(tweets_path: str, reference: Reference, engine: str, queries: list) -> None:
+    results = run_queries(tweets_path, queries, engine, CHUNK_SIZE, WORKERS)
+    assert list(results) == queries
+    reference.check(results)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("compression", ["gzip", "bz2", "bgzf", "zstd"])
+def test_compressed_input_matches_reference(tmp_path, tweets_path: str, reference: Reference, engine: str,
+                                            compression: str) -> None:
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    path = write_compressed(tweets_path, str(tmp_path / f"tweets.{compression}"), compression)
+    reference.check(run_queries(path, ["q1", "q2", "q3"], engine, CHUNK_SIZE, WORKERS))
+
+
+@pytest.mark.parametrize("options", [
+    {"pipelined": True},
+    {"adaptive": True},
+    {"capacity": 100000},
+    {"memory_budget_mb": 0.01},
+    {"memory_budget_mb": 0.01, "pipelined": True},
+], ids=lambda options: ",".join(options))
+def test_memory_engine_options_match_reference(tmp_path, tweets_path: str, reference: Reference, options: dict) -> None:
+    # A capacity above the number of distinct keys keeps the summaries exact
+    results = run_queries(tweets_path, ["q1", "q2", "q3"], "memory", CHUNK_SIZE, spill_dir=str(tmp_path), **options)
+    reference.check(results)
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_date_window_matches_reference(tweets_path: str, engine: str) -> None:
+    start_date, end_date = date(2021, 2, 3), date(2021, 2, 5)
+    windowed = Reference(tweets_path, start_date, end_date)
+    # The first windowed run builds the date index, the second one reads through it
+    for _ in range(2):
+        results = run_queries(tweets_path, ["q1", "q2", "q3"], engine, CHUNK_SIZE, WORKERS,
+                              start_date=start_date, end_date=end_date)
+        windowed.check(results)
+        assert {day for day, _ in results["q1"]} <= {date(2021, 2, 3), date(2021, 2, 4), date(2021, 2, 5)}
+
+
+def test_memory_budget_is_rejected_by_concurrent_engines(tweets_path: str) -> None:
+    with pytest.raises(ValueError):
+        run_queries(tweets_path, ["q3"], "threads", memory_budget_mb=1)
@@ -0,0 +1,120 @@
+# tests/test_partials.py
+from datetime import date
+import concurrent.futures
+import threading
+import time
+import pytest
+from latam.partials import combine_partials, write_partial
+from mgr.concurrent_mgr import tree_reduce
+from mgr.emoji_mgr.emoji_aggregator_mgr import EmojiAggregator
+from mgr.multi_file_mgr import open_reader
+from mgr.tweet_mgr.tweet_aggregator_mgr import TweetAggregator
+from mgr.user_mgr.user_aggregator_mgr import UserAggregator
+from utils.constants import REPORT_COLUMNS
+from reference import Reference
+
+QUERIES = ["q1", "q2", "q3"]
+
+
+def write_parts(tmp_path, tweets_path: str, parts: int, **options) -> list:
+    paths = []
+    for part in range(parts):
+        paths.append(str(tmp_path / f"{parts}-{part}.partial"))
+        write_partial(tweets_path, paths[-1], QUERIES, part, parts, 300, **options)
+    return paths
+
+
+@pytest.mark.parametrize("parts", [1, 3, 8])
+def test_combined_partials_match_reference(tmp_path, tweets_path: str, reference: Reference, parts: int) -> None:
+    results, metadata = combine_partials(write_parts(tmp_path, tweets_path, parts), 10, workers=3)
+    assert sum(partial["rows"] for partial in metadata) == 2000
+    reference.check(results)
+
+
+def test_combined_budgeted_partials_match_reference(tmp_path, tweets_path: str, reference: Reference) -> None:
+    paths = write_parts(tmp_path, tweets_path, 3, memory_budget_mb=0.01, spill_dir=str(tmp_path))
+    results, _ = combine_partials(paths, 10)
+    reference.check(results)
+
+
+def test_combined_windowed_partials_match_reference(tmp_path, tweets_path: str) -> None:
+    window = (date(2021, 2, 3), date(2021, 2, 4))
+    results, _ = combine_partials(write_parts(tmp_path, tweets_path, 4, start_date=window[0], end_date=window[1]), 10)
+    Reference(tweets_path, *window).check(results)
+
+
+def test_combine_refuses_a_part_counted_twice(tmp_path, tweets_path: str) -> None:
+    paths = write_parts(tmp_path, tweets_path, 2)
+    with pytest.raises(ValueError, match="both hold part 0"):
+        combine_partials(paths + paths[:1])
+
+
+def test_combine_refuses_parts_of_different_splits(tmp_path, tweets_path: str) -> None:
+    # Part 0 of 1 is the whole input: with part 0 of 2 the first half would be counted twice
+    with pytest.raises(ValueError, match="into 2 parts"):
+        combine_partials(write_parts(tmp_path, tweets_path, 1) + write_parts(tmp_path, tweets_path, 2)[:1])
+
+
+def test_combine_refuses_a_missing_part(tmp_path, tweets_path: str) -> None:
+    with pytest.raises(ValueError, match=r"Parts \[1\] of 3"):
+        combine_partials(write_parts(tmp_path, tweets_path, 3)[::2])
+
+
+def test_combine_refuses_different_windows(tmp_path, tweets_path: str) -> None:
+    paths = write_parts(tmp_path, tweets_path, 2)
+    write_partial(tweets_path, paths[1], QUERIES, 1, 2, 300, start_date=date(2021, 2, 3))
+    with pytest.raises(ValueError, match="another window"):
+        combine_partials(paths)
+
+
+def test_combine_refuses_different_capacities(tmp_path, tweets_path: str) -> None:
+    paths = write_parts(tmp_path, tweets_path, 2)
+    write_partial(tweets_path, paths[1], QUERIES, 1, 2, 300, capacity=50)
+    with pytest.raises(ValueError, match="capacity"):
+        combine_partials(paths)
+
+
+@pytest.mark.parametrize("mode", [{}, {"capacity": 100000}, {"memory_budget_mb": 0.01}], ids=["exact", "capacity", "budget"])
+def test_serialized_aggregators_merge_to_the_reference(tweets_path: str, reference: Reference, mode: dict) -> None:
+    # A capacity above the number of distinct keys keeps the summaries exact
+    emoji_mode = {"capacity": mode["capacity"]} if "capacity" in mode else {}
+    reader = open_reader(tweets_path, 300, REPORT_COLUMNS)
+    partials = []
+    for chunk in reader.read_chunks():
+        aggregators = (TweetAggregator(**mode), EmojiAggregator(**emoji_mode), UserAggregator(**mode))
+        for aggregator in aggregators:
+            aggregator.process_chunk(chunk)
+        partials.append([type(aggregator).deserialize(aggregator.serialize()) for aggregator in aggregators])
+    merged = partials[0]
+    for partial in partials[1:]:
+        merged = [left.merge(right) for left, right in zip(merged, partial)]
+    assert [aggregator.memory_budget_mb for aggregator in (merged[0], merged[2])] == [mode.get("memory_budget_mb")] * 2
+    reference.check({query: aggregator.finalize(10) for query, aggregator in zip(QUERIES, merged)})
+
+
+def test_tree_reduce_bounds_the_partials_alive() -> None:
+    lock, alive, peak = threading.Lock(), [0], [0]
+
+    class Partial:
+        def __init__(self, value: int):
+            self.value = value
+            with lock:
+                alive[0] += 1
+                peak[0] = max(peak[0], alive[0])
+
+        def __del__(self):
+            with lock:
+                alive[0] -= 1
+
+    def merge(left: Partial, right: Partial) -> Partial:
+        time.sleep(0.001)
+        left.value += right.value
+        return left
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        result = tree_reduce((Partial(value) for value in range(300)), merge, executor, 4)
+        assert result.value == sum(range(300))
+        # At most 2 x max_pending merging, one waiting for a pair and one being produced
+        assert peak[0] <= 2 * 4 + 2
+        assert tree_reduce(iter([None, Partial(1), None]), merge, executor, 1).value == 1
+        assert tree_reduce(iter([]), merge, executor, 1) is None
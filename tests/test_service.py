@@ -0,0 +1,37 @@
+# tests/test_service.py
+from datetime import date
+import pytest
+from mgr.service_mgr import QueryService
+from reference import Reference, check_top
+
+
+@pytest.mark.parametrize("capacity", [None, 100000])
+def test_queries_match_reference_and_refresh_appended_lines(tmp_path, tweets_path: str, reference: Reference, capacity) -> None:
+    with open(tweets_path, "rb") as file:
+        lines = file.readlines()
+    path = str(tmp_path / "live.jsonl")
+    with open(path, "wb") as file:
+        file.writelines(lines[:1000])
+    service = QueryService(path, 300, capacity)
+    service.refresh()
+    with open(path, "ab") as file:
+        file.writelines(lines[1000:])
+    service.refresh()
+
+    reference.check_q1(service.query("q1")[0])
+    check_top(service.query("q2")[0], reference.emojis)
+    check_top(service.query("q3")[0], reference.mentions)
+    assert service.query("q3")[1]
+
+
+@pytest.mark.parametrize("capacity", [None, 100000])
+def test_q1_windows_do_not_grow_the_state(tweets_path: str, capacity) -> None:
+    service = QueryService(tweets_path, 300, capacity)
+    service.refresh()
+    aggregator = service.tweet_aggregator
+    dates, keys = dict(aggregator.date_counts), len(aggregator.date_user_counts)
+    for start_date, end_date in [(date(2021, 2, 3), date(2021, 2, 5)), (date(2020, 1, 1), date(2020, 1, 31)),
+                                 (date(2021, 2, 6), None)]:
+        Reference(tweets_path, start_date, end_date).check_q1(service.query("q1", 10, start_date, end_date)[0])
+    assert aggregator.get_top_user_for_date(date(2020, 1, 1)) == ""
+    assert dict(aggregator.date_counts) == dates and len(aggregator.date_user_counts) == keys
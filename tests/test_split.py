@@ -0,0 +1,66 @@
+# tests/test_split.py
+from collections import Counter
+import os
+import pytest
+from mgr.compression_mgr import frame_offsets
+from mgr.multi_file_mgr import open_reader
+from mgr.split_mgr import split_newline_ranges
+from utils.constants import REPORT_COLUMNS
+from reference import write_compressed
+
+
+def read_rows(readers) -> Counter:
+    """Every row read by the readers, as a multiset of its projected fields."""
+    rows: Counter = Counter()
+    for reader in readers:
+        for chunk in reader.read_chunks():
+            rows.update(tuple(row) for row in chunk.itertuples(index=False))
+    return rows
+
+
+@pytest.mark.parametrize("num_parts", [1, 2, 7, 64, 10000])
+def test_newline_ranges_cover_the_file(tweets_path: str, num_parts: int) -> None:
+    ranges = split_newline_ranges(tweets_path, num_parts)
+    with open(tweets_path, "rb") as file:
+        data = file.read()
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    assert all(data[start - 1:start] == b"\n" for start, _ in ranges[1:])
+    assert len(ranges) <= num_parts
+
+
+def test_newline_ranges_of_a_sub_range(tweets_path: str) -> None:
+    size = os.path.getsize(tweets_path)
+    ranges = split_newline_ranges(tweets_path, 4, size // 3, 2 * size // 3)
+    assert ranges[0][0] == size // 3 and ranges[-1][1] == 2 * size // 3
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "bgzf", "zstd"])
+@pytest.mark.parametrize("num_parts", [2, 5, 200])
+def test_split_readers_read_every_row_once(tmp_path, tweets_path: str, compression, num_parts: int) -> None:
+    path = tweets_path
+    if compression:
+        if compression == "zstd":
+            pytest.importorskip("zstandard")
+        path = write_compressed(tweets_path, str(tmp_path / f"tweets.{compression}"), compression)
+    whole = read_rows([open_reader(path, 500, REPORT_COLUMNS)])
+    parts = open_reader(path, 500, REPORT_COLUMNS).split(num_parts)
+    assert read_rows(parts) == whole
+    assert sum(whole.values()) == 2000
+    if compression in ("bgzf", "zstd"):
+        # Blocks and frames are cut mid-line, and each part still starts on a line of its own
+        assert frame_offsets(path) and len(parts) > 1
+    elif compression == "gzip":
+        assert len(parts) == 1
+
+
+def test_split_of_several_files_reads_every_row_once(tmp_path, tweets_path: str) -> None:
+    with open(tweets_path, "rb") as file:
+        lines = file.readlines()
+    for index in range(3):
+        with open(tmp_path / f"part-{index}.jsonl", "wb") as file:
+            file.writelines(lines[index::3])
+    pattern = str(tmp_path / "part-*.jsonl")
+    whole = read_rows([open_reader(tweets_path, 500, REPORT_COLUMNS)])
+    assert read_rows(open_reader(pattern, 500, REPORT_COLUMNS).split(8)) == whole
+    assert read_rows([open_reader(pattern, 500, REPORT_COLUMNS)]) == whole